@@ -6,10 +6,11 @@ Data models for product catalog
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Union
 from uuid import uuid4
 
 from pydantic import BaseModel, Field, validator, HttpUrl
+from pydantic_core import to_json
 from slugify import slugify
 
 
@@ -88,6 +89,7 @@ class ProductCategory(BaseModel):
 class ProductReview(BaseModel):
     """Product review model"""
     id: str = Field(default_factory=lambda: str(uuid4()))
+    product_id: Optional[str] = None  # Partition key of the reviews container
     user_id: str
     user_name: str
     rating: int = Field(ge=1, le=5)
@@ -99,6 +101,43 @@ class ProductReview(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ProductRatings(BaseModel):
+    """Running review aggregates, updated in O(1) per review write"""
+    count: int = Field(default=0, ge=0)
+    total: int = Field(default=0, ge=0)
+    histogram: List[int] = Field(default_factory=lambda: [0] * 5)  # Reviews per rating, 1 to 5
+
+    @classmethod
+    def from_ratings(cls, ratings) -> "ProductRatings":
+        """Build aggregates from a full set of ratings"""
+        aggregates = cls()
+        for rating in ratings:
+            aggregates.add(rating)
+        return aggregates
+
+    def add(self, rating: int):
+        """Count a new rating"""
+        if not 1 <= rating <= 5:
+            raise ValueError(f"Rating must be between 1 and 5, got {rating}")
+        self.histogram[rating - 1] += 1
+        self.count += 1
+        self.total += rating
+
+    def remove(self, rating: int):
+        """Uncount a rating that was previously added"""
+        if not 1 <= rating <= 5 or self.histogram[rating - 1] == 0:
+            raise ValueError(f"No rating of {rating} to remove")
+        self.histogram[rating - 1] -= 1
+        self.count -= 1
+        self.total -= rating
+
+    def average(self) -> Decimal:
+        """Average rating rounded to 2 decimals"""
+        if not self.count:
+            return Decimal('0')
+        return Decimal(str(round(self.total / self.count, 2)))
+
+
 class ProductSEO(BaseModel):
     """Product SEO model"""
     meta_title: Optional[str] = None
@@ -188,8 +227,10 @@ class Product(BaseModel):
     # Shipping
     shipping: ProductShipping = Field(default_factory=ProductShipping)
     
-    # Reviews and ratings
+    # Reviews and ratings (reviews live in the reviews container, see REVIEW_PAGE_QUERY;
+    # the embedded list only holds those of documents written before the move)
     reviews: List[ProductReview] = Field(default_factory=list)
+    ratings: ProductRatings = Field(default_factory=ProductRatings)
     average_rating: Decimal = Field(default=Decimal('0'), ge=0, le=5)
     review_count: int = Field(default=0, ge=0)
     
@@ -286,15 +327,67 @@ class Product(BaseModel):
         return None
 
     def update_average_rating(self):
-        """Update average rating based on reviews"""
-        if not self.reviews:
-            self.average_rating = Decimal('0')
-            self.review_count = 0
-            return
-
-        total_rating = sum(review.rating for review in self.reviews)
-        self.average_rating = Decimal(str(round(total_rating / len(self.reviews), 2)))
-        self.review_count = len(self.reviews)
+        """Update average rating and review count from the rating aggregates"""
+        self.average_rating = self.ratings.average()
+        self.review_count = self.ratings.count
+
+    def add_review(self, review: ProductReview) -> List[ProductReview]:
+        """Count a new review (stored separately, in the reviews container)
+
+        Returns the reviews detached from a document that still embedded them
+        (see detach_reviews), to be written to the reviews container too.
+        """
+        return self._recount(lambda ratings: ratings.add(review.rating))
+
+    def remove_review(self, review: ProductReview) -> List[ProductReview]:
+        """Uncount a deleted review; returns the detached embedded reviews like add_review"""
+        return self._recount(lambda ratings: ratings.remove(review.rating))
+
+    def edit_review(self, previous: ProductReview, review: ProductReview) -> List[ProductReview]:
+        """Recount an edited review; returns the detached embedded reviews like add_review"""
+        def change(ratings: ProductRatings):
+            if previous.rating != review.rating:
+                ratings.remove(previous.rating)
+                ratings.add(review.rating)
+        return self._recount(change)
+
+    def _recount(self, change: Callable[[ProductRatings], None]) -> List[ProductReview]:
+        """Apply change to a copy of the aggregates, then detach and commit
+
+        A change that raises (no such rating to remove) leaves the product
+        untouched, embedded reviews included.
+        """
+        if self.reviews:
+            ratings = ProductRatings.from_ratings(review.rating for review in self.reviews)
+        else:
+            ratings = self.ratings.model_copy(deep=True)
+        change(ratings)
+        detached = self.detach_reviews()
+        self.ratings = ratings
+        self.update_average_rating()
+        return detached
+
+    def detach_reviews(self) -> List[ProductReview]:
+        """Move embedded reviews out of the document
+
+        Rebuilds the rating aggregates from them and returns them with
+        product_id set, to be written to the reviews container. Review writes
+        call it first, so a rating is never counted on top of embedded reviews.
+        """
+        reviews = self.reviews
+        if not reviews:
+            return []
+        self.ratings = ProductRatings.from_ratings(review.rating for review in reviews)
+        self.update_average_rating()
+        for review in reviews:
+            review.product_id = self.id
+        self.reviews = []
+        return reviews
+
+    def to_document(self) -> Dict[str, Any]:
+        """CosmosDB document for this product (JSON types, field names rather than aliases)"""
+        # Keep embedded reviews only on documents not yet migrated with detach_reviews
+        return self.model_dump(mode="json", exclude=None if self.reviews else {"reviews"})
 
 
 # ===============================================================================
@@ -338,6 +431,63 @@ class ProductSearchRequest(BaseModel):
     page_size: int = Field(default=20, ge=1, le=100)
 
 
+class ProductSummary(BaseModel):
+    """Product projection with only the fields list and search responses use
+
+    Loaded from PRODUCT_SUMMARY_SELECT rows, so reviews, variants, SEO and the
+    other images are neither read from CosmosDB nor hydrated.
+    """
+    id: str
+    category_id: str
+    sku: str
+    name: str
+    slug: str
+    description: str = ""
+    price: Decimal
+    currency: str = "USD"
+    status: ProductStatus = ProductStatus.DRAFT
+    is_published: bool = False
+    inventory: ProductInventory
+    primary_image: Optional[ProductImage] = None
+    average_rating: Decimal = Decimal('0')
+    review_count: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        """Pydantic configuration"""
+        use_enum_values = True
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "ProductSummary":
+        """Create summary from a projected row (or a full stored document)"""
+        return cls(**document, primary_image=_primary_image(document))
+
+    def get_primary_image(self) -> Optional[ProductImage]:
+        """Get primary product image"""
+        return self.primary_image
+
+    def get_available_quantity(self) -> int:
+        """Get available inventory quantity"""
+        if not self.inventory.track_inventory:
+            return 999999  # Unlimited
+        return self.inventory.available_quantity
+
+    def is_in_stock(self) -> bool:
+        """Check if product is in stock"""
+        if not self.inventory.track_inventory:
+            return True
+        return self.inventory.available_quantity > 0
+
+
+class ProductReviewPage(BaseModel):
+    """One page of a product's reviews"""
+    product_id: str
+    items: List[ProductReview]
+    ratings: ProductRatings
+    continuation_token: Optional[str] = None  # CosmosDB continuation of the next page, None on the last
+
+
 class ProductResponse(BaseModel):
     """Product response model"""
     id: str
@@ -359,8 +509,8 @@ class ProductResponse(BaseModel):
     updated_at: datetime
 
     @classmethod
-    def from_product(cls, product: Product) -> "ProductResponse":
-        """Create response from product model"""
+    def from_product(cls, product: Union[Product, ProductSummary]) -> "ProductResponse":
+        """Create response from product model or summary"""
         return cls(
             id=product.id,
             category_id=product.category_id,
@@ -380,3 +530,116 @@ class ProductResponse(BaseModel):
             created_at=product.created_at,
             updated_at=product.updated_at,
         )
+
+    @classmethod
+    def json_from_document(cls, document: Dict[str, Any]) -> bytes:
+        """Response JSON for a stored document or summary row, without building any model"""
+        return to_json(_response_values(document))
+
+    @classmethod
+    def json_from_documents(cls, documents: List[Dict[str, Any]]) -> bytes:
+        """Response JSON array for a page of stored documents or summary rows"""
+        return to_json([_response_values(document) for document in documents])
+
+
+# ===============================================================================
+# DOCUMENT SERIALIZATION
+# ===============================================================================
+# Documents in the products container are written by Product.to_document. List
+# and search responses are built from them directly: the ProductResponse fields
+# are picked out of the stored dict, already in their JSON form, and encoded in
+# one pydantic-core call, without hydrating Product (and every embedded review,
+# variant and image) only to throw most of it away. List and search queries
+# should also read only those fields, with PRODUCT_SUMMARY_SELECT.
+
+PRODUCT_SUMMARY_FIELDS = (
+    "id", "category_id", "sku", "name", "slug", "description", "price", "currency", "status",
+    "is_published", "inventory", "average_rating", "review_count", "created_at", "updated_at",
+)
+
+
+def product_summary_select(*extra_fields: str) -> str:
+    """Cosmos SQL projection for ProductSummary rows, plus any extra top-level fields
+
+    Append WHERE/ORDER BY clauses on alias c. Of the images only the primary
+    ones and the first are returned.
+    """
+    return (
+        "SELECT " + ", ".join(f"c.{name}" for name in PRODUCT_SUMMARY_FIELDS + extra_fields)
+        + ", ARRAY(SELECT VALUE i FROM i IN c.images WHERE i.is_primary = true) AS primary_images"
+        + ", c.images[0] AS first_image FROM c"
+    )
+
+
+PRODUCT_SUMMARY_SELECT = product_summary_select()
+
+# Reviews container query (partition key product_id), newest first; pages are
+# read with max_item_count and continued with the returned continuation token
+REVIEW_PAGE_QUERY = "SELECT * FROM r WHERE r.product_id = @product_id ORDER BY r.created_at DESC"
+
+_IMAGE_FIELDS = tuple(ProductImage.model_fields)
+
+
+def _primary_image(document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Primary image of a stored document or of a PRODUCT_SUMMARY_SELECT row"""
+    if "images" in document:
+        images = document["images"]
+        if not images:
+            return None
+        return next((image for image in images if image.get("is_primary")), images[0])
+    primary_images = document.get("primary_images")
+    # c.images[0] is undefined for products without images, so the key is absent
+    return primary_images[0] if primary_images else document.get("first_image")
+
+
+def summary_row(document: Dict[str, Any], *extra_fields: str) -> Dict[str, Any]:
+    """Row product_summary_select would return for a full stored document (e.g. from the change feed)"""
+    row = {name: document[name] for name in PRODUCT_SUMMARY_FIELDS + extra_fields if name in document}
+    primary_image = _primary_image(document)
+    row["primary_images"] = [primary_image] if primary_image is not None else []
+    return row
+
+
+def _response_decimal(value: Any) -> str:
+    # ProductResponse serializes Decimal as the string of the parsed value
+    return value if isinstance(value, str) else str(Decimal(str(value)))
+
+
+def _response_datetime(value: str) -> str:
+    # isoformat() writes UTC as +00:00, pydantic as Z
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _response_values(document: Dict[str, Any]) -> Dict[str, Any]:
+    """ProductResponse fields of a stored document, already in their JSON form"""
+    inventory = document["inventory"]
+    if inventory.get("track_inventory", True):
+        available_quantity = inventory["available_quantity"]
+        is_in_stock = available_quantity > 0
+    else:
+        available_quantity = 999999  # Unlimited
+        is_in_stock = True
+
+    primary_image = _primary_image(document)
+    if primary_image is not None:
+        primary_image = {name: primary_image.get(name) for name in _IMAGE_FIELDS}
+
+    return {
+        "id": document["id"],
+        "category_id": document["category_id"],
+        "sku": document["sku"],
+        "name": document["name"],
+        "slug": document["slug"],
+        "description": document["description"],
+        "price": _response_decimal(document["price"]),
+        "currency": document["currency"],
+        "status": document["status"],
+        "is_published": document["is_published"],
+        "is_in_stock": is_in_stock,
+        "available_quantity": available_quantity,
+        "primary_image": primary_image,
+        "average_rating": _response_decimal(document["average_rating"]),
+        "review_count": document["review_count"],
+        "created_at": _response_datetime(document["created_at"]),
+        "updated_at": _response_datetime(document["updated_at"]),
+    }
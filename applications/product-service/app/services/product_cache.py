@@ -0,0 +1,250 @@
+"""
+Product Cache
+Two-tier read-through cache of serialized product responses: a bounded
+in-process LRU/TTL tier in front of Redis, with single-flight loading and
+invalidation broadcast to every replica over Redis pub/sub
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.models.product import ProductUpdateRequest
+
+logger = structlog.get_logger(__name__)
+
+# ===============================================================================
+# METRICS
+# ===============================================================================
+
+CACHE_REQUESTS = Counter(
+    "product_cache_requests_total", "Product cache lookups", ["tier", "result"]
+)
+CACHE_HIT_RATIO = Gauge(
+    "product_cache_hit_ratio", "Product cache hits over lookups since start", ["tier"]
+)
+CACHE_EVICTIONS = Counter(
+    "product_cache_evictions_total", "Entries dropped from the in-process tier", ["reason"]
+)
+CACHE_INVALIDATIONS = Counter(
+    "product_cache_invalidations_total", "Product invalidations applied", ["source"]
+)
+CACHE_COALESCED = Counter(
+    "product_cache_coalesced_total", "Lookups that waited on another request's load instead of loading"
+)
+CACHE_REDIS_ERRORS = Counter(
+    "product_cache_redis_errors_total", "Redis failures (served from the loader instead)"
+)
+CACHE_ENTRIES = Gauge("product_cache_entries", "Entries in the in-process tier")
+CACHE_BYTES = Gauge("product_cache_bytes", "Bytes held by the in-process tier")
+
+# ===============================================================================
+# IN-PROCESS TIER
+# ===============================================================================
+
+class LocalCache:
+    """LRU of bytes values bounded by entries and total size, with a TTL"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.size = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            self._remove(key)
+            CACHE_EVICTIONS.labels("expired").inc()
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        self.delete(key)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.size += len(value)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            CACHE_EVICTIONS.labels("capacity").inc()
+        self._update_gauges()
+
+    def delete(self, key: str) -> bool:
+        if key not in self.entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+        self._update_gauges()
+
+    def _remove(self, key: str):
+        _, value = self.entries.pop(key)
+        self.size -= len(value)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        CACHE_ENTRIES.set(len(self.entries))
+        CACHE_BYTES.set(self.size)
+
+# ===============================================================================
+# TWO-TIER CACHE
+# ===============================================================================
+
+class _Flight:
+    """A load in progress; stale once the product is invalidated during it"""
+
+    def __init__(self):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.stale = False
+
+
+class ProductCache:
+    """Read-through cache of ProductResponse JSON bytes keyed by product id
+
+    Lookups go local tier, then Redis, then the loader (CosmosDB). Concurrent
+    misses for the same product share one load. invalidate() drops the product
+    from Redis and publishes it, so every replica (listen_invalidations) drops
+    its local copy.
+    """
+
+    def __init__(self, redis: Redis, local: Optional[LocalCache] = None, redis_ttl: int = 300,
+                 key_prefix: str = "product:response:", channel: str = "product-cache:invalidate"):
+        self.redis = redis
+        self.local = local or LocalCache()
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+        self.channel = channel
+        self.flights: Dict[str, _Flight] = {}
+        self.lookups = {"local": [0, 0], "redis": [0, 0]}  # tier -> [hits, misses]
+        for tier in self.lookups:
+            CACHE_HIT_RATIO.labels(tier).set_function(lambda tier=tier: self.hit_ratio(tier))
+
+    def hit_ratio(self, tier: str) -> float:
+        hits, misses = self.lookups[tier]
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def _count(self, tier: str, hit: bool):
+        self.lookups[tier][0 if hit else 1] += 1
+        CACHE_REQUESTS.labels(tier, "hit" if hit else "miss").inc()
+
+    async def get(self, product_id: str, loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """Cached response bytes of a product, loading them on a miss (None: not found)"""
+        value = self.local.get(product_id)
+        self._count("local", value is not None)
+        if value is not None:
+            return value
+
+        flight = self.flights.get(product_id)
+        if flight is not None:
+            CACHE_COALESCED.inc()
+            return await asyncio.shield(flight.future)
+
+        flight = self.flights[product_id] = _Flight()
+        try:
+            value = await self._load(product_id, loader, flight)
+        except Exception as e:
+            flight.future.set_exception(e)
+            flight.future.exception()  # Waiters get it; don't log it again if there are none
+            raise
+        else:
+            flight.future.set_result(value)
+        finally:
+            del self.flights[product_id]
+
+        if value is not None and not flight.stale:
+            self.local.set(product_id, value)
+        return value
+
+    async def _load(self, product_id: str, loader: Callable[[], Awaitable[Optional[bytes]]],
+                    flight: _Flight) -> Optional[bytes]:
+        key = self.key_prefix + product_id
+        try:
+            value = await self.redis.get(key)
+        except RedisError as e:
+            CACHE_REDIS_ERRORS.inc()
+            logger.warning(f"Product cache read failed, loading {product_id} directly: {e}")
+        else:
+            self._count("redis", value is not None)
+            if value is not None:
+                return value
+
+        value = await loader()
+        if value is not None and not flight.stale:
+            try:
+                await self.redis.set(key, value, ex=self.redis_ttl)
+            except RedisError as e:
+                CACHE_REDIS_ERRORS.inc()
+                logger.warning(f"Product cache write failed for {product_id}: {e}")
+        return value
+
+    def _drop_local(self, product_id: str, source: str):
+        flight = self.flights.get(product_id)
+        if flight is not None:
+            flight.stale = True  # Don't cache what the in-flight load read before the change
+        self.local.delete(product_id)
+        CACHE_INVALIDATIONS.labels(source).inc()
+
+    async def invalidate(self, product_id: str):
+        """Drop a changed product from both tiers on every replica"""
+        self._drop_local(product_id, "local")
+        try:
+            await self.redis.delete(self.key_prefix + product_id)
+            await self.redis.publish(self.channel, product_id)
+        except RedisError as e:
+            # Other replicas serve their copy until the local TTL expires
+            CACHE_REDIS_ERRORS.inc()
+            logger.error(f"Product cache invalidation of {product_id} failed: {e}")
+
+    async def invalidate_for_update(self, product_id: str, update: ProductUpdateRequest):
+        """Invalidate after applying an update request; every updatable field is in the response"""
+        if update.model_dump(exclude_unset=True):
+            await self.invalidate(product_id)
+
+    def _apply_invalidation(self, message: Dict):
+        try:
+            product_id = message["data"]
+            if isinstance(product_id, bytes):
+                product_id = product_id.decode()
+            self._drop_local(product_id, "remote")
+        except Exception as e:
+            # Some product changed but we can't tell which: drop them all
+            logger.error(f"Malformed product cache invalidation {message!r}, clearing local tier: {e}")
+            self.local.clear()
+
+    async def listen_invalidations(self):
+        """Apply invalidations published by any replica (run as a task for the app's lifetime)
+
+        Never returns on errors: if this task ended, the local tier would serve
+        stale products until they expire.
+        """
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            while True:
+                try:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        self._apply_invalidation(message)
+                except Exception as e:
+                    # Missed messages could leave stale local entries: start over empty
+                    if isinstance(e, RedisError):
+                        CACHE_REDIS_ERRORS.inc()
+                    logger.error(f"Product cache invalidation listener failed, clearing local tier: {e}")
+                    self.local.clear()
+                    await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
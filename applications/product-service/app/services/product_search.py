@@ -0,0 +1,425 @@
+"""
+Product Search Index
+In-process index answering ProductSearchRequest without cross-partition
+queries: an inverted index of slug-normalized name/description/tag tokens,
+a sorted price array and bitmap filters for status, publication, category
+and tags. Built at startup from the products container and kept current
+from change feed events.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from slugify import slugify
+
+from app.models.product import (
+    ProductResponse, ProductSearchRequest, ProductStatus, product_summary_select, summary_row,
+)
+
+# Rows the index keeps per product: what responses need, plus the tags
+INDEX_FIELDS = ("tags",)
+PRODUCT_INDEX_SELECT = product_summary_select(*INDEX_FIELDS)
+
+# sort_by -> key of a stored row (the product id breaks ties)
+SORT_FIELDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "created_at": lambda row: datetime.fromisoformat(row["created_at"]),
+    "updated_at": lambda row: datetime.fromisoformat(row["updated_at"]),
+    "price": lambda row: float(row["price"]),
+    "name": lambda row: row["name"].lower(),
+    "average_rating": lambda row: float(row["average_rating"]),
+    "review_count": lambda row: row["review_count"],
+}
+
+# ===============================================================================
+# BITMAPS
+# ===============================================================================
+# Sets of products are Python ints with bit n set for the product at ordinal
+# n, so intersecting and unioning them are single C-level operations. Rare
+# terms and tags are kept as sets of ordinals instead (a bitmap costs N/8
+# bytes whatever its population) and turned into bitmaps when queried.
+
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+_NONZERO_BYTE = re.compile(b"[^\x00]")
+
+# Postings with at least one product in DENSE_RATIO keep a cached bitmap
+DENSE_RATIO = 64
+
+
+def bitmap_ordinals(bitmap: int) -> List[int]:
+    """Ordinals set in a bitmap, ascending"""
+    ordinals = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for match in _NONZERO_BYTE.finditer(data):
+        index = match.start()
+        base = index * 8
+        ordinals.extend(base + bit for bit in _BYTE_BITS[data[index]])
+    return ordinals
+
+
+def bitmap_from(ordinals: Iterable[int], size: int) -> int:
+    """Bitmap of the given ordinals (all below size)"""
+    data = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        data[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(data, "little")
+
+
+def tokenize(text: str) -> List[str]:
+    """Slug-normalized tokens: lowercase ASCII words and numbers"""
+    slug = slugify(text) if text else ""
+    return slug.split("-") if slug else []
+
+# ===============================================================================
+# INDEX
+# ===============================================================================
+
+@dataclass
+class SearchPage:
+    """One page of search results"""
+    rows: List[Dict[str, Any]]  # product_summary_select rows
+    total: int
+    page: int
+    page_size: int
+
+    @property
+    def total_pages(self) -> int:
+        return (self.total + self.page_size - 1) // self.page_size
+
+    def to_json(self) -> bytes:
+        """Response JSON with the items serialized as ProductResponse"""
+        return (
+            b'{"items":' + ProductResponse.json_from_documents(self.rows)
+            + f',"total":{self.total},"page":{self.page},"page_size":{self.page_size},'
+              f'"total_pages":{self.total_pages}}}'.encode()
+        )
+
+
+class Postings:
+    """Sets of products per key (term or tag), with bitmaps cached for dense keys"""
+
+    def __init__(self):
+        self.sets: Dict[str, Set[int]] = {}
+        self.bitmaps: Dict[str, int] = {}
+
+    def add(self, key: str, ordinal: int) -> bool:
+        """Add a product; True if the key is new"""
+        ordinals = self.sets.get(key)
+        if ordinals is None:
+            self.sets[key] = {ordinal}
+            return True
+        ordinals.add(ordinal)
+        bitmap = self.bitmaps.get(key)
+        if bitmap is not None:
+            self.bitmaps[key] = bitmap | 1 << ordinal
+        return False
+
+    def discard(self, key: str, ordinal: int) -> bool:
+        """Remove a product; True if the key is left without products"""
+        ordinals = self.sets[key]
+        ordinals.discard(ordinal)
+        if not ordinals:
+            del self.sets[key]
+            self.bitmaps.pop(key, None)
+            return True
+        bitmap = self.bitmaps.get(key)
+        if bitmap is not None:
+            self.bitmaps[key] = bitmap & ~(1 << ordinal)
+        return False
+
+    def bitmap(self, key: str, size: int) -> int:
+        """Products with key as a bitmap over size ordinals"""
+        bitmap = self.bitmaps.get(key)
+        if bitmap is not None:
+            return bitmap
+        ordinals = self.sets.get(key)
+        if not ordinals:
+            return 0
+        bitmap = bitmap_from(ordinals, size)
+        if len(ordinals) * DENSE_RATIO >= size:
+            self.bitmaps[key] = bitmap
+        return bitmap
+
+    def union(self, keys: Iterable[str], size: int) -> int:
+        """Products with any of the keys as a bitmap"""
+        bitmap = 0
+        rare: Set[int] = set()
+        for key in keys:
+            if key in self.bitmaps or len(self.sets.get(key, ())) * DENSE_RATIO >= size:
+                bitmap |= self.bitmap(key, size)
+            else:
+                rare.update(self.sets.get(key, ()))
+        return bitmap | bitmap_from(rare, size) if rare else bitmap
+
+
+class ProductSearchIndex:
+    """Inverted index, price array and filter bitmaps over the product catalog
+
+    Every product gets a small integer ordinal (reused after removals) that is
+    its bit in all bitmaps. Each sort field keeps the ordinals in sorted order
+    so large result sets are paged by walking it instead of sorting them. Not
+    thread-safe: use it from the event loop only.
+    """
+
+    def __init__(self):
+        self.rows: List[Optional[Dict[str, Any]]] = []
+        self.ordinal_of: Dict[str, int] = {}
+        self.free_ordinals: List[int] = []
+
+        self.terms = Postings()
+        self.vocabulary: List[str] = []  # sorted terms, for prefix lookups
+        self.tags = Postings()
+
+        self.live = 0
+        self.published = 0
+        self.statuses: Dict[str, int] = {}
+        self.categories: Dict[str, int] = {}
+
+        self.prices: List[float] = []  # sorted
+        self.price_ordinals: List[int] = []  # ordinal of each entry of prices
+        self.sort_keys: Dict[str, List[Tuple[Any, str]]] = {field: [] for field in SORT_FIELDS}
+        self.orders: Dict[str, List[int]] = {field: [] for field in SORT_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.ordinal_of)
+
+    # ---------------------------------------------------------------------------
+    # Maintenance
+    # ---------------------------------------------------------------------------
+
+    async def load(self, rows: AsyncIterable[Dict[str, Any]]):
+        """Index the rows of a PRODUCT_INDEX_SELECT query (startup build)"""
+        batch = []
+        async for row in rows:
+            batch.append(row)
+        self.build(batch)
+
+    def build(self, rows: Iterable[Dict[str, Any]]):
+        """Replace the index contents with rows
+
+        Bitmaps, the price array, the sort orders and the vocabulary are built
+        once at the end instead of being updated product by product.
+        """
+        self.__init__()
+        for row in rows:
+            ordinal = self.ordinal_of.get(row["id"])
+            if ordinal is not None:
+                self._unindex_postings(ordinal)
+            else:
+                ordinal = self.ordinal_of[row["id"]] = self._new_ordinal()
+            self.rows[ordinal] = row
+            self._index_postings(ordinal, row)
+
+        size = len(self.rows)
+        self.vocabulary = sorted(self.terms.sets)
+        self.live = bitmap_from(range(size), size)
+        self.published = bitmap_from((o for o, row in enumerate(self.rows) if row["is_published"]), size)
+        for bitmaps, field in ((self.statuses, "status"), (self.categories, "category_id")):
+            groups: Dict[str, List[int]] = {}
+            for ordinal, row in enumerate(self.rows):
+                groups.setdefault(row[field], []).append(ordinal)
+            bitmaps.update((key, bitmap_from(ordinals, size)) for key, ordinals in groups.items())
+        entries = sorted((float(row["price"]), ordinal) for ordinal, row in enumerate(self.rows))
+        self.prices = [price for price, _ in entries]
+        self.price_ordinals = [ordinal for _, ordinal in entries]
+        for field, keys in self.sort_keys.items():
+            self.orders[field] = sorted(range(size), key=keys.__getitem__)
+
+    def apply_change(self, document: Dict[str, Any]):
+        """Index a full product document from the change feed"""
+        self.upsert(summary_row(document, *INDEX_FIELDS))
+
+    def upsert(self, row: Dict[str, Any]):
+        """Add a product, or replace it if already indexed"""
+        ordinal = self.ordinal_of.get(row["id"])
+        if ordinal is not None:
+            self._unindex(ordinal)
+        else:
+            ordinal = self.ordinal_of[row["id"]] = self._new_ordinal()
+        self.rows[ordinal] = row
+        self._index(ordinal, row)
+
+    def remove(self, product_id: str) -> bool:
+        """Drop a deleted product"""
+        ordinal = self.ordinal_of.pop(product_id, None)
+        if ordinal is None:
+            return False
+        self._unindex(ordinal)
+        self.rows[ordinal] = None
+        self.free_ordinals.append(ordinal)
+        return True
+
+    def _new_ordinal(self) -> int:
+        if self.free_ordinals:
+            return self.free_ordinals.pop()
+        self.rows.append(None)
+        for keys in self.sort_keys.values():
+            keys.append(None)
+        return len(self.rows) - 1
+
+    def _terms_of(self, row: Dict[str, Any]) -> Set[str]:
+        terms = set(tokenize(row["name"]))
+        terms.update(tokenize(row.get("description", "")))
+        for tag in row.get("tags") or ():
+            terms.update(tokenize(tag))
+        return terms
+
+    def _index_postings(self, ordinal: int, row: Dict[str, Any]) -> List[str]:
+        """Terms, tags and sort keys; returns the terms seen for the first time"""
+        new_terms = [term for term in self._terms_of(row) if self.terms.add(term, ordinal)]
+        for tag in set(row.get("tags") or ()):
+            self.tags.add(tag, ordinal)
+        for field, key in SORT_FIELDS.items():
+            self.sort_keys[field][ordinal] = (key(row), row["id"])
+        return new_terms
+
+    def _unindex_postings(self, ordinal: int) -> List[str]:
+        """Remove from terms and tags; returns the terms left without products"""
+        row = self.rows[ordinal]
+        emptied = [term for term in self._terms_of(row) if self.terms.discard(term, ordinal)]
+        for tag in set(row.get("tags") or ()):
+            self.tags.discard(tag, ordinal)
+        return emptied
+
+    def _index(self, ordinal: int, row: Dict[str, Any]):
+        for term in self._index_postings(ordinal, row):
+            insort(self.vocabulary, term)
+        for field, order in self.orders.items():
+            insort(order, ordinal, key=self.sort_keys[field].__getitem__)
+
+        bit = 1 << ordinal
+        self.live |= bit
+        if row["is_published"]:
+            self.published |= bit
+        self.statuses[row["status"]] = self.statuses.get(row["status"], 0) | bit
+        self.categories[row["category_id"]] = self.categories.get(row["category_id"], 0) | bit
+
+        price = float(row["price"])
+        position = bisect_right(self.prices, price)
+        self.prices.insert(position, price)
+        self.price_ordinals.insert(position, ordinal)
+
+    def _unindex(self, ordinal: int):
+        row = self.rows[ordinal]
+        for term in self._unindex_postings(ordinal):
+            del self.vocabulary[bisect_left(self.vocabulary, term)]
+        for field, order in self.orders.items():
+            keys = self.sort_keys[field]
+            del order[bisect_left(order, keys[ordinal], key=keys.__getitem__)]
+
+        bit = 1 << ordinal
+        self.live &= ~bit
+        self.published &= ~bit
+        self._clear_bit(self.statuses, row["status"], bit)
+        self._clear_bit(self.categories, row["category_id"], bit)
+
+        price = float(row["price"])
+        position = bisect_left(self.prices, price)
+        while self.price_ordinals[position] != ordinal:
+            position += 1
+        del self.prices[position]
+        del self.price_ordinals[position]
+
+    @staticmethod
+    def _clear_bit(bitmaps: Dict[str, int], key: str, bit: int):
+        bitmap = bitmaps[key] & ~bit
+        if bitmap:
+            bitmaps[key] = bitmap
+        else:
+            del bitmaps[key]
+
+    # ---------------------------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------------------------
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix"""
+        terms = []
+        position = bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(prefix):
+            terms.append(self.vocabulary[position])
+            position += 1
+        return terms
+
+    def _price_filter(self, request: ProductSearchRequest, candidates: int) -> int:
+        """Candidates within the requested price range"""
+        low = float(request.min_price) if request.min_price is not None else float("-inf")
+        high = float(request.max_price) if request.max_price is not None else float("inf")
+        start = bisect_left(self.prices, low)
+        end = bisect_right(self.prices, high)
+        if end - start <= candidates.bit_count():
+            return candidates & bitmap_from(self.price_ordinals[start:end], len(self.rows))
+        # Fewer candidates than products in range: check their prices instead
+        keys = self.sort_keys["price"]
+        return bitmap_from((ordinal for ordinal in bitmap_ordinals(candidates)
+                            if low <= keys[ordinal][0] <= high), len(self.rows))
+
+    def _candidates(self, request: ProductSearchRequest) -> int:
+        """Bitmap of the products matching the request"""
+        size = len(self.rows)
+        candidates = self.live
+        if request.category_id is not None:
+            candidates &= self.categories.get(request.category_id, 0)
+        if request.status is not None:
+            candidates &= self.statuses.get(ProductStatus(request.status).value, 0)
+        if request.is_published is not None:
+            candidates &= self.published if request.is_published else ~self.published
+        if request.tags:
+            candidates &= self.tags.union(request.tags, size)
+
+        # Every query token must match; the last one may be a prefix (search as you type)
+        tokens = tokenize(request.query) if request.query else []
+        for token in tokens[:-1]:
+            if not candidates:
+                return 0
+            candidates &= self.terms.bitmap(token, size)
+        if tokens and candidates:
+            candidates &= self.terms.union(self._prefix_terms(tokens[-1]), size)
+
+        if candidates and (request.min_price is not None or request.max_price is not None):
+            candidates = self._price_filter(request, candidates)
+        return candidates
+
+    def search(self, request: ProductSearchRequest) -> SearchPage:
+        """Matching products, sorted with the product id as tie-breaker so pages never overlap"""
+        if request.sort_by not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort field: {request.sort_by}")
+        if request.sort_order not in ("asc", "desc"):
+            raise ValueError(f"Unsupported sort order: {request.sort_order}")
+
+        candidates = self._candidates(request)
+        total = candidates.bit_count()
+        needed = request.page * request.page_size
+        descending = request.sort_order == "desc"
+        if total * total > needed * len(self.rows):
+            # Many matches: the first `needed` of them come early in the sort order
+            order = self.orders[request.sort_by]
+            data = candidates.to_bytes((len(self.rows) + 7) // 8, "little")
+            ranked = []
+            for ordinal in (reversed(order) if descending else order):
+                if data[ordinal >> 3] >> (ordinal & 7) & 1:
+                    ranked.append(ordinal)
+                    if len(ranked) == needed:
+                        break
+        else:
+            select = heapq.nlargest if descending else heapq.nsmallest
+            ranked = select(needed, bitmap_ordinals(candidates), key=self.sort_keys[request.sort_by].__getitem__)
+
+        offset = (request.page - 1) * request.page_size
+        return SearchPage(
+            rows=[self.rows[ordinal] for ordinal in ranked[offset:]],
+            total=total,
+            page=request.page,
+            page_size=request.page_size,
+        )
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Terms completing the last token of prefix, most frequent first"""
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        matches = ((-len(self.terms.sets[term]), term) for term in self._prefix_terms(tokens[-1]))
+        return [term for _, term in heapq.nsmallest(limit, matches)]
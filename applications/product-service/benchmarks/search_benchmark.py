@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Product Search Index Benchmark
+Builds ProductSearchIndex over a synthetic catalog, checks its answers against
+a brute-force scan of the same rows (also after change feed updates and
+removals) and reports build time, search and suggestion latency and the cost
+of incremental updates.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from app.models.product import ProductSearchRequest, ProductStatus  # noqa: E402
+from app.services.product_search import SORT_FIELDS, ProductSearchIndex, SearchPage, tokenize  # noqa: E402
+
+WORDS = [f"{stem}{suffix}" for stem in ("lap", "phone", "cam", "head", "watch", "tab", "book", "desk", "lamp", "mug")
+         for suffix in ("top", "era", "set", "let", "ster", "ium", "o", "y", "ix", "on")]
+TAGS = ["electronics", "sale", "new", "gift", "eco", "premium", "clearance", "bundle"]
+
+# ===============================================================================
+# SYNTHETIC CATALOG
+# ===============================================================================
+
+def build_row(rng: random.Random, index: int, categories: int) -> Dict[str, Any]:
+    """One PRODUCT_INDEX_SELECT row"""
+    created = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 500000))
+    return {
+        "id": f"product-{index:07d}",
+        "category_id": f"category_{rng.randrange(categories)}",
+        "sku": f"SKU-{index:07d}",
+        "name": " ".join(rng.sample(WORDS, 3)).title() + f" X{index}",
+        "slug": f"product-{index}",
+        "description": " ".join(rng.choices(WORDS, k=12)),
+        "price": rng.randint(100, 200000) / 100,
+        "currency": "USD",
+        "status": rng.choice([status.value for status in ProductStatus]),
+        "is_published": rng.random() < 0.8,
+        "inventory": {"track_inventory": True, "inventory_quantity": 5, "available_quantity": rng.randint(0, 5)},
+        "average_rating": rng.choice([0.0, 3.5, 4.0, 4.5, 5.0]),
+        "review_count": rng.randint(0, 500),
+        "created_at": created.isoformat(),
+        "updated_at": created.isoformat(),
+        "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        "primary_images": [],
+    }
+
+
+def random_request(rng: random.Random, categories: int) -> ProductSearchRequest:
+    """A request mixing text, filters, sorting and paging like the search route sees"""
+    fields: Dict[str, Any] = {
+        "sort_by": rng.choice(list(SORT_FIELDS)),
+        "sort_order": rng.choice(["asc", "desc"]),
+        "page": rng.choice([1, 1, 1, 2, 5]),
+        "page_size": rng.choice([10, 20, 50]),
+    }
+    if rng.random() < 0.1:
+        fields["query"] = f"x{rng.randrange(1000)}"  # model number: few matches
+    elif rng.random() < 0.7:
+        words = rng.sample(WORDS, rng.randint(1, 2))
+        words[-1] = words[-1][:rng.randint(2, len(words[-1]))]  # typed so far
+        fields["query"] = " ".join(words)
+    if rng.random() < 0.4:
+        fields["category_id"] = f"category_{rng.randrange(categories)}"
+    if rng.random() < 0.3:
+        fields["status"] = rng.choice(list(ProductStatus))
+    if rng.random() < 0.5:
+        fields["is_published"] = True
+    if rng.random() < 0.3:
+        fields["tags"] = rng.sample(TAGS, rng.randint(1, 2))
+    if rng.random() < 0.4:
+        low = rng.randint(0, 1500)
+        fields["min_price"] = Decimal(low)
+        fields["max_price"] = Decimal(low + rng.randint(10, 500))
+    return ProductSearchRequest(**fields)
+
+# ===============================================================================
+# REFERENCE
+# ===============================================================================
+
+_row_terms: Dict[int, Tuple[Dict[str, Any], set]] = {}
+
+
+def row_terms(row: Dict[str, Any]) -> set:
+    """Tokens of a row, memoized (slugify is too slow to rerun per scan)"""
+    terms = _row_terms.get(id(row))
+    if terms is None:
+        terms = set(tokenize(row["name"])) | set(tokenize(row["description"]))
+        for tag in row["tags"]:
+            terms.update(tokenize(tag))
+        _row_terms[id(row)] = (row, terms)  # Holding the row keeps its id from being reused
+        return terms
+    return terms[1]
+
+
+def scan(rows: List[Dict[str, Any]], request: ProductSearchRequest) -> SearchPage:
+    """Brute-force answer with the index's semantics"""
+    tokens = tokenize(request.query) if request.query else []
+    status = ProductStatus(request.status).value if request.status is not None else None
+    matches = []
+    for row in rows:
+        if tokens:
+            terms = row_terms(row)
+            if not all(token in terms for token in tokens[:-1]):
+                continue
+            if not any(term.startswith(tokens[-1]) for term in terms):
+                continue
+        if request.category_id is not None and row["category_id"] != request.category_id:
+            continue
+        if status is not None and row["status"] != status:
+            continue
+        if request.is_published is not None and row["is_published"] != request.is_published:
+            continue
+        if request.tags and not set(request.tags) & set(row["tags"]):
+            continue
+        if request.min_price is not None and row["price"] < float(request.min_price):
+            continue
+        if request.max_price is not None and row["price"] > float(request.max_price):
+            continue
+        matches.append(row)
+    key = SORT_FIELDS[request.sort_by]
+    matches.sort(key=lambda row: (key(row), row["id"]), reverse=request.sort_order == "desc")
+    offset = (request.page - 1) * request.page_size
+    return SearchPage(matches[offset:offset + request.page_size], len(matches), request.page, request.page_size)
+
+
+def check(index: ProductSearchIndex, rows: List[Dict[str, Any]], requests: List[ProductSearchRequest]):
+    for request in requests:
+        expected = scan(rows, request)
+        actual = index.search(request)
+        if actual.total != expected.total or [row["id"] for row in actual.rows] != [row["id"] for row in expected.rows]:
+            raise SystemExit(f"index and scan disagree on {request!r}")
+
+# ===============================================================================
+# BENCHMARK
+# ===============================================================================
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory product search index")
+    parser.add_argument("--products", type=int, default=100000, help="Catalog size")
+    parser.add_argument("--categories", type=int, default=200, help="Distinct category_id values")
+    parser.add_argument("--queries", type=int, default=2000, help="Random search requests to time")
+    parser.add_argument("--checks", type=int, default=200, help="Requests verified against a full scan")
+    parser.add_argument("--updates", type=int, default=2000, help="Change feed updates to time")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rows = [build_row(rng, index, args.categories) for index in range(args.products)]
+    requests = [random_request(rng, args.categories) for _ in range(args.queries)]
+
+    index = ProductSearchIndex()
+    start = time.perf_counter()
+    index.build(rows)
+    build_seconds = time.perf_counter() - start
+    check(index, rows, requests[:args.checks])
+
+    start = time.perf_counter()
+    for request in requests:
+        index.search(request).to_json()
+    search_us = (time.perf_counter() - start) / len(requests) * 1e6
+
+    start = time.perf_counter()
+    for request in requests[:50]:
+        scan(rows, request)
+    scan_us = (time.perf_counter() - start) / 50 * 1e6
+
+    prefixes = [word[:rng.randint(1, 4)] for word in rng.choices(WORDS, k=1000)]
+    start = time.perf_counter()
+    for prefix in prefixes:
+        index.suggest(prefix)
+    suggest_us = (time.perf_counter() - start) / len(prefixes) * 1e6
+
+    # Change feed: edits of existing products, new products and deletions
+    by_id = {row["id"]: row for row in rows}
+    start = time.perf_counter()
+    for n in range(args.updates):
+        if n % 10 == 9:
+            victim = rng.choice(list(by_id)) if n % 100 == 99 else None
+            if victim is not None:
+                index.remove(victim)
+                del by_id[victim]
+                continue
+            row = build_row(rng, args.products + n, args.categories)
+        else:
+            row = dict(build_row(rng, 0, args.categories), id=rng.choice(rows)["id"])
+            if row["id"] not in by_id:
+                continue
+        index.upsert(row)
+        by_id[row["id"]] = row
+    update_us = (time.perf_counter() - start) / args.updates * 1e6
+    check(index, list(by_id.values()), requests[:args.checks])
+
+    results = {
+        "products": len(index),
+        "terms": len(index.terms.sets),
+        "build_seconds": build_seconds,
+        "search_us": search_us,
+        "scan_us": scan_us,
+        "suggest_us": suggest_us,
+        "update_us": update_us,
+    }
+    print(f"\n{len(index):,} products, {len(index.terms.sets):,} terms, built in {build_seconds:.2f}s")
+    print(f"Search (index, with JSON):   {search_us:>10,.0f} us/query")
+    print(f"Search (full scan):          {scan_us:>10,.0f} us/query")
+    print(f"Suggest:                     {suggest_us:>10,.0f} us/call")
+    print(f"Change feed update:          {update_us:>10,.0f} us/event")
+    print(f"Verified {args.checks} requests against a full scan, before and after the updates")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
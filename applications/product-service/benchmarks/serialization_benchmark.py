@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Product Serialization Benchmark
+Compares the CPU cost per product of turning stored CosmosDB documents into
+ProductResponse JSON: the model path (Product(**doc) + from_product) against
+the direct document serializer (ProductResponse.json_from_documents), on full
+documents and on PRODUCT_SUMMARY_SELECT projections, and checks all paths
+produce the same bytes.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import warnings
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from app.models.product import (  # noqa: E402
+    PRODUCT_SUMMARY_FIELDS, Product, ProductImage, ProductInventory, ProductRatings, ProductResponse,
+    ProductReview, ProductSEO, ProductShipping, ProductStatus, ProductSummary, ProductType, ProductVariant,
+)
+
+COSMOS_METADATA = {"_rid": "AAAAAA==", "_self": "dbs/x/colls/y/docs/z/", "_etag": "\"0000-0000\"",
+                   "_attachments": "attachments/", "_ts": 1700000000}
+
+# ===============================================================================
+# SAMPLE DOCUMENTS
+# ===============================================================================
+
+def build_document(rng: random.Random, index: int, reviews: int, variants: int, images: int,
+                   legacy: bool) -> Dict[str, Any]:
+    """One stored product document as Product.to_document writes it, plus Cosmos metadata"""
+    price = Decimal(rng.randint(100, 500000)) / 100
+    product = Product(
+        category_id=f"category_{index % 20}",
+        sku=f"SKU-{index:06d}",
+        name=f"Product {index} Deluxe Edition",
+        description="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+        type=rng.choice(list(ProductType)),
+        status=rng.choice(list(ProductStatus)),
+        price=price,
+        compare_at_price=price * 2 if index % 3 == 0 else None,
+        inventory=ProductInventory(inventory_quantity=rng.randint(0, 500), available_quantity=0,
+                                   reserved_quantity=rng.randint(0, 5)),
+        images=[ProductImage(url=f"https://cdn.example.com/products/{index}/{n}.webp", is_primary=(n == 1),
+                             width=800, height=800, format="webp") for n in range(images)],
+        variants=[ProductVariant(sku=f"SKU-{index:06d}-{n}", name=f"Variant {n}", price=price,
+                                 inventory_quantity=rng.randint(0, 50), attributes={"size": n})
+                  for n in range(variants)],
+        tags=["electronics", "sale", f"tag{index % 50}"],
+        seo=ProductSEO(meta_title=f"Product {index}", canonical_url=f"https://shop.example.com/p/{index}"),
+        shipping=ProductShipping(weight=Decimal("1.25"), shipping_cost=Decimal("9.90")),
+        is_published=index % 4 != 0,
+    )
+    review_list = [ProductReview(user_id=f"user{n}", user_name=f"User {n}", rating=rng.randint(1, 5),
+                                 title="Review", content="Works as described. " * 3) for n in range(reviews)]
+    if legacy:
+        # Documents written before the rating aggregates: embedded reviews, no ratings
+        ratings = ProductRatings.from_ratings(review.rating for review in review_list)
+        product.reviews = review_list
+        product.average_rating, product.review_count = ratings.average(), ratings.count
+    else:
+        for review in review_list:
+            product.add_review(review)
+    document = product.to_document()
+    document.update(COSMOS_METADATA)
+    return document
+
+
+def project_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """The row CosmosDB returns for a document under PRODUCT_SUMMARY_SELECT"""
+    row = {name: document[name] for name in PRODUCT_SUMMARY_FIELDS}
+    row["primary_images"] = [image for image in document["images"] if image["is_primary"]]
+    if document["images"]:
+        row["first_image"] = document["images"][0]
+    return row
+
+# ===============================================================================
+# SERIALIZATION PATHS
+# ===============================================================================
+
+def validated_path(documents: List[Dict[str, Any]]) -> bytes:
+    """Current path: full validation of every document, then the response model"""
+    return b"[" + b",".join(
+        ProductResponse.from_product(Product(**document)).model_dump_json().encode() for document in documents
+    ) + b"]"
+
+
+def direct_path(documents: List[Dict[str, Any]]) -> bytes:
+    """Stored documents straight to response JSON"""
+    return ProductResponse.json_from_documents(documents)
+
+
+def summary_path(rows: List[Dict[str, Any]]) -> bytes:
+    """Projected rows hydrated as ProductSummary, then the response model"""
+    return b"[" + b",".join(
+        ProductResponse.from_product(ProductSummary.from_document(row)).model_dump_json().encode() for row in rows
+    ) + b"]"
+
+
+# name -> (path, reads projected rows)
+PATHS: Dict[str, Tuple[Callable[[List[Dict[str, Any]]], bytes], bool]] = {
+    "validated": (validated_path, False),
+    "direct": (direct_path, False),
+    "summary": (summary_path, True),
+    "summary-direct": (direct_path, True),
+}
+
+# ===============================================================================
+# BENCHMARK
+# ===============================================================================
+
+def time_path(path: Callable, documents: List[Dict[str, Any]], page_size: int, rounds: int) -> float:
+    """Best CPU microseconds per product over the rounds, serializing page by page"""
+    pages = [documents[start:start + page_size] for start in range(0, len(documents), page_size)]
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.process_time()
+        for page in pages:
+            path(page)
+        best = min(best, time.process_time() - start)
+    return best / len(documents) * 1e6
+
+
+def check_paths(documents: List[Dict[str, Any]], rows: List[Dict[str, Any]]):
+    """All paths must produce the same JSON"""
+    expected = validated_path(documents)
+    for name, (path, projected) in PATHS.items():
+        if path(rows if projected else documents) != expected:
+            raise SystemExit(f"{name} path output differs from the validated path")
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Benchmark Product document to response JSON paths")
+    parser.add_argument("--products", type=int, default=2000, help="Documents per run")
+    parser.add_argument("--page-size", type=int, default=20, help="Products per list/search response")
+    parser.add_argument("--reviews", type=int, default=20, help="Reviews per product")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Embed the reviews in the product documents (layout before the reviews container)")
+    parser.add_argument("--variants", type=int, default=3, help="Variants per product")
+    parser.add_argument("--images", type=int, default=4, help="Images per product")
+    parser.add_argument("--rounds", type=int, default=5, help="Runs per path (best is reported)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    documents = [build_document(rng, index, args.reviews, args.variants, args.images, args.legacy)
+                 for index in range(args.products)]
+    rows = [project_document(document) for document in documents]
+    document_bytes = sum(len(json.dumps(document)) for document in documents) / len(documents)
+    row_bytes = sum(len(json.dumps(row)) for row in rows) / len(rows)
+    check_paths(documents[:200], rows[:200])
+
+    results = {name: time_path(path, rows if projected else documents, args.page_size, args.rounds)
+               for name, (path, projected) in PATHS.items()}
+
+    print(f"\n{args.products:,} products, {document_bytes:,.0f} bytes per document, "
+          f"{row_bytes:,.0f} bytes per summary row, pages of {args.page_size}")
+    print(f"{'Path':<16} {'us/product':>11} {'Speedup':>8}")
+    for name, micros in results.items():
+        print(f"{name:<16} {micros:>11.1f} {results['validated'] / micros:>7.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "us_per_product": results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
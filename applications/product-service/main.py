@@ -7,7 +7,7 @@ import asyncio
 import logging
 import os
 import sys
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import Any, Dict
 
 import structlog
@@ -35,6 +35,7 @@ from app.api.v1.router import api_router
 from app.middleware.auth import AuthMiddleware
 from app.middleware.metrics import MetricsMiddleware
 from app.middleware.error_handler import ErrorHandlerMiddleware
+from app.services.product_cache import ProductCache
 
 # Setup logging
 setup_logging()
@@ -84,8 +85,17 @@ async def lifespan(app: FastAPI):
         
         logger.info("Database connections established")
         
+        # Product response cache; invalidations from other replicas arrive over pub/sub
+        app.state.product_cache = ProductCache(redis_client)
+        invalidation_listener = asyncio.create_task(app.state.product_cache.listen_invalidations())
+        
         yield
         
+        # Let the listener close its pubsub connection before the Redis client goes
+        invalidation_listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await invalidation_listener
+        
     except Exception as e:
         logger.error(f"Failed to initialize database connections: {e}")
         sys.exit(1)
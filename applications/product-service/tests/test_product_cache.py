@@ -0,0 +1,93 @@
+"""
+Product Cache Invalidation Listener Tests
+The listener must outlive bad messages and connection errors: once it stops,
+the in-process tier serves stale products until they expire.
+"""
+
+import asyncio
+
+from prometheus_client import REGISTRY
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services.product_cache import ProductCache
+
+
+class StubPubSub:
+    """Plays scripted messages; an exception in the script is raised from listen()"""
+
+    def __init__(self, script):
+        self.script = script
+        self.subscriptions = 0
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.subscriptions += 1
+
+    async def listen(self):
+        while self.script:
+            item = self.script.pop(0)
+            if isinstance(item, Exception):
+                raise item
+            yield {"type": "message", "data": item}
+        await asyncio.Event().wait()  # connection idle
+
+    async def aclose(self):
+        self.closed = True
+
+
+class StubRedis:
+    def __init__(self, script):
+        self.pubsub_instance = StubPubSub(script)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self.pubsub_instance
+
+
+def remote_invalidations() -> float:
+    return REGISTRY.get_sample_value("product_cache_invalidations_total", {"source": "remote"}) or 0.0
+
+
+async def run_listener(script, cached):
+    redis = StubRedis(script)
+    cache = ProductCache(redis)
+    for product_id in cached:
+        cache.local.set(product_id, b"{}")
+    listener = asyncio.create_task(cache.listen_invalidations())
+    while redis.pubsub_instance.script and not listener.done():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+    alive = not listener.done()
+    listener.cancel()
+    try:
+        await listener
+    except (asyncio.CancelledError, Exception):
+        pass
+    return cache, redis.pubsub_instance, alive
+
+
+def test_listener_survives_malformed_message():
+    cache, pubsub, alive = asyncio.run(run_listener([b"\xff\xfe", b"p2"], cached=["p1"]))
+
+    assert alive
+    assert pubsub.closed
+    # The malformed message clears everything it might have referred to
+    assert cache.local.get("p1") is None
+
+
+def test_listener_applies_messages_after_malformed_one():
+    before = remote_invalidations()
+    _, _, alive = asyncio.run(run_listener([b"p1", b"\xff", b"p2"], cached=[]))
+
+    assert alive
+    assert remote_invalidations() - before == 2
+
+
+def test_listener_resubscribes_after_errors():
+    cache, pubsub, alive = asyncio.run(
+        run_listener([RedisConnectionError("connection reset"), RuntimeError("protocol error"), b"p1"],
+                     cached=["p1"])
+    )
+
+    assert alive
+    assert pubsub.subscriptions == 3
+    assert cache.local.get("p1") is None
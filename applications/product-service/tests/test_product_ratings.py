@@ -0,0 +1,113 @@
+"""
+Product Rating Aggregate Tests
+Review writes on documents that still embed their reviews must migrate them
+to the rating aggregates once, then count the change on top.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.models.product import Product, ProductInventory, ProductReview
+
+
+def review(rating: int, user: str = "user") -> ProductReview:
+    return ProductReview(user_id=user, user_name=user.title(), rating=rating, title="Review", content="Review")
+
+
+def legacy_product(*ratings: int) -> Product:
+    """A product as read from a document written before the aggregates"""
+    document = Product(
+        category_id="category_1",
+        sku="SKU-1",
+        name="Legacy Product",
+        price=Decimal("10"),
+        inventory=ProductInventory(inventory_quantity=1, available_quantity=1),
+    ).model_dump(mode="json", exclude={"ratings"})
+    document["reviews"] = [review(rating, f"user{n}").model_dump(mode="json") for n, rating in enumerate(ratings)]
+    return Product(**document)
+
+
+def test_add_review_migrates_embedded_reviews():
+    product = legacy_product(5)
+
+    detached = product.add_review(review(1))
+
+    assert [r.rating for r in detached] == [5]
+    assert all(r.product_id == product.id for r in detached)
+    assert product.reviews == []
+    assert product.ratings.count == 2
+    assert product.review_count == 2
+    assert product.average_rating == Decimal("3")
+    assert "reviews" not in product.to_document()
+
+
+def test_remove_review_migrates_embedded_reviews():
+    product = legacy_product(5, 3)
+
+    detached = product.remove_review(review(5, "user0"))
+
+    assert len(detached) == 2
+    assert product.ratings.count == 1
+    assert product.average_rating == Decimal("3")
+
+
+def assert_unchanged(product: Product, before: Product):
+    assert product.reviews == before.reviews
+    assert product.ratings == before.ratings
+    assert product.review_count == before.review_count
+    assert product.average_rating == before.average_rating
+
+
+def test_remove_review_without_matching_rating_fails():
+    product = legacy_product(4)
+    before = product.model_copy(deep=True)
+
+    with pytest.raises(ValueError):
+        product.remove_review(review(2))
+
+    assert len(product.reviews) == 1
+    assert_unchanged(product, before)
+
+
+def test_edit_review_without_matching_rating_fails():
+    product = legacy_product(4)
+    before = product.model_copy(deep=True)
+
+    with pytest.raises(ValueError):
+        product.edit_review(review(2, "user0"), review(5, "user0"))
+
+    assert len(product.reviews) == 1
+    assert_unchanged(product, before)
+
+
+def test_failed_removal_after_migration_leaves_aggregates():
+    product = legacy_product(4)
+    product.add_review(review(3))
+    before = product.model_copy(deep=True)
+
+    with pytest.raises(ValueError):
+        product.remove_review(review(1))
+
+    assert_unchanged(product, before)
+
+
+def test_edit_review_migrates_embedded_reviews():
+    product = legacy_product(5, 5)
+
+    detached = product.edit_review(review(5, "user0"), review(1, "user0"))
+
+    assert len(detached) == 2
+    assert product.ratings.histogram == [1, 0, 0, 0, 1]
+    assert product.average_rating == Decimal("3")
+    assert product.review_count == 2
+
+
+def test_review_writes_after_migration_detach_nothing():
+    product = legacy_product(4)
+    product.add_review(review(2))
+
+    assert product.add_review(review(3)) == []
+    assert product.remove_review(review(4)) == []
+    assert product.ratings.count == 2
+    assert product.average_rating == Decimal("2.5")
@@ -410,6 +410,8 @@ run_custom_test() {
         --target-url="$BASE_URL" \
         --target-rps="$TARGET_RPS" \
         --duration="$DURATION" \
+        --ramp-up="$RAMP_UP" \
+        --ramp-down="$RAMP_DOWN" \
         --users="$USERS" \
         --output-dir="$TEST_DIR" \
         --test-id="$TEST_ID" 2>&1 | tee "$TEST_DIR/custom-output.log"
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Raw Result Analyzer
+Offline analysis of the binary raw result log written by high-performance-test.py
+(--raw-output). Files are memory-mapped and processed in vectorized chunks, so
+runs with billions of requests are analyzed without loading them into memory.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+# ===============================================================================
+# RECORD LAYOUT
+# ===============================================================================
+
+# Must match RawResultSink.RECORD ("<dIIHHBB2x") in high-performance-test.py
+RAW_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("latency_us", "<u4"),
+    ("size", "<u4"),
+    ("status", "<u2"),
+    ("endpoint", "<u2"),
+    ("flags", "u1"),
+    ("error_class", "u1"),
+    ("_pad", "V2"),
+])
+
+FLAG_SUCCESS = 1
+CHUNK_RECORDS = 8 * 1024 * 1024
+
+# Exact percentiles use two passes: a coarse count per 1024us bin, then a
+# per-microsecond count inside the bins that hold the requested ranks
+COARSE_SHIFT = 10
+COARSE_BINS = 1 << (32 - COARSE_SHIFT)
+FINE_BINS = 1 << COARSE_SHIFT
+
+# ===============================================================================
+# LOADING
+# ===============================================================================
+
+def load_metadata(path: Path) -> Dict:
+    """Load raw-results.meta.json from a test output directory or explicit path"""
+    meta_file = path / "raw-results.meta.json" if path.is_dir() else path
+    with open(meta_file) as f:
+        metadata = json.load(f)
+
+    if metadata["record_size"] != RAW_DTYPE.itemsize:
+        raise ValueError(
+            f"Record size {metadata['record_size']} does not match analyzer layout ({RAW_DTYPE.itemsize})"
+        )
+    metadata["directory"] = meta_file.parent
+    return metadata
+
+def open_raw_files(metadata: Dict) -> List[np.memmap]:
+    """Memory-map every raw result file listed in the metadata"""
+    arrays = []
+    for name in metadata["files"]:
+        path = metadata["directory"] / name
+        if not path.exists() or path.stat().st_size == 0:
+            continue
+        # A killed generator can leave a partial trailing record
+        records = path.stat().st_size // RAW_DTYPE.itemsize
+        arrays.append(np.memmap(path, dtype=RAW_DTYPE, mode="r", shape=(records,)))
+    return arrays
+
+def iter_chunks(arrays: List[np.memmap], endpoint: int = -1) -> Iterator[np.ndarray]:
+    """Yield record chunks, optionally restricted to one endpoint index"""
+    for array in arrays:
+        for start in range(0, len(array), CHUNK_RECORDS):
+            chunk = array[start:start + CHUNK_RECORDS]
+            if endpoint >= 0:
+                chunk = chunk[chunk["endpoint"] == endpoint]
+            yield chunk
+
+# ===============================================================================
+# ANALYSIS
+# ===============================================================================
+
+def exact_percentiles(arrays: List[np.memmap], percentiles: List[float], endpoint: int = -1) -> Dict[str, float]:
+    """Nearest-rank latency percentiles in milliseconds, exact to the microsecond"""
+    coarse = np.zeros(COARSE_BINS, dtype=np.int64)
+    for chunk in iter_chunks(arrays, endpoint):
+        coarse += np.bincount(chunk["latency_us"] >> COARSE_SHIFT, minlength=COARSE_BINS)
+
+    total = int(coarse.sum())
+    if total == 0:
+        return {f"p{p:g}": 0.0 for p in percentiles}
+
+    cumulative = np.cumsum(coarse)
+    ranks = [max(1, int(np.ceil(p / 100.0 * total))) for p in percentiles]
+    bins = [int(np.searchsorted(cumulative, rank)) for rank in ranks]
+    wanted = np.unique(bins)
+
+    fine = {int(b): np.zeros(FINE_BINS, dtype=np.int64) for b in wanted}
+    for chunk in iter_chunks(arrays, endpoint):
+        latency = chunk["latency_us"]
+        coarse_index = latency >> COARSE_SHIFT
+        selected = np.isin(coarse_index, wanted)
+        if not selected.any():
+            continue
+        latency = latency[selected]
+        coarse_index = coarse_index[selected]
+        for b in fine:
+            values = latency[coarse_index == b] & (FINE_BINS - 1)
+            fine[b] += np.bincount(values, minlength=FINE_BINS)
+
+    result = {}
+    for percentile, rank, b in zip(percentiles, ranks, bins):
+        before = int(cumulative[b - 1]) if b > 0 else 0
+        offset = int(np.searchsorted(np.cumsum(fine[b]), rank - before))
+        result[f"p{percentile:g}"] = ((b << COARSE_SHIFT) + offset) / 1000.0
+    return result
+
+def summarize(arrays: List[np.memmap], metadata: Dict, bucket_seconds: float) -> Dict:
+    """Totals, per-endpoint counts, error breakdowns and time-bucketed throughput"""
+    endpoints = metadata["endpoints"]
+    start_time = min((float(array["timestamp"].min()) for array in arrays if len(array)), default=0.0)
+    end_time = max((float(array["timestamp"].max()) for array in arrays if len(array)), default=0.0)
+    bucket_count = int((end_time - start_time) // bucket_seconds) + 1
+
+    requests = np.zeros(bucket_count, dtype=np.int64)
+    failures = np.zeros(bucket_count, dtype=np.int64)
+    latency_sum = np.zeros(bucket_count, dtype=np.float64)
+    endpoint_requests = np.zeros(len(endpoints), dtype=np.int64)
+    endpoint_failures = np.zeros(len(endpoints), dtype=np.int64)
+    endpoint_latency = np.zeros(len(endpoints), dtype=np.float64)
+    endpoint_bytes = np.zeros(len(endpoints), dtype=np.int64)
+    status_failures = np.zeros(1 << 16, dtype=np.int64)
+    error_classes = np.zeros(256, dtype=np.int64)
+    total_bytes = 0
+    latency_max = 0
+
+    for chunk in iter_chunks(arrays):
+        if not len(chunk):
+            continue
+        bucket = ((chunk["timestamp"] - start_time) // bucket_seconds).astype(np.int64)
+        failed = (chunk["flags"] & FLAG_SUCCESS) == 0
+        latency = chunk["latency_us"].astype(np.float64)
+
+        requests += np.bincount(bucket, minlength=bucket_count)
+        failures += np.bincount(bucket[failed], minlength=bucket_count)
+        latency_sum += np.bincount(bucket, weights=latency, minlength=bucket_count)
+
+        endpoint = chunk["endpoint"]
+        endpoint_requests += np.bincount(endpoint, minlength=len(endpoints))
+        endpoint_failures += np.bincount(endpoint[failed], minlength=len(endpoints))
+        endpoint_latency += np.bincount(endpoint, weights=latency, minlength=len(endpoints))
+        endpoint_bytes += np.bincount(endpoint, weights=chunk["size"], minlength=len(endpoints)).astype(np.int64)
+
+        status_failures += np.bincount(chunk["status"][failed], minlength=1 << 16)
+        error_classes += np.bincount(chunk["error_class"][failed], minlength=256)
+        total_bytes += int(chunk["size"].sum(dtype=np.int64))
+        latency_max = max(latency_max, int(chunk["latency_us"].max()))
+
+    total_requests = int(requests.sum())
+    total_failures = int(failures.sum())
+    class_names = metadata.get("error_classes", {})
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bucket_mean = np.where(requests > 0, latency_sum / requests / 1000.0, 0.0)
+        endpoint_mean = np.where(endpoint_requests > 0, endpoint_latency / endpoint_requests / 1000.0, 0.0)
+
+    return {
+        "test_id": metadata.get("test_id"),
+        "start_time": start_time,
+        "end_time": end_time,
+        "total_requests": total_requests,
+        "failed_requests": total_failures,
+        "error_rate": total_failures / total_requests * 100 if total_requests else 0.0,
+        "total_bytes": total_bytes,
+        "max_response_time": latency_max / 1000.0,
+        "rps": total_requests / (end_time - start_time) if end_time > start_time else 0.0,
+        "endpoints": {
+            name: {
+                "requests": int(endpoint_requests[i]),
+                "failed_requests": int(endpoint_failures[i]),
+                "avg_response_time": float(endpoint_mean[i]),
+                "total_bytes": int(endpoint_bytes[i]),
+            }
+            for i, name in enumerate(endpoints)
+            if endpoint_requests[i]
+        },
+        "errors_by_status": {
+            str(status): int(count) for status, count in enumerate(status_failures) if count
+        },
+        "errors_by_class": {
+            class_names.get(str(error_class), str(error_class)): int(count)
+            for error_class, count in enumerate(error_classes) if count
+        },
+        "timeline": {
+            "bucket_seconds": bucket_seconds,
+            "rps": (requests / bucket_seconds).tolist(),
+            "error_rate": np.where(requests > 0, failures / np.maximum(requests, 1) * 100, 0.0).tolist(),
+            "avg_response_time": bucket_mean.tolist(),
+        },
+    }
+
+# ===============================================================================
+# REPORTING
+# ===============================================================================
+
+def write_report(analysis: Dict, out=sys.stdout):
+    """Print a human readable analysis report"""
+    out.write(f"Raw Result Analysis - {analysis['test_id']}\n")
+    out.write(f"==================================\n\n")
+    out.write(f"Total Requests: {analysis['total_requests']:,}\n")
+    out.write(f"Failed Requests: {analysis['failed_requests']:,}\n")
+    out.write(f"Error Rate: {analysis['error_rate']:.4f}%\n")
+    out.write(f"Actual RPS: {analysis['rps']:,.2f}\n")
+    out.write(f"Total Data: {analysis['total_bytes'] / 1024 / 1024:.2f} MB\n\n")
+
+    out.write(f"Response Times (ms, exact):\n")
+    out.write(f"---------------------------\n")
+    for name, value in analysis["percentiles"].items():
+        out.write(f"{name.upper()}: {value:.3f}\n")
+    out.write(f"Max: {analysis['max_response_time']:.3f}\n\n")
+
+    out.write(f"Endpoints:\n")
+    out.write(f"----------\n")
+    for name, endpoint in sorted(analysis["endpoints"].items(), key=lambda x: x[1]["requests"], reverse=True):
+        line = (f"{name:<20} {endpoint['requests']:>12,} req  {endpoint['failed_requests']:>10,} failed  "
+                f"avg {endpoint['avg_response_time']:>9.3f}ms")
+        if "percentiles" in endpoint:
+            line += "  " + "  ".join(f"{k} {v:.3f}ms" for k, v in endpoint["percentiles"].items())
+        out.write(line + "\n")
+    out.write("\n")
+
+    if analysis["errors_by_status"] or analysis["errors_by_class"]:
+        out.write(f"Error Breakdown:\n")
+        out.write(f"---------------\n")
+        for status, count in sorted(analysis["errors_by_status"].items(), key=lambda x: x[1], reverse=True):
+            out.write(f"status {status}: {count:,}\n")
+        for error_class, count in sorted(analysis["errors_by_class"].items(), key=lambda x: x[1], reverse=True):
+            out.write(f"class {error_class}: {count:,}\n")
+        out.write("\n")
+
+    timeline = analysis["timeline"]
+    out.write(f"Throughput Timeline ({timeline['bucket_seconds']:g}s buckets):\n")
+    out.write(f"--------------------\n")
+    for i, (rps, error_rate, avg) in enumerate(zip(timeline["rps"], timeline["error_rate"], timeline["avg_response_time"])):
+        out.write(f"{i * timeline['bucket_seconds']:>8g}s  {rps:>12,.1f} rps  {error_rate:>7.3f}% err  avg {avg:>9.3f}ms\n")
+
+# ===============================================================================
+# MAIN EXECUTION
+# ===============================================================================
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Analyze raw load test results (--raw-output)")
+    parser.add_argument("path", help="Test output directory or raw-results.meta.json")
+    parser.add_argument("--bucket", type=float, default=1.0, help="Timeline bucket size in seconds")
+    parser.add_argument("--percentiles", default="50,90,95,99,99.9,99.99",
+                        help="Comma-separated latency percentiles")
+    parser.add_argument("--per-endpoint-percentiles", action="store_true",
+                        help="Also compute exact percentiles for every endpoint (one pass per endpoint)")
+    parser.add_argument("--output", help="Write the analysis as JSON to this file")
+
+    args = parser.parse_args()
+
+    metadata = load_metadata(Path(args.path))
+    arrays = open_raw_files(metadata)
+    if not arrays:
+        print("No raw results found")
+        sys.exit(1)
+
+    percentiles = [float(p) for p in args.percentiles.split(",")]
+    analysis = summarize(arrays, metadata, args.bucket)
+    analysis["percentiles"] = exact_percentiles(arrays, percentiles)
+
+    if args.per_endpoint_percentiles:
+        for index, name in enumerate(metadata["endpoints"]):
+            if name in analysis["endpoints"]:
+                analysis["endpoints"][name]["percentiles"] = exact_percentiles(arrays, percentiles, index)
+
+    write_report(analysis)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(analysis, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Client Backend Benchmark
+Measures how many requests per second (and per CPU core) each client backend of
+high-performance-test.py can generate against a loopback HTTP server running in
+a separate process, to size the load generator fleet.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# high-performance-test.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location(
+    "high_performance_test", Path(__file__).with_name("high-performance-test.py")
+)
+hpt = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(hpt)
+
+# ===============================================================================
+# LOOPBACK SERVER
+# ===============================================================================
+
+RESPONSE_BODY = b'{"status":"ok","items":[1,2,3]}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n"
+    b"\r\n" + RESPONSE_BODY
+)
+
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+H2_RESPONSE_HEADERS = [
+    (b":status", b"200"),
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(RESPONSE_BODY)).encode()),
+]
+
+class LoopbackProtocol(asyncio.Protocol):
+    """Answers every request with a fixed response
+
+    Speaks HTTP/1.1 (with pipelining, body-less requests only) or, when the
+    client opens with the HTTP/2 connection preface, h2c.
+    """
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.pending = b""
+        self.h2 = None
+
+    def data_received(self, data: bytes):
+        if self.h2 is not None:
+            self.h2_received(data)
+            return
+
+        data = self.pending + data
+        if data.startswith(H2_PREFACE[:len(data)]) and hpt.h2 is not None:
+            if len(data) < len(H2_PREFACE):
+                self.pending = data
+                return
+            self.h2 = hpt.h2.connection.H2Connection(
+                config=hpt.h2.config.H2Configuration(client_side=False, header_encoding=None)
+            )
+            self.h2.initiate_connection()
+            self.h2.update_settings({hpt.h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+            self.h2_received(data)
+            return
+
+        requests = data.count(b"\r\n\r\n")
+        self.pending = data[data.rfind(b"\r\n\r\n") + 4:] if requests else data
+        if requests:
+            self.transport.write(RESPONSE * requests)
+
+    def h2_received(self, data: bytes):
+        for event in self.h2.receive_data(data):
+            if isinstance(event, hpt.h2.events.StreamEnded):
+                self.h2.send_headers(event.stream_id, H2_RESPONSE_HEADERS)
+                self.h2.send_data(event.stream_id, RESPONSE_BODY, end_stream=True)
+            elif isinstance(event, hpt.h2.events.DataReceived):
+                self.h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+        self.transport.write(self.h2.data_to_send())
+
+def run_server(port_queue):
+    """Entry point of the loopback server process"""
+    async def serve():
+        server = await asyncio.get_running_loop().create_server(LoopbackProtocol, "127.0.0.1", 0, backlog=4096)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+# ===============================================================================
+# BENCHMARK
+# ===============================================================================
+
+async def benchmark_backend(backend: str, port: int, duration: float, concurrency: int,
+                            connections: int, depth: int) -> Dict:
+    """Drive one backend flat out for duration seconds"""
+    config = hpt.TestConfig(
+        target_url=f"http://127.0.0.1:{port}",
+        target_rps=1,
+        duration=f"{duration}s",
+        users=concurrency,
+        output_dir=".",
+        test_id="client-benchmark",
+        max_connections=connections,
+        max_connections_per_host=connections,
+        client_backend=backend,
+        pipeline_depth=depth,
+        h2_connections=connections,
+        h2_max_streams=depth
+    )
+    client = hpt.CLIENT_BACKENDS[backend](config)
+    template = hpt.RequestTemplate(
+        name="benchmark",
+        method="GET",
+        variants=[(f"http://127.0.0.1:{port}/api/v1/products?page={page}", {}, None) for page in range(16)]
+    )
+    await client.start()
+    client.prepare(template)
+
+    histogram = hpt.LatencyHistogram()
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def driver():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await client.send(template, template.pick_index())
+            except Exception:
+                errors += 1
+                continue
+            histogram.record((time.perf_counter() - start) * 1000)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(driver() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    await client.close()
+
+    requests = histogram.total_count
+    return {
+        "backend": backend,
+        "connections": connections,
+        "depth": depth,
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / wall,
+        "cpu_seconds": cpu,
+        "rps_per_core": requests / cpu if cpu else 0.0,
+        "p50_ms": histogram.value_at_percentile(50),
+        "p99_ms": histogram.value_at_percentile(99),
+    }
+
+def write_report(results: List[Dict], target_rps: int):
+    """Print the comparison table"""
+    print(f"\n{'Backend':<10} {'Conns':>6} {'Depth':>6} {'RPS':>10} {'RPS/core':>10} {'P50 (ms)':>9} {'P99 (ms)':>9} "
+          f"{'Errors':>7} {'Cores @ target':>15}")
+    for result in results:
+        cores = target_rps / result["rps_per_core"] if result["rps_per_core"] else float("inf")
+        print(f"{result['backend']:<10} {result['connections']:>6} {result['depth']:>6} {result['rps']:>10,.0f} "
+              f"{result['rps_per_core']:>10,.0f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+              f"{result['errors']:>7,} {cores:>15,.1f}")
+    print(f"\nDepth: pipelined requests (raw) or concurrent streams (h2) per connection")
+    print(f"Cores @ target: generator cores needed for {target_rps:,} RPS at the measured efficiency "
+          f"(server cost excluded)")
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Benchmark load generator client backends on loopback")
+    available = [backend for backend in sorted(hpt.CLIENT_BACKENDS) if backend != "h2" or hpt.h2 is not None]
+    parser.add_argument("--backends", default=",".join(available),
+                        help="Comma-separated backends to compare")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per backend run")
+    parser.add_argument("--concurrency", type=int, default=256, help="Concurrent request loops")
+    parser.add_argument("--connections", type=int, default=64, help="Connection pool size")
+    parser.add_argument("--pipeline-depths", default="1,8", help="Pipeline depths to try for the raw backend")
+    parser.add_argument("--h2-connections", type=int, default=4, help="Connections for the h2 backend")
+    parser.add_argument("--h2-max-streams", default="64,256", help="Streams per connection to try for the h2 backend")
+    parser.add_argument("--target-rps", type=int, default=600000, help="Load used for the core estimate")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    unknown = [backend for backend in backends if backend not in hpt.CLIENT_BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(unknown)}")
+    if "h2" in backends and hpt.h2 is None:
+        parser.error("the h2 backend requires the 'h2' package (pip install h2)")
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_server, args=(port_queue,), name="loopback-server", daemon=True)
+    server.start()
+    port = port_queue.get(timeout=10)
+
+    results = []
+    try:
+        for backend in backends:
+            connections = args.connections
+            depths = [1]
+            if backend == "raw":
+                depths = [int(depth) for depth in args.pipeline_depths.split(",")]
+            elif backend == "h2":
+                connections = args.h2_connections
+                depths = [int(depth) for depth in args.h2_max_streams.split(",")]
+            for depth in depths:
+                print(f"Benchmarking {backend} ({connections} connections, depth {depth}) for {args.duration:g}s...")
+                results.append(asyncio.run(benchmark_backend(
+                    backend, port, args.duration, args.concurrency, connections, depth
+                )))
+    finally:
+        server.terminate()
+        server.join()
+
+    write_report(results, args.target_rps)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Load Tester Benchmark Suite
+Runs high-performance-test.py end to end against mock-target-server.py on the
+local machine and reports, per scenario, the generator's RPS per CPU core,
+its memory (peak RSS and growth per million requests) and how far its
+measured latency percentiles are from the latency the mock injected.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TOOLS_DIR = Path(__file__).parent
+TESTER = TOOLS_DIR / "high-performance-test.py"
+MOCK_SERVER = TOOLS_DIR / "mock-target-server.py"
+
+# mock-target-server.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location("mock_target_server", MOCK_SERVER)
+mock = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mock)
+
+ACCURACY_PERCENTILES = [50, 90, 95, 99]
+
+# ===============================================================================
+# SCENARIOS
+# ===============================================================================
+
+@dataclass
+class Scenario:
+    """One tester configuration run against a mock with known behavior"""
+    name: str
+    description: str
+    tester_args: List[str]
+    latency: str = "constant:0"  # injected by the mock, in ms
+    target_rps: Optional[int] = None  # None: the suite's --target-rps
+    accuracy: bool = False  # compare measured percentiles with the injected distribution
+
+def build_scenarios(accuracy_rps: int) -> List[Scenario]:
+    """Built-in scenarios: generator throughput per client backend, then measurement accuracy"""
+    scenarios = [
+        Scenario("open-aiohttp", "open scheduler, aiohttp client",
+                 ["--scheduler", "open", "--client", "aiohttp"]),
+        Scenario("open-raw", "open scheduler, raw HTTP/1.1 client",
+                 ["--scheduler", "open", "--client", "raw"]),
+        Scenario("open-raw-pipelined", "open scheduler, raw client with 8 pipelined requests per connection",
+                 ["--scheduler", "open", "--client", "raw", "--pipeline-depth", "8"]),
+        Scenario("closed-aiohttp", "closed worker loop, aiohttp client",
+                 ["--scheduler", "closed", "--client", "aiohttp"]),
+        Scenario("accuracy-constant", "10ms constant injected latency, open scheduler",
+                 ["--scheduler", "open", "--client", "raw"],
+                 latency="constant:10", target_rps=accuracy_rps, accuracy=True),
+        Scenario("accuracy-lognormal", "lognormal injected latency (median 20ms, sigma 0.5), open scheduler",
+                 ["--scheduler", "open", "--client", "raw"],
+                 latency="lognormal:20:0.5", target_rps=accuracy_rps, accuracy=True),
+    ]
+    if mock.hpt.h2 is not None:
+        scenarios.insert(3, Scenario("open-h2", "open scheduler, HTTP/2 client (h2c)",
+                                     ["--scheduler", "open", "--client", "h2"]))
+    return scenarios
+
+# ===============================================================================
+# MEASUREMENT
+# ===============================================================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Mock target did not open port {port} within {timeout:g}s")
+
+def process_tree_rss(pid: int) -> int:
+    """Resident memory in bytes of a process and its descendants (Linux /proc)"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+@dataclass
+class ScenarioResult:
+    """Generator efficiency and accuracy for one scenario"""
+    name: str
+    description: str
+    target_rps: int
+    requests: int = 0
+    errors: int = 0
+    achieved_rps: float = 0.0
+    cpu_seconds: float = 0.0
+    rps_per_core: float = 0.0
+    peak_rss_mb: float = 0.0
+    rss_growth_mb_per_million: float = 0.0
+    generator_saturated: bool = False
+    latency: str = ""
+    accuracy: Dict[str, Dict[str, float]] = field(default_factory=dict)  # p50 -> injected/measured/error
+    error: Optional[str] = None
+
+def run_scenario(scenario: Scenario, args, output_dir: Path) -> ScenarioResult:
+    """Start a mock with the scenario's behavior, run the tester against it and measure"""
+    target_rps = scenario.target_rps or args.target_rps
+    result = ScenarioResult(scenario.name, scenario.description, target_rps, latency=scenario.latency)
+    port = free_port()
+    scenario_dir = output_dir / scenario.name
+    scenario_dir.mkdir(parents=True, exist_ok=True)
+
+    server = subprocess.Popen(
+        [sys.executable, str(MOCK_SERVER), "--port", str(port), "--workers", str(args.mock_workers),
+         "--latency", scenario.latency, "--response-size", str(args.response_size)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        command = [
+            sys.executable, str(TESTER),
+            "--target-url", f"http://127.0.0.1:{port}",
+            "--target-rps", str(target_rps),
+            "--duration", f"{args.duration}s",
+            "--users", str(args.users),
+            "--processes", str(args.processes),
+            "--max-connections", str(args.connections),
+            "--output-dir", str(scenario_dir),
+            "--test-id", scenario.name,
+        ] + scenario.tester_args
+
+        usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        with open(scenario_dir / "tester-output.log", "w") as log:
+            tester = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            samples = []
+            while tester.poll() is None:
+                samples.append((time.time(), process_tree_rss(tester.pid)))
+                time.sleep(0.25)
+        usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if tester.returncode != 0:
+            result.error = f"tester exited with {tester.returncode} (see {scenario_dir / 'tester-output.log'})"
+            return result
+    finally:
+        server.terminate()
+        server.wait()
+
+    # The tester joins its worker processes, so their CPU time is included
+    result.cpu_seconds = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+
+    with open(scenario_dir / "custom-results.json") as f:
+        results = json.load(f)
+    metrics = results["metrics"]
+    result.requests = metrics["total_requests"]
+    result.errors = metrics["failed_requests"]
+    result.achieved_rps = metrics["rps"]
+    result.rps_per_core = result.requests / result.cpu_seconds if result.cpu_seconds else 0.0
+    result.generator_saturated = results.get("generator", {}).get("saturated", False)
+
+    rss = [value for _, value in samples if value]
+    if rss:
+        result.peak_rss_mb = max(rss) / 1024 / 1024
+        # Growth after start-up, scaled to a million requests
+        steady = rss[min(len(rss) - 1, 4):]
+        if result.requests and len(steady) > 1:
+            result.rss_growth_mb_per_million = (steady[-1] - steady[0]) / 1024 / 1024 / result.requests * 1e6
+
+    if scenario.accuracy and results.get("histograms"):
+        histogram = mock.hpt.LatencyHistogram.from_dict(results["histograms"]["total"])
+        for percentile in ACCURACY_PERCENTILES:
+            injected = mock.latency_quantile(scenario.latency, percentile)
+            measured = histogram.value_at_percentile(percentile)
+            result.accuracy[f"p{percentile}"] = {
+                "injected_ms": injected,
+                "measured_ms": measured,
+                "error_ms": measured - injected,
+                "error_percent": (measured - injected) / injected * 100 if injected else 0.0,
+            }
+    return result
+
+# ===============================================================================
+# REPORTING
+# ===============================================================================
+
+def write_report(results: List[ScenarioResult], out=sys.stdout):
+    """Print the efficiency and accuracy tables"""
+    out.write(f"\nGenerator Efficiency:\n")
+    out.write(f"---------------------\n")
+    out.write(f"{'Scenario':<22} {'Target':>9} {'Achieved':>10} {'CPU (s)':>8} {'RPS/core':>10} "
+              f"{'Peak RSS':>9} {'MB/1M req':>10} {'Errors':>7}  Notes\n")
+    for result in results:
+        if result.error:
+            out.write(f"{result.name:<22} FAILED: {result.error}\n")
+            continue
+        notes = "generator saturated" if result.generator_saturated else ""
+        out.write(f"{result.name:<22} {result.target_rps:>9,} {result.achieved_rps:>10,.0f} "
+                  f"{result.cpu_seconds:>8.1f} {result.rps_per_core:>10,.0f} {result.peak_rss_mb:>8.0f}M "
+                  f"{result.rss_growth_mb_per_million:>10.1f} {result.errors:>7,}  {notes}\n")
+
+    accuracy = [result for result in results if result.accuracy]
+    if accuracy:
+        out.write(f"\nMeasurement Accuracy (measured - injected latency):\n")
+        out.write(f"---------------------------------------------------\n")
+        for result in accuracy:
+            out.write(f"{result.name} ({result.latency} ms injected):\n")
+            for label, values in result.accuracy.items():
+                out.write(f"  {label:<4} injected {values['injected_ms']:>8.2f}ms  measured {values['measured_ms']:>8.2f}ms  "
+                          f"error {values['error_ms']:>+7.2f}ms ({values['error_percent']:+.1f}%)\n")
+    out.write(f"\nRPS/core: requests per CPU second of the tester and its worker processes (mock excluded)\n")
+    out.write(f"MB/1M req: resident memory growth after start-up per million requests\n")
+
+# ===============================================================================
+# MAIN EXECUTION
+# ===============================================================================
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Benchmark high-performance-test.py against the local mock target")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    parser.add_argument("--duration", type=int, default=15, help="Seconds per scenario")
+    parser.add_argument("--target-rps", type=int, default=50000, help="Offered load of the throughput scenarios")
+    parser.add_argument("--accuracy-rps", type=int, default=1000,
+                        help="Offered load of the accuracy scenarios (keep well below capacity)")
+    parser.add_argument("--users", type=int, default=500, help="Tester --users")
+    parser.add_argument("--processes", type=int, default=1, help="Tester --processes")
+    parser.add_argument("--connections", type=int, default=256, help="Tester --max-connections")
+    parser.add_argument("--mock-workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Mock target server processes")
+    parser.add_argument("--response-size", type=int, default=256, help="Mock response body size in bytes")
+    parser.add_argument("--output-dir", default="load-tester-benchmark", help="Per-scenario tester output")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.accuracy_rps)
+    if args.list:
+        for scenario in scenarios:
+            print(f"{scenario.name:<22} {scenario.description}")
+        return
+    if args.scenarios:
+        known = {scenario.name: scenario for scenario in scenarios}
+        names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)} (see --list)")
+        scenarios = [known[name] for name in names]
+
+    output_dir = Path(args.output_dir)
+    results = []
+    for scenario in scenarios:
+        print(f"Running {scenario.name} ({scenario.description}) for {args.duration}s...")
+        results.append(run_scenario(scenario, args, output_dir))
+
+    write_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if any(result.error for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Load Test Result Comparison
+Compares a load test run of high-performance-test.py against a baseline run,
+overall and per endpoint, and exits non-zero when latency, error rate or
+throughput regressed beyond the configured thresholds. Works purely on the
+saved custom-results.json files, so it runs offline as a CI gate.
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import shutil
+import sys
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# high-performance-test.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location(
+    "high_performance_test", Path(__file__).with_name("high-performance-test.py")
+)
+hpt = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(hpt)
+
+RESULTS_FILE = "custom-results.json"
+
+# ===============================================================================
+# CONFIGURATION
+# ===============================================================================
+
+@dataclass
+class Thresholds:
+    """Regression thresholds"""
+    latency_percent: float = 10.0  # allowed relative percentile increase
+    latency_floor_ms: float = 1.0  # increases below this are never regressions
+    error_rate_points: float = 0.5  # allowed error rate increase in percentage points
+    throughput_percent: float = 5.0  # allowed relative drop of achieved RPS
+    ks_distance: float = 0.15  # distribution shift that fails on its own
+    alpha: float = 0.001  # significance level of the KS and error rate tests
+    min_samples: int = 500  # endpoints with fewer requests are reported, not gated
+
+@dataclass
+class ScopeComparison:
+    """Comparison of one slice (all requests or one endpoint) of two runs"""
+    name: str
+    baseline_requests: int
+    current_requests: int
+    percentiles: Dict[str, Tuple[float, float]] = field(default_factory=dict)  # name -> (baseline, current)
+    error_rate: Tuple[float, float] = (0.0, 0.0)
+    rps: Tuple[float, float] = (0.0, 0.0)
+    ks_distance: Optional[float] = None
+    ks_p_value: Optional[float] = None
+    gated: bool = True
+    regressions: List[str] = field(default_factory=list)
+
+# ===============================================================================
+# LOADING
+# ===============================================================================
+
+def load_results(path: Path) -> Dict:
+    """Load custom-results.json from a test output directory or explicit path"""
+    results_file = path / RESULTS_FILE if path.is_dir() else path
+    with open(results_file) as f:
+        results = json.load(f)
+    results["file"] = str(results_file)
+    return results
+
+def scope_histograms(results: Dict) -> Dict[str, "hpt.LatencyHistogram"]:
+    """Latency histograms keyed by scope name (empty for files saved before histograms were stored)"""
+    saved = results.get("histograms")
+    if not saved:
+        return {}
+    histograms = {"overall": hpt.LatencyHistogram.from_dict(saved["total"])}
+    for name, data in saved["endpoints"].items():
+        histograms[name] = hpt.LatencyHistogram.from_dict(data)
+    return histograms
+
+def scope_metrics(results: Dict) -> Dict[str, Dict]:
+    """TestMetrics dicts keyed by scope name"""
+    metrics = {"overall": results["metrics"]}
+    for name, endpoint in results.get("endpoints", {}).items():
+        metrics[name] = endpoint["metrics"]
+    return metrics
+
+# ===============================================================================
+# STATISTICS
+# ===============================================================================
+
+def histogram_steps(histogram: "hpt.LatencyHistogram") -> List[Tuple[int, int]]:
+    """(slot lowest value in microseconds, count) for every populated slot, ascending"""
+    steps = []
+    for index, count in enumerate(histogram.counts):
+        if count:
+            low, _ = histogram._value_from_index(index)
+            steps.append((low, count))
+    return steps
+
+def ks_distance(baseline: "hpt.LatencyHistogram", current: "hpt.LatencyHistogram") -> float:
+    """Largest gap between the two empirical CDFs (two-sample Kolmogorov-Smirnov statistic)
+
+    Histogram slots stand in for the samples, so the result is exact up to the
+    histogram precision and works for histograms with different layouts.
+    """
+    if not baseline.total_count or not current.total_count:
+        return 0.0
+
+    steps = [(value, count / baseline.total_count, 0.0) for value, count in histogram_steps(baseline)]
+    steps += [(value, 0.0, count / current.total_count) for value, count in histogram_steps(current)]
+    steps.sort(key=lambda step: step[0])
+
+    distance = 0.0
+    baseline_cdf = current_cdf = 0.0
+    for position, (value, baseline_step, current_step) in enumerate(steps):
+        baseline_cdf += baseline_step
+        current_cdf += current_step
+        # Only compare once every slot starting at this value has been added
+        if position + 1 == len(steps) or steps[position + 1][0] != value:
+            distance = max(distance, abs(baseline_cdf - current_cdf))
+    return distance
+
+def ks_p_value(distance: float, n: int, m: int) -> float:
+    """Asymptotic p-value of a two-sample KS statistic"""
+    if distance <= 0 or not n or not m:
+        return 1.0
+    effective = math.sqrt(n * m / (n + m))
+    lam = (effective + 0.12 + 0.11 / effective) * distance
+    if lam < 0.2:
+        return 1.0
+    total = 0.0
+    for k in range(1, 101):
+        term = 2 * (-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam)
+        total += term
+        if abs(term) < 1e-12:
+            break
+    return min(1.0, max(0.0, total))
+
+def proportion_p_value(failed_a: int, total_a: int, failed_b: int, total_b: int) -> float:
+    """One-sided p-value that the failure ratio of b is higher than a (two-proportion z-test)"""
+    if not total_a or not total_b:
+        return 1.0
+    pooled = (failed_a + failed_b) / (total_a + total_b)
+    variance = pooled * (1 - pooled) * (1 / total_a + 1 / total_b)
+    if variance <= 0:
+        return 1.0
+    z = (failed_b / total_b - failed_a / total_a) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+# ===============================================================================
+# COMPARISON
+# ===============================================================================
+
+PERCENTILES = {"p50": "p50_response_time", "p90": "p90_response_time",
+               "p95": "p95_response_time", "p99": "p99_response_time"}
+
+def compare_scope(name: str, baseline: Dict, current: Dict,
+                  baseline_histogram: Optional["hpt.LatencyHistogram"],
+                  current_histogram: Optional["hpt.LatencyHistogram"],
+                  thresholds: Thresholds) -> ScopeComparison:
+    """Compare one scope and record every threshold it breaches"""
+    comparison = ScopeComparison(
+        name=name,
+        baseline_requests=baseline["total_requests"],
+        current_requests=current["total_requests"],
+        error_rate=(baseline["error_rate"], current["error_rate"]),
+        rps=(baseline["rps"], current["rps"]),
+    )
+    comparison.gated = min(comparison.baseline_requests, comparison.current_requests) >= thresholds.min_samples
+
+    for label, key in PERCENTILES.items():
+        if baseline_histogram is not None and current_histogram is not None:
+            percentile = float(label[1:])
+            comparison.percentiles[label] = (baseline_histogram.value_at_percentile(percentile),
+                                             current_histogram.value_at_percentile(percentile))
+        elif key in baseline and key in current:
+            comparison.percentiles[label] = (baseline[key], current[key])
+
+    # Latency differences only count when the distributions differ significantly,
+    # so short or noisy runs do not fail on sampling jitter alone
+    significant = True
+    shifted = False
+    if baseline_histogram is not None and current_histogram is not None:
+        comparison.ks_distance = ks_distance(baseline_histogram, current_histogram)
+        comparison.ks_p_value = ks_p_value(comparison.ks_distance, baseline_histogram.total_count,
+                                           current_histogram.total_count)
+        significant = comparison.ks_p_value < thresholds.alpha
+        slower = current_histogram.value_at_percentile(50) > baseline_histogram.value_at_percentile(50)
+        shifted = significant and slower and comparison.ks_distance >= thresholds.ks_distance
+
+    if not comparison.gated:
+        return comparison
+
+    if significant:
+        for label, (before, after) in comparison.percentiles.items():
+            increase = after - before
+            if increase > thresholds.latency_floor_ms and increase > before * thresholds.latency_percent / 100:
+                comparison.regressions.append(
+                    f"{label} {before:.2f}ms -> {after:.2f}ms (+{increase / before * 100 if before else 100:.1f}%)"
+                )
+    if shifted:
+        comparison.regressions.append(
+            f"latency distribution shifted (KS {comparison.ks_distance:.3f}, p={comparison.ks_p_value:.2g})"
+        )
+
+    before, after = comparison.error_rate
+    p_value = proportion_p_value(baseline["failed_requests"], baseline["total_requests"],
+                                 current["failed_requests"], current["total_requests"])
+    if after - before > thresholds.error_rate_points and p_value < thresholds.alpha:
+        comparison.regressions.append(f"error rate {before:.2f}% -> {after:.2f}% (p={p_value:.2g})")
+
+    # Per-endpoint rates follow the randomized request mix, only the total is gated
+    before, after = comparison.rps
+    if name == "overall" and before and (before - after) / before * 100 > thresholds.throughput_percent:
+        comparison.regressions.append(f"throughput {before:,.1f} -> {after:,.1f} RPS ({(after - before) / before:+.1%})")
+
+    return comparison
+
+def compare_results(baseline: Dict, current: Dict, thresholds: Thresholds) -> List[ScopeComparison]:
+    """Compare the overall metrics and every endpoint present in both runs"""
+    baseline_metrics = scope_metrics(baseline)
+    current_metrics = scope_metrics(current)
+    baseline_histograms = scope_histograms(baseline)
+    current_histograms = scope_histograms(current)
+
+    comparisons = []
+    for name in baseline_metrics:
+        if name not in current_metrics:
+            continue
+        if not baseline_metrics[name]["total_requests"] and not current_metrics[name]["total_requests"]:
+            continue
+        comparisons.append(compare_scope(
+            name, baseline_metrics[name], current_metrics[name],
+            baseline_histograms.get(name), current_histograms.get(name), thresholds
+        ))
+    return comparisons
+
+# ===============================================================================
+# REPORTING
+# ===============================================================================
+
+def write_report(baseline: Dict, current: Dict, comparisons: List[ScopeComparison], out=sys.stdout):
+    """Print a human readable comparison report"""
+    out.write(f"Load Test Comparison\n")
+    out.write(f"====================\n\n")
+    out.write(f"Baseline: {baseline['config']['test_id']} ({baseline['file']})\n")
+    out.write(f"Current:  {current['config']['test_id']} ({current['file']})\n")
+    if not baseline.get("histograms") or not current.get("histograms"):
+        out.write(f"Note: latency histograms missing, comparing saved percentiles without a significance test\n")
+    for key in ("target_rps", "scheduler", "client_backend", "processes"):
+        if baseline["config"].get(key) != current["config"].get(key):
+            out.write(f"Note: {key} differs ({baseline['config'].get(key)} vs {current['config'].get(key)})\n")
+    out.write("\n")
+
+    out.write(f"{'Scope':<20} {'Requests':>18} {'RPS':>22} {'P50 (ms)':>18} {'P95 (ms)':>18} "
+              f"{'P99 (ms)':>18} {'Errors %':>16} {'KS':>6}  Result\n")
+    for comparison in comparisons:
+        def pair(values: Tuple[float, float], fmt: str) -> str:
+            return f"{values[0]:{fmt}} -> {values[1]:{fmt}}"
+        percentiles = comparison.percentiles
+        ks = f"{comparison.ks_distance:.3f}" if comparison.ks_distance is not None else "-"
+        if not comparison.gated:
+            verdict = "SKIP (too few samples)"
+        elif comparison.regressions:
+            verdict = "REGRESSION"
+        else:
+            verdict = "OK"
+        out.write(f"{comparison.name:<20} "
+                  f"{pair((comparison.baseline_requests, comparison.current_requests), '>7,'):>18} "
+                  f"{pair(comparison.rps, '>9,.1f'):>22} "
+                  f"{pair(percentiles.get('p50', (0, 0)), '>7.2f'):>18} "
+                  f"{pair(percentiles.get('p95', (0, 0)), '>7.2f'):>18} "
+                  f"{pair(percentiles.get('p99', (0, 0)), '>7.2f'):>18} "
+                  f"{pair(comparison.error_rate, '>6.2f'):>16} {ks:>6}  {verdict}\n")
+
+    regressions = [comparison for comparison in comparisons if comparison.regressions]
+    out.write("\n")
+    if regressions:
+        out.write(f"Regressions:\n")
+        out.write(f"------------\n")
+        for comparison in regressions:
+            for regression in comparison.regressions:
+                out.write(f"{comparison.name}: {regression}\n")
+    else:
+        out.write(f"No regressions beyond the thresholds\n")
+
+# ===============================================================================
+# MAIN EXECUTION
+# ===============================================================================
+
+def main():
+    """Main execution function"""
+    defaults = Thresholds()
+    parser = argparse.ArgumentParser(description="Compare a load test run against a baseline (regression gate)")
+    parser.add_argument("baseline", help="Baseline test output directory or custom-results.json")
+    parser.add_argument("current", help="Current test output directory or custom-results.json")
+    parser.add_argument("--latency-threshold", type=float, default=defaults.latency_percent,
+                        help="Allowed percentile latency increase in percent")
+    parser.add_argument("--latency-floor-ms", type=float, default=defaults.latency_floor_ms,
+                        help="Latency increases below this many ms never fail")
+    parser.add_argument("--error-rate-threshold", type=float, default=defaults.error_rate_points,
+                        help="Allowed error rate increase in percentage points")
+    parser.add_argument("--throughput-threshold", type=float, default=defaults.throughput_percent,
+                        help="Allowed achieved RPS drop in percent")
+    parser.add_argument("--ks-threshold", type=float, default=defaults.ks_distance,
+                        help="KS distance at which a slower latency distribution fails on its own")
+    parser.add_argument("--alpha", type=float, default=defaults.alpha,
+                        help="Significance level latency differences must reach")
+    parser.add_argument("--min-samples", type=int, default=defaults.min_samples,
+                        help="Minimum requests per run for a scope to be gated")
+    parser.add_argument("--overall-only", action="store_true", help="Do not gate on individual endpoints")
+    parser.add_argument("--output", help="Write the comparison as JSON to this file")
+    parser.add_argument("--save-baseline", help="Copy the current results here when no regression was found")
+
+    args = parser.parse_args()
+
+    thresholds = Thresholds(
+        latency_percent=args.latency_threshold,
+        latency_floor_ms=args.latency_floor_ms,
+        error_rate_points=args.error_rate_threshold,
+        throughput_percent=args.throughput_threshold,
+        ks_distance=args.ks_threshold,
+        alpha=args.alpha,
+        min_samples=args.min_samples
+    )
+
+    try:
+        baseline = load_results(Path(args.baseline))
+        current = load_results(Path(args.current))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Cannot load results: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    comparisons = compare_results(baseline, current, thresholds)
+    if args.overall_only:
+        for comparison in comparisons[1:]:
+            comparison.gated = False
+            comparison.regressions = []
+
+    write_report(baseline, current, comparisons)
+
+    regressed = any(comparison.regressions for comparison in comparisons)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "baseline": baseline["file"],
+                "current": current["file"],
+                "thresholds": asdict(thresholds),
+                "regressed": regressed,
+                "scopes": [asdict(comparison) for comparison in comparisons],
+            }, f, indent=2)
+
+    if regressed:
+        sys.exit(1)
+
+    if args.save_baseline:
+        target = Path(args.save_baseline)
+        if target.suffix != ".json":
+            target.mkdir(parents=True, exist_ok=True)
+            target = target / RESULTS_FILE
+        shutil.copyfile(current["file"], target)
+        print(f"\nBaseline updated: {target}")
+
+if __name__ == "__main__":
+    main()
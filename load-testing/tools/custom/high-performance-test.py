@@ -7,26 +7,59 @@ Optimized for maximum performance and detailed metrics collection
 
 import asyncio
 import aiohttp
+from abc import ABC, abstractmethod
+from aiohttp import web
 import argparse
+import bisect
+import csv
+import gc
+import gzip
 import json
 import logging
+import math
+import multiprocessing
+import os
+import queue
 import random
+import re
 import signal
+import socket
+import struct
 import sys
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from dataclasses import dataclass, asdict, field, replace
+from datetime import datetime, timedelta, timezone
+from itertools import compress
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-import statistics
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 import ssl
 import certifi
 
+try:  # optional: only needed for --client h2
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:
+    h2 = None
+
 # ===============================================================================
 # CONFIGURATION
 # ===============================================================================
 
+@dataclass
+class LoadStage:
+    """One step of a load profile; the rate moves linearly from start_rps to target_rps"""
+    name: str
+    duration: int  # seconds
+    target_rps: float
+    start_rps: float = 0.0
+
 @dataclass
 class TestConfig:
     """Test configuration parameters"""
@@ -41,36 +74,1984 @@ class TestConfig:
     max_connections_per_host: int = 100
     keepalive_timeout: int = 30
     enable_ssl_verify: bool = False
+    latency_precision: int = 3  # significant decimal digits kept by the histogram
+    max_latency_ms: int = 3600000  # highest latency the histogram can track
+    raw_sample_size: int = 1000  # raw results kept for the report
+    processes: int = 1  # load generator processes on this node
+    scheduler: str = "closed"  # closed (per-worker loop) or open (arrival-driven)
+    arrival_process: str = "constant"  # constant or poisson (open scheduler)
+    arrival_phase: float = 0.0  # fraction of an interval to offset the first arrival
+    max_in_flight: int = 10000  # open scheduler drops arrivals beyond this
+    late_threshold_ms: float = 10.0  # dispatch delay after which a request counts as late
+    stages: List[LoadStage] = field(default_factory=list)  # empty: constant target_rps
+    process_index: int = 0  # index of this generator process (multi-process mode)
+    metrics_port: int = 0  # Prometheus /metrics port (0 disables the endpoint)
+    snapshot_interval: float = 1.0  # seconds between time-series snapshots (0 disables)
+    timeseries_file: str = "timeseries.jsonl"
+    raw_output: bool = False  # stream every result to a binary file for offline analysis
+    raw_results_file: str = "raw-results.bin"
+    client_backend: str = "aiohttp"  # HTTP client implementation (see CLIENT_BACKENDS)
+    pipeline_depth: int = 1  # requests in flight per connection (raw backend)
+    h2_connections: int = 8  # HTTP/2 connections per generator process
+    h2_max_streams: int = 100  # concurrent streams per HTTP/2 connection
+    journeys: List[Dict] = field(default_factory=list)  # journey scheduler flows (empty: built-in flows)
+    think_time: str = "exponential:1"  # default pause after each journey step
+    loop_lag_threshold_ms: float = 50.0  # p99 event loop lag that marks the generator as saturated
+    replay_file: Optional[str] = None  # access log replayed by the replay scheduler
+    replay_format: str = "auto"  # envoy (JSON lines), csv or auto
+    replay_speed: float = 1.0  # inter-arrival time multiplier (2 replays twice as fast)
+    replay_partition: int = 0  # slice of the log lines replayed by this generator
+    replay_partitions: int = 1
+    product_keys: str = "uniform:500"  # product id popularity (see KeySpace)
+    user_keys: str = "uniform:1000"  # user id popularity
+    search_keys: str = "uniform:10"  # search term popularity over the built-in terms
+    checkpoint_interval: float = 60.0  # seconds between checkpoints of the aggregated state (0 disables)
+    checkpoint_file: str = "checkpoint.json"
+    drain_timeout: float = 10.0  # seconds in-flight requests get to complete once the test ends
+    resume_elapsed: float = 0.0  # seconds already run by the checkpointed run being resumed
+
+@dataclass
+class RequestResult:
+    """Individual request result"""
+    timestamp: float
+    url: str
+    method: str
+    status_code: int
+    response_time: float
+    success: bool
+    error: Optional[str] = None
+    size: int = 0
+    endpoint: str = ""
+
+@dataclass
+class TestMetrics:
+    """Aggregated test metrics"""
+    total_requests: int = 0
+    successful_requests: int = 0
+    failed_requests: int = 0
+    total_bytes: int = 0
+    min_response_time: float = float('inf')
+    max_response_time: float = 0.0
+    avg_response_time: float = 0.0
+    p50_response_time: float = 0.0
+    p95_response_time: float = 0.0
+    p99_response_time: float = 0.0
+    rps: float = 0.0
+    error_rate: float = 0.0
+    dropped_requests: int = 0  # open scheduler: arrivals skipped at the in-flight limit
+    late_requests: int = 0  # open scheduler: arrivals dispatched after late_threshold_ms
+    abandoned_requests: int = 0  # still in flight when the drain timeout expired
+    start_time: float = 0.0
+    end_time: float = 0.0
+
+# ===============================================================================
+# LATENCY HISTOGRAM
+# ===============================================================================
+
+class LatencyHistogram:
+    """Fixed-memory log-bucketed latency histogram (HdrHistogram layout)
+
+    Latencies are recorded in microseconds into power-of-two buckets, each split
+    into linear sub-buckets sized so that every recorded value keeps
+    `significant_digits` decimal digits of precision. Recording is O(1) and the
+    memory footprint depends only on the precision and the trackable range.
+    """
+
+    def __init__(self, significant_digits: int = 3, max_value_ms: int = 3600000):
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+
+        self.significant_digits = significant_digits
+        self.max_value_ms = max_value_ms
+        self.highest_trackable = max(2, int(max_value_ms * 1000))
+
+        largest_single_unit = 2 * 10 ** significant_digits
+        self.sub_bucket_count_magnitude = (largest_single_unit - 1).bit_length()
+        self.sub_bucket_half_count_magnitude = self.sub_bucket_count_magnitude - 1
+        self.sub_bucket_count = 1 << self.sub_bucket_count_magnitude
+        self.sub_bucket_half_count = self.sub_bucket_count >> 1
+        self.sub_bucket_mask = self.sub_bucket_count - 1
+
+        smallest_untrackable = self.sub_bucket_count
+        self.bucket_count = 1
+        while smallest_untrackable <= self.highest_trackable:
+            smallest_untrackable <<= 1
+            self.bucket_count += 1
+
+        self.counts: List[int] = [0] * ((self.bucket_count + 1) * self.sub_bucket_half_count)
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = 0
+        self.max_value = 0
+
+    def _counts_index(self, value: int) -> int:
+        """Map a value in microseconds to its slot in the counts array"""
+        bucket_index = (value | self.sub_bucket_mask).bit_length() - self.sub_bucket_count_magnitude
+        sub_bucket_index = value >> bucket_index
+        return ((bucket_index + 1) << self.sub_bucket_half_count_magnitude) + sub_bucket_index - self.sub_bucket_half_count
+
+    def _value_from_index(self, index: int) -> Tuple[int, int]:
+        """Return the lowest value and the width of the slot at index"""
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        return sub_bucket_index << bucket_index, 1 << bucket_index
+
+    def record(self, value_ms: float):
+        """Record a latency sample in milliseconds"""
+        value = int(value_ms * 1000)
+        if value < 0:
+            value = 0
+        elif value > self.highest_trackable:
+            value = self.highest_trackable
+
+        self.counts[self._counts_index(value)] += 1
+        if self.total_count == 0 or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+        self.total_count += 1
+        self.total_sum += value
+
+    def value_at_percentile(self, percentile: float) -> float:
+        """Return the latency in milliseconds at the given percentile (0-100)"""
+        if self.total_count == 0:
+            return 0.0
+
+        target = max(1, int(percentile / 100.0 * self.total_count + 0.5))
+        running = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            running += count
+            if running >= target:
+                low, width = self._value_from_index(index)
+                value = min(low + width - 1, self.max_value)
+                return max(value, self.min_value) / 1000.0
+        return self.max_value / 1000.0
+
+    def cumulative_counts(self, bounds_ms: List[float]) -> List[int]:
+        """Number of samples at or below each bound (bounds in ascending order)"""
+        bounds = [bound * 1000 for bound in bounds_ms]
+        counts = [0] * (len(bounds) + 1)
+        for index, count in enumerate(self.counts):
+            if count:
+                low, _ = self._value_from_index(index)
+                counts[bisect.bisect_left(bounds, low)] += count
+
+        running = 0
+        for position in range(len(bounds)):
+            running += counts[position]
+            counts[position] = running
+        return counts[:-1]
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the samples of another histogram with the same layout"""
+        if (other.significant_digits, other.highest_trackable) != (self.significant_digits, self.highest_trackable):
+            raise ValueError("Cannot merge histograms with different precision or range")
+        if not other.total_count:
+            return
+
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        if self.total_count == 0 or other.min_value < self.min_value:
+            self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+        self.total_count += other.total_count
+        self.total_sum += other.total_sum
+
+    def copy(self) -> "LatencyHistogram":
+        """Independent copy (a list copy of the counts, far cheaper than to_dict)"""
+        histogram = LatencyHistogram.__new__(LatencyHistogram)
+        histogram.__dict__.update(self.__dict__)
+        histogram.counts = self.counts[:]
+        return histogram
+
+    def to_dict(self) -> Dict:
+        """Serialize to a compact JSON-friendly dict (sparse counts)
+
+        The non-zero slots go out as two flat int lists, built in C: a list of
+        [index, count] pairs costs a Python loop over every slot plus one list
+        object per pair for the garbage collector to track.
+        """
+        counts = self.counts
+        return {
+            "significant_digits": self.significant_digits,
+            "max_value_ms": self.max_value_ms,
+            "total_count": self.total_count,
+            "total_sum": self.total_sum,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "counts": {
+                "indexes": list(compress(range(len(counts)), counts)),
+                "values": list(filter(None, counts)),
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        """Rebuild a histogram serialized with to_dict"""
+        histogram = cls(data["significant_digits"], data["max_value_ms"])
+        counts = data["counts"]
+        if isinstance(counts, dict):
+            counts = zip(counts["indexes"], counts["values"])
+        for index, count in counts:  # [[index, count], ...] in checkpoints of earlier versions
+            histogram.counts[index] = count
+        histogram.total_count = data["total_count"]
+        histogram.total_sum = data["total_sum"]
+        histogram.min_value = data["min_value"]
+        histogram.max_value = data["max_value"]
+        return histogram
+
+    @property
+    def min(self) -> float:
+        return self.min_value / 1000.0
+
+    @property
+    def max(self) -> float:
+        return self.max_value / 1000.0
+
+    @property
+    def mean(self) -> float:
+        if self.total_count == 0:
+            return 0.0
+        return self.total_sum / self.total_count / 1000.0
+
+class MetricsAccumulator:
+    """Streaming request counters plus a latency histogram for one slice of a test"""
+
+    def __init__(self, significant_digits: int = 3, max_value_ms: int = 3600000):
+        self.histogram = LatencyHistogram(significant_digits, max_value_ms)
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.failed_requests = 0
+        self.total_bytes = 0
+
+    def record(self, result: RequestResult):
+        """Add one request result"""
+        self.histogram.record(result.response_time)
+        self.total_requests += 1
+        self.total_bytes += result.size
+        if result.success:
+            self.successful_requests += 1
+        else:
+            self.failed_requests += 1
+
+    def merge(self, other: "MetricsAccumulator"):
+        """Add the counters and samples of another accumulator"""
+        self.histogram.merge(other.histogram)
+        self.total_requests += other.total_requests
+        self.successful_requests += other.successful_requests
+        self.failed_requests += other.failed_requests
+        self.total_bytes += other.total_bytes
+
+    def copy(self) -> "MetricsAccumulator":
+        accumulator = MetricsAccumulator.__new__(MetricsAccumulator)
+        accumulator.__dict__.update(self.__dict__)
+        accumulator.histogram = self.histogram.copy()
+        return accumulator
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_requests": self.total_requests,
+            "successful_requests": self.successful_requests,
+            "failed_requests": self.failed_requests,
+            "total_bytes": self.total_bytes,
+            "histogram": self.histogram.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MetricsAccumulator":
+        accumulator = cls()
+        accumulator.histogram = LatencyHistogram.from_dict(data["histogram"])
+        accumulator.total_requests = data["total_requests"]
+        accumulator.successful_requests = data["successful_requests"]
+        accumulator.failed_requests = data["failed_requests"]
+        accumulator.total_bytes = data["total_bytes"]
+        return accumulator
+
+    def fill_metrics(self, metrics: TestMetrics, duration: float) -> TestMetrics:
+        """Write counts, latency percentiles and rates into a TestMetrics"""
+        metrics.total_requests = self.total_requests
+        metrics.successful_requests = self.successful_requests
+        metrics.failed_requests = self.failed_requests
+        metrics.total_bytes = self.total_bytes
+        
+        histogram = self.histogram
+        if histogram.total_count:
+            metrics.min_response_time = histogram.min
+            metrics.max_response_time = histogram.max
+            metrics.avg_response_time = histogram.mean
+            metrics.p50_response_time = histogram.value_at_percentile(50)
+            metrics.p95_response_time = histogram.value_at_percentile(95)
+            metrics.p99_response_time = histogram.value_at_percentile(99)
+        
+        if duration > 0:
+            metrics.rps = self.total_requests / duration
+        if self.total_requests:
+            metrics.error_rate = self.failed_requests / self.total_requests * 100
+        return metrics
+
+# ===============================================================================
+# ERROR CLASSIFICATION
+# ===============================================================================
+
+class ConnectTimeoutError(asyncio.TimeoutError):
+    """No connection could be established within the connect timeout"""
+
+class ResponseTimeoutError(asyncio.TimeoutError):
+    """A request was sent but its response did not arrive in time"""
+
+class ProtocolViolationError(ConnectionError):
+    """The server sent something that is not valid HTTP"""
+
+# Fixed error taxonomy; the ids are stored in the raw result log (one byte)
+ERROR_CLASSES = {
+    0: "none",
+    1: "transport",
+    2: "connect_timeout",
+    3: "read_timeout",
+    4: "timeout",
+    5: "reset",
+    6: "refused",
+    7: "dns",
+    8: "tls",
+    9: "protocol",
+    10: "http_4xx",
+    11: "http_5xx",
+    12: "http_other",
+}
+ERROR_CLASS_IDS = {name: class_id for class_id, name in ERROR_CLASSES.items()}
+
+# aiohttp >= 3.10 tells connect and read timeouts apart
+AIOHTTP_CONNECT_TIMEOUT = getattr(aiohttp, "ConnectionTimeoutError", ())
+
+def classify_exception(error: BaseException) -> str:
+    """Map a request exception to its error class without formatting it"""
+    if isinstance(error, (ConnectTimeoutError, AIOHTTP_CONNECT_TIMEOUT)):
+        return "connect_timeout"
+    if isinstance(error, (ResponseTimeoutError, aiohttp.ServerTimeoutError)):
+        return "read_timeout"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, (ssl.SSLError, aiohttp.ClientSSLError)):
+        return "tls"
+    if isinstance(error, aiohttp.ClientConnectorError):
+        error = error.os_error
+    if isinstance(error, socket.gaierror):
+        return "dns"
+    if isinstance(error, ConnectionRefusedError):
+        return "refused"
+    if isinstance(error, (ConnectionResetError, BrokenPipeError, aiohttp.ServerDisconnectedError)):
+        return "reset"
+    if isinstance(error, (ProtocolViolationError, aiohttp.ClientPayloadError, aiohttp.ClientResponseError)):
+        return "protocol"
+    return "transport"
+
+def error_class_id(result: RequestResult) -> int:
+    """Taxonomy id of a request result (0 for successes)"""
+    if result.success:
+        return 0
+    if result.error:
+        return ERROR_CLASS_IDS.get(result.error, 1)
+    if 400 <= result.status_code < 500:
+        return 10
+    if 500 <= result.status_code < 600:
+        return 11
+    return 12
+
+# ===============================================================================
+# RAW RESULT LOG
+# ===============================================================================
+
+class RawResultSink:
+    """Buffered writer streaming every request result as a fixed-width binary record
+
+    Records are packed into an in-memory batch on the event loop and handed
+    to a single background thread for the actual write, so disk I/O never
+    blocks request generation. The layout must stay in sync with RAW_DTYPE in
+    analyze-raw-results.py.
+    """
+
+    RECORD = struct.Struct("<dIIHHBB2x")
+    FIELDS = ["timestamp", "latency_us", "size", "status", "endpoint", "flags", "error_class"]
+    ERROR_CLASSES = ERROR_CLASSES
+    FLAG_SUCCESS = 1
+
+    def __init__(self, path: Path, batch_records: int = 8192, max_pending_batches: int = 64, append: bool = False):
+        self.path = path
+        self.file = open(path, "ab" if append else "wb")
+        self.batch_bytes = batch_records * self.RECORD.size
+        self.max_pending_batches = max_pending_batches
+        self.buffer = bytearray()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="raw-sink")
+        self.pending: Deque = deque()
+        self.records = 0
+
+    def write(self, result: RequestResult, endpoint_index: int):
+        """Append one result to the current batch"""
+        self.buffer += self.RECORD.pack(
+            result.timestamp,
+            min(int(result.response_time * 1000), 0xFFFFFFFF),
+            min(result.size, 0xFFFFFFFF),
+            result.status_code,
+            endpoint_index,
+            self.FLAG_SUCCESS if result.success else 0,
+            error_class_id(result)
+        )
+        self.records += 1
+        if len(self.buffer) >= self.batch_bytes:
+            self.flush()
+
+    def flush(self):
+        """Hand the current batch to the writer thread"""
+        if not self.buffer:
+            return
+        batch = bytes(self.buffer)
+        self.buffer.clear()
+        self.pending.append(self.executor.submit(self.file.write, batch))
+        
+        # Bound memory if the disk falls behind: wait for the oldest batch
+        while self.pending and (self.pending[0].done() or len(self.pending) > self.max_pending_batches):
+            self.pending.popleft().result()
+
+    def close(self):
+        """Write outstanding batches and close the file"""
+        self.flush()
+        self.executor.shutdown(wait=True)
+        for future in self.pending:
+            future.result()
+        self.pending.clear()
+        self.file.close()
+
+# ===============================================================================
+# GENERATOR MONITORING
+# ===============================================================================
+
+class GeneratorMonitor:
+    """Self-monitoring of a load generator process
+
+    Samples event loop lag (how late a short sleep wakes up), process CPU
+    and in-flight requests, and times garbage collection pauses through
+    gc.callbacks. Client backends record connection pool waits into
+    pool_wait. A generator whose loop lags or whose CPU is pegged cannot
+    keep its schedule, so its achieved RPS says nothing about the target.
+    """
+
+    SAMPLE_INTERVAL = 0.05  # seconds between loop lag samples
+    CPU_SATURATION_PERCENT = 90.0
+
+    def __init__(self, lag_threshold_ms: float, in_flight: Callable[[], int]):
+        self.lag_threshold_ms = lag_threshold_ms
+        self.in_flight = in_flight
+        self.loop_lag = LatencyHistogram()
+        self.pool_wait = LatencyHistogram()
+        self.gc_pauses = LatencyHistogram()
+        self.gc_started = 0.0
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.max_cpu_percent = 0.0
+        self.in_flight_max = 0
+        self.in_flight_total = 0
+        self.samples = 0
+        self.processes = 1
+        self.saturation_warnings = 0
+        # Current window, reported by interval snapshots
+        self.window_lag_max = 0.0
+        self.window_cpu_start = 0.0
+        self.window_wall_start = 0.0
+        self.logger = logging.getLogger(__name__)
+
+    def gc_callback(self, phase: str, info: Dict):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        elif self.gc_started:
+            self.gc_pauses.record((time.perf_counter() - self.gc_started) * 1000)
+            self.gc_started = 0.0
+
+    async def run(self):
+        """Sample until cancelled"""
+        loop = asyncio.get_running_loop()
+        cpu_start = self.window_cpu_start = time.process_time()
+        wall_start = self.window_wall_start = time.perf_counter()
+        gc.callbacks.append(self.gc_callback)
+        try:
+            while True:
+                expected = loop.time() + self.SAMPLE_INTERVAL
+                await asyncio.sleep(self.SAMPLE_INTERVAL)
+                lag_ms = max(0.0, loop.time() - expected) * 1000
+                self.loop_lag.record(lag_ms)
+                self.window_lag_max = max(self.window_lag_max, lag_ms)
+
+                in_flight = self.in_flight()
+                self.in_flight_max = max(self.in_flight_max, in_flight)
+                self.in_flight_total += in_flight
+                self.samples += 1
+        finally:
+            gc.callbacks.remove(self.gc_callback)
+            self.cpu_seconds += time.process_time() - cpu_start
+            self.wall_seconds += time.perf_counter() - wall_start
+
+    def close_window(self) -> Dict:
+        """Generator figures since the previous call (one snapshot interval)"""
+        cpu, wall = time.process_time(), time.perf_counter()
+        elapsed = wall - self.window_wall_start
+        cpu_percent = (cpu - self.window_cpu_start) / elapsed * 100 if elapsed > 0 else 0.0
+        window = {"loop_lag_max_ms": self.window_lag_max, "cpu_percent": cpu_percent}
+        self.max_cpu_percent = max(self.max_cpu_percent, cpu_percent)
+
+        if self.window_lag_max > self.lag_threshold_ms:
+            self.saturation_warnings += 1
+            if self.saturation_warnings == 1 or self.saturation_warnings % 10 == 0:
+                self.logger.warning(f"Generator saturated: event loop lagged {self.window_lag_max:.1f}ms "
+                                    f"(threshold {self.lag_threshold_ms:g}ms, CPU {cpu_percent:.0f}%)")
+        self.window_lag_max = 0.0
+        self.window_cpu_start, self.window_wall_start = cpu, wall
+        return window
+
+    def to_dict(self) -> Dict:
+        return export_value(self.snapshot())
+
+    def snapshot(self) -> Dict:
+        """to_dict() with the histograms left as copies (see state_json)"""
+        return {
+            "loop_lag": self.loop_lag.copy(),
+            "pool_wait": self.pool_wait.copy(),
+            "gc_pauses": self.gc_pauses.copy(),
+            "cpu_seconds": self.cpu_seconds,
+            "wall_seconds": self.wall_seconds,
+            "max_cpu_percent": self.max_cpu_percent,
+            "in_flight_max": self.in_flight_max,
+            "in_flight_total": self.in_flight_total,
+            "samples": self.samples,
+            "processes": self.processes,
+            "saturation_warnings": self.saturation_warnings,
+        }
+
+    def merge(self, data: Dict):
+        """Add the state of another generator process (to_dict output)"""
+        if not self.samples:
+            self.processes = 0  # an aggregating monitor never ran itself
+        self.loop_lag.merge(LatencyHistogram.from_dict(data["loop_lag"]))
+        self.pool_wait.merge(LatencyHistogram.from_dict(data["pool_wait"]))
+        self.gc_pauses.merge(LatencyHistogram.from_dict(data["gc_pauses"]))
+        self.cpu_seconds += data["cpu_seconds"]
+        self.wall_seconds += data["wall_seconds"]
+        self.max_cpu_percent = max(self.max_cpu_percent, data["max_cpu_percent"])
+        self.in_flight_max += data["in_flight_max"]
+        self.in_flight_total += data["in_flight_total"]
+        self.samples += data["samples"]
+        self.processes += data["processes"]
+        self.saturation_warnings += data["saturation_warnings"]
+
+    def report(self, total_requests: int) -> Dict:
+        """Summary of generator health with the saturation verdict"""
+        cpu_percent = self.cpu_seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0
+        lag_p99 = self.loop_lag.value_at_percentile(99)
+
+        reasons = []
+        if lag_p99 > self.lag_threshold_ms:
+            reasons.append(f"p99 event loop lag {lag_p99:.1f}ms > {self.lag_threshold_ms:g}ms")
+        if cpu_percent >= self.CPU_SATURATION_PERCENT:
+            reasons.append(f"mean CPU {cpu_percent:.0f}% of a core per process")
+
+        return {
+            "saturated": bool(reasons),
+            "saturation_reasons": reasons,
+            "processes": self.processes,
+            "cpu_percent": cpu_percent,  # per process (100% = one core)
+            "max_cpu_percent": self.max_cpu_percent,
+            "loop_lag_p50_ms": self.loop_lag.value_at_percentile(50),
+            "loop_lag_p99_ms": lag_p99,
+            "loop_lag_max_ms": self.loop_lag.max,
+            "in_flight_mean": self.in_flight_total / self.samples * self.processes if self.samples else 0.0,
+            "in_flight_max": self.in_flight_max,
+            "pool_waits": self.pool_wait.total_count,
+            "pool_wait_ratio": self.pool_wait.total_count / total_requests if total_requests else 0.0,
+            "pool_wait_mean_ms": self.pool_wait.mean,
+            "pool_wait_p99_ms": self.pool_wait.value_at_percentile(99),
+            "gc_collections": self.gc_pauses.total_count,
+            "gc_pause_total_ms": self.gc_pauses.total_sum / 1000,
+            "gc_pause_max_ms": self.gc_pauses.max,
+        }
+
+# ===============================================================================
+# LOAD PROFILES
+# ===============================================================================
+
+def parse_duration(duration_str: str) -> int:
+    """Parse duration string to seconds"""
+    if duration_str.endswith('s'):
+        return int(duration_str[:-1])
+    elif duration_str.endswith('m'):
+        return int(duration_str[:-1]) * 60
+    elif duration_str.endswith('h'):
+        return int(duration_str[:-1]) * 3600
+    else:
+        return int(duration_str)  # Assume seconds
+
+def build_load_profile(spec: str, shape: str = "ramp") -> List[LoadStage]:
+    """Parse a 'DURATION:RPS,DURATION:RPS,...' stage list
+
+    With the ramp shape each stage moves linearly from the previous stage's
+    target (0 for the first stage) to its own target, like k6 stages. With the
+    step shape each stage holds its target for the whole duration.
+    """
+    stages = []
+    previous_rps = 0.0
+    for index, item in enumerate(part.strip() for part in spec.split(",") if part.strip()):
+        try:
+            duration_str, rps_str = item.split(":")
+            duration = parse_duration(duration_str)
+            target_rps = float(rps_str)
+        except ValueError:
+            raise ValueError(f"Invalid stage '{item}', expected DURATION:RPS (e.g. 5m:100000)")
+        if duration <= 0 or target_rps < 0:
+            raise ValueError(f"Invalid stage '{item}', duration must be positive and RPS non-negative")
+        
+        start_rps = previous_rps if shape == "ramp" else target_rps
+        stages.append(LoadStage(
+            name=f"stage-{index + 1}",
+            duration=duration,
+            target_rps=target_rps,
+            start_rps=start_rps
+        ))
+        previous_rps = target_rps
+    
+    if not stages:
+        raise ValueError("Load profile must contain at least one stage")
+    return stages
+
+def build_ramp_profile(target_rps: int, ramp_up: int, steady: int, ramp_down: int) -> List[LoadStage]:
+    """Build a ramp-up / steady-state / ramp-down profile"""
+    stages = []
+    if ramp_up > 0:
+        stages.append(LoadStage("ramp-up", ramp_up, target_rps, 0.0))
+    stages.append(LoadStage("steady", steady, target_rps, target_rps))
+    if ramp_down > 0:
+        stages.append(LoadStage("ramp-down", ramp_down, 0.0, target_rps))
+    return stages
+
+# ===============================================================================
+# REQUEST GENERATION
+# ===============================================================================
+
+class AliasSampler:
+    """O(1) weighted sampling using Vose's alias method"""
+
+    def __init__(self, weights: List[float]):
+        if not weights or sum(weights) <= 0:
+            raise ValueError("AliasSampler needs at least one positive weight")
+
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [weight * n / total for weight in weights]
+        self.size = n
+        self.probability = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            self.probability[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] += scaled[low] - 1.0
+            (small if scaled[high] < 1.0 else large).append(high)
+
+    def sample(self) -> int:
+        """Draw an index with probability proportional to its weight"""
+        u = random.random() * self.size
+        index = int(u)
+        return index if u - index < self.probability[index] else self.alias[index]
+
+class KeyStats:
+    """Draws from a KeySpace: how many, how many distinct keys, and how skewed
+
+    The TRACKED_RANKS most popular ranks are counted exactly (skew and top
+    keys); distinct keys beyond them are estimated with a HyperLogLog
+    (about 0.8% standard error), so memory does not grow with the key space.
+    """
+
+    TRACKED_RANKS = 10000
+    HLL_PRECISION = 14
+    HLL_VALUE_BITS = 64 - HLL_PRECISION
+    MASK64 = (1 << 64) - 1
+
+    def __init__(self, size: int):
+        self.size = size
+        self.total = 0
+        self.rank_counts: List[int] = [0] * min(size, self.TRACKED_RANKS)
+        self.registers = bytearray(1 << self.HLL_PRECISION)
+
+    def record(self, rank: int):
+        self.total += 1
+        if rank < len(self.rank_counts):
+            self.rank_counts[rank] += 1
+            return
+        # splitmix64 finalizer: ranks are sequential, the sketch needs uniform bits
+        h = (rank * 0x9E3779B97F4A7C15) & self.MASK64
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & self.MASK64
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & self.MASK64
+        h ^= h >> 31
+        index = h >> self.HLL_VALUE_BITS
+        rho = self.HLL_VALUE_BITS + 1 - (h & ((1 << self.HLL_VALUE_BITS) - 1)).bit_length()
+        if rho > self.registers[index]:
+            self.registers[index] = rho
+
+    def distinct(self) -> int:
+        """Distinct keys drawn: exact for the tracked ranks plus the sketch estimate for the rest"""
+        exact = sum(1 for count in self.rank_counts if count)
+        m = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == m:
+            return exact
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -register for register in self.registers)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return exact + min(int(round(estimate)), self.size - len(self.rank_counts))
+
+    def top_share(self, ranks: int) -> Optional[float]:
+        """Fraction of the draws that went to the `ranks` most popular keys (None if not tracked)"""
+        if ranks > len(self.rank_counts) or not self.total:
+            return None
+        return sum(self.rank_counts[:ranks]) / self.total
+
+    def fitted_exponent(self) -> Optional[float]:
+        """Zipf exponent fitted (log-log least squares) to the leading ranks drawn at least 10 times"""
+        points = []
+        for rank, count in enumerate(self.rank_counts[:1000]):
+            if count < 10:
+                break
+            points.append((math.log(rank + 1), math.log(count)))
+        if len(points) < 3:
+            return None
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        variance = sum((x - mean_x) ** 2 for x, _ in points)
+        covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+        return -covariance / variance
+
+    def merge(self, other: "KeyStats"):
+        """Add the draws of another generator over the same key space"""
+        if other.size != self.size:
+            raise ValueError("Cannot merge key statistics of different key spaces")
+        self.total += other.total
+        for rank, count in enumerate(other.rank_counts):
+            if count:
+                self.rank_counts[rank] += count
+        for index, register in enumerate(other.registers):
+            if register > self.registers[index]:
+                self.registers[index] = register
+
+    def copy(self) -> "KeyStats":
+        stats = KeyStats.__new__(KeyStats)
+        stats.size = self.size
+        stats.total = self.total
+        stats.rank_counts = self.rank_counts[:]
+        stats.registers = bytearray(self.registers)
+        return stats
+
+    def to_dict(self) -> Dict:
+        """Serialize to a JSON-friendly dict (sparse rank counts)"""
+        return {
+            "size": self.size,
+            "total": self.total,
+            "rank_counts": [[rank, count] for rank, count in enumerate(self.rank_counts) if count],
+            "registers": self.registers.hex(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KeyStats":
+        """Rebuild statistics serialized with to_dict"""
+        stats = cls(data["size"])
+        stats.total = data["total"]
+        for rank, count in data["rank_counts"]:
+            stats.rank_counts[rank] = count
+        stats.registers = bytearray.fromhex(data["registers"])
+        return stats
+
+class KeySpace:
+    """Key popularity model sampled in O(1): uniform:N, zipf:N:SKEW or hotspot:N:HOT_KEYS:HOT_TRAFFIC
+
+    Keys are drawn by popularity rank (rank 0 is the hottest) and mapped to
+    ids 1..N through a fixed multiplicative permutation, so hot keys are not
+    neighbouring ids. Zipf uses an alias table over the ZIPF_TABLE_SIZE most
+    popular ranks plus a closed-form inverse of the continuous tail, so a key
+    space of millions costs no more to build than one of thousands. hotspot
+    sends HOT_TRAFFIC of the draws (a fraction) to HOT_KEYS of the keys.
+    With names, ids map to names, suffixed with a round number once the
+    names run out (laptop, ..., laptop1, ...).
+    """
+
+    ZIPF_TABLE_SIZE = 65536
+
+    def __init__(self, spec: str, names: Optional[List[str]] = None):
+        self.spec = spec
+        self.names = names
+        kind, _, params = spec.partition(":")
+        try:
+            values = [float(value) for value in params.split(":")] if params else []
+            self.size = int(values[0]) if values else 0
+            if self.size >= 1:
+                if kind == "uniform" and len(values) == 1:
+                    size = self.size
+                    self.sample_rank = lambda: int(random.random() * size)
+                elif kind == "zipf" and len(values) == 2 and values[1] > 0:
+                    self.sample_rank = self.build_zipf(values[1])
+                elif kind == "hotspot" and len(values) == 3 and 0 < values[1] <= 1 and 0 <= values[2] <= 1:
+                    self.sample_rank = self.build_hotspot(values[1], values[2])
+        except ValueError:
+            pass
+        if not hasattr(self, "sample_rank"):
+            raise ValueError(f"Invalid key space: {spec!r} (uniform:N, zipf:N:SKEW or hotspot:N:HOT_KEYS:HOT_TRAFFIC)")
+
+        self.multiplier = max(1, int(self.size * 0.6180339887)) | 1
+        while math.gcd(self.multiplier, self.size) != 1:
+            self.multiplier += 1
+        self.stats = KeyStats(self.size)
+
+    def build_zipf(self, skew: float) -> Callable[[], int]:
+        """Rank sampler with P(rank r) proportional to 1 / (r + 1) ** skew"""
+        size = self.size
+        head = min(size, self.ZIPF_TABLE_SIZE)
+        weights = [(rank + 1) ** -skew for rank in range(head)]
+        low, high = head + 0.5, size + 0.5  # the tail approximates ranks head+1..size by a continuous density
+        if size > head:
+            if skew == 1:
+                weights.append(math.log(high / low))
+            else:
+                weights.append((high ** (1 - skew) - low ** (1 - skew)) / (1 - skew))
+        sampler = AliasSampler(weights)
+        low_power, high_power = low ** (1 - skew), high ** (1 - skew)
+
+        def sample() -> int:
+            rank = sampler.sample()
+            if rank < head:
+                return rank
+            u = random.random()
+            if skew == 1:
+                x = low * (high / low) ** u
+            else:
+                x = (low_power + u * (high_power - low_power)) ** (1 / (1 - skew))
+            return min(size - 1, int(x + 0.5) - 1)
+
+        return sample
+
+    def build_hotspot(self, hot_keys: float, hot_traffic: float) -> Callable[[], int]:
+        """Rank sampler sending hot_traffic of the draws uniformly to the first hot_keys of the ranks"""
+        hot = max(1, min(self.size, round(self.size * hot_keys)))
+        cold = self.size - hot
+
+        def sample() -> int:
+            if not cold or random.random() < hot_traffic:
+                return int(random.random() * hot)
+            return hot + int(random.random() * cold)
+
+        return sample
+
+    def key(self, rank: int) -> str:
+        """Key of a popularity rank"""
+        index = rank * self.multiplier % self.size
+        if self.names is None:
+            return str(index + 1)
+        round_number, position = divmod(index, len(self.names))
+        return f"{self.names[position]}{round_number}" if round_number else self.names[position]
+
+    def sample(self, record: bool = True) -> str:
+        """Draw a key; record=False for keys that may never be sent (fallback values)"""
+        rank = self.sample_rank()
+        if record:
+            self.stats.record(rank)
+        return self.key(rank)
+
+    def report(self) -> Dict:
+        """Cardinality and skew of the recorded draws"""
+        stats = self.stats
+        distinct = stats.distinct()
+        top = sorted((rank for rank, count in enumerate(stats.rank_counts) if count),
+                     key=lambda rank: stats.rank_counts[rank], reverse=True)[:10]
+        return {
+            "spec": self.spec,
+            "key_space": self.size,
+            "draws": stats.total,
+            "distinct_keys": distinct,
+            "coverage": distinct / self.size,
+            "top_key_share": stats.top_share(1),
+            "top_10_share": stats.top_share(10),
+            "top_1_percent_share": stats.top_share(max(1, self.size // 100)),
+            "fitted_zipf_exponent": stats.fitted_exponent(),
+            "top_keys": [{"key": self.key(rank), "draws": stats.rank_counts[rank]} for rank in top],
+        }
+
+KEY_MARKER = "{key}"  # placeholder in request variants replaced by a key drawn per request
+KEY_MARKER_BYTES = KEY_MARKER.encode()
+
+@dataclass
+class RequestTemplate:
+    """Prebuilt request variants for one endpoint
+
+    Each variant is a ready-to-send (url, headers, body) tuple; picking one
+    costs a single random draw and allocates nothing. With a key space, the
+    variants carry KEY_MARKER and every request fills in a freshly drawn key.
+    """
+    name: str
+    method: str
+    variants: List[Tuple[str, Dict[str, str], Optional[bytes]]]
+    keys: Optional[KeySpace] = None
+
+    def pick_index(self) -> int:
+        return int(random.random() * len(self.variants))
+
+    def render(self, variant: int, key: str) -> Tuple[str, Dict[str, str], Optional[bytes]]:
+        """A variant with KEY_MARKER replaced by key"""
+        url, headers, body = self.variants[variant]
+        if body is not None:
+            body = body.replace(KEY_MARKER_BYTES, key.encode())
+        return url.replace(KEY_MARKER, key), headers, body
+
+# ===============================================================================
+# CLIENT BACKENDS
+# ===============================================================================
+
+DEFAULT_HEADERS = {
+    "User-Agent": "HighPerformanceLoadTester/1.0",
+    "Accept": "application/json, text/html, */*",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Cache-Control": "no-cache"
+}
+
+def create_ssl_context(config: TestConfig) -> ssl.SSLContext:
+    """TLS context honouring enable_ssl_verify"""
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    if not config.enable_ssl_verify:
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+class ClientBackend(ABC):
+    """HTTP client used by the load tester to send prepared request variants
+
+    prepare() is called once per RequestTemplate before the test starts, so
+    backends can pre-encode whatever they need; send() must raise on
+    transport errors and return (status code, response body size). fetch()
+    sends an ad-hoc request and returns the body too (user journeys).
+    """
+    
+    def __init__(self, config: TestConfig):
+        self.config = config
+        self.pool_wait = LatencyHistogram()  # time spent waiting for a free connection
+    
+    async def start(self):
+        """Open pools and sessions (called on the event loop running the test)"""
+    
+    def prepare(self, template: RequestTemplate):
+        """Precompute per-variant state for a request template"""
+    
+    @abstractmethod
+    async def send(self, template: RequestTemplate, variant: int, key: Optional[str] = None) -> Tuple[int, int]:
+        """Send one request variant (with key in place of KEY_MARKER) and return (status, size)"""
+    
+    @abstractmethod
+    async def fetch(self, method: str, url: str, headers: Dict[str, str],
+                    body: Optional[bytes]) -> Tuple[int, bytes]:
+        """Send a request built at run time and return (status, body)"""
+    
+    @abstractmethod
+    async def close(self):
+        """Release connections"""
+    
+    def connection_stats(self) -> List[Dict]:
+        """Per-connection usage figures for the report (multiplexing backends)"""
+        return []
+
+class AiohttpBackend(ClientBackend):
+    """Full-featured client on aiohttp.ClientSession"""
+    
+    def __init__(self, config: TestConfig):
+        super().__init__(config)
+        self.session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self):
+        # Connection configuration
+        connector = aiohttp.TCPConnector(
+            limit=self.config.max_connections,
+            limit_per_host=self.config.max_connections_per_host,
+            keepalive_timeout=self.config.keepalive_timeout,
+            enable_cleanup_closed=True,
+            ssl=create_ssl_context(self.config)
+        )
+        
+        # Timeout configuration
+        timeout = aiohttp.ClientTimeout(
+            total=self.config.timeout,
+            connect=10,
+            sock_read=self.config.timeout
+        )
+        
+        # Time spent queued for a connection once the connector limit is reached
+        async def on_queued_start(session, context, params):
+            context.queued_at = time.perf_counter()
+        
+        async def on_queued_end(session, context, params):
+            self.pool_wait.record((time.perf_counter() - context.queued_at) * 1000)
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=DEFAULT_HEADERS,
+            trace_configs=[trace_config]
+        )
+    
+    async def send(self, template: RequestTemplate, variant: int, key: Optional[str] = None) -> Tuple[int, int]:
+        url, headers, body = template.variants[variant] if key is None else template.render(variant, key)
+        async with self.session.request(template.method, url, headers=headers, data=body) as response:
+            content = await response.read()
+            return response.status, len(content)
+    
+    async def fetch(self, method: str, url: str, headers: Dict[str, str],
+                    body: Optional[bytes]) -> Tuple[int, bytes]:
+        async with self.session.request(method, url, headers=headers, data=body) as response:
+            return response.status, await response.read()
+    
+    async def close(self):
+        await self.session.close()
+
+class HTTP1Connection(asyncio.Protocol):
+    """Keep-alive HTTP/1.1 connection matching pipelined responses to requests in order
+
+    Only the status line and the framing headers (Content-Length,
+    Transfer-Encoding, Connection) are looked at; bodies are counted and
+    discarded as they arrive unless the request asked to capture them.
+    """
+    
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.transport: Optional[asyncio.Transport] = None
+        self.closed = False
+        self.waiters: Deque[Tuple[asyncio.Future, bool, float, bool]] = deque()  # (future, no body, deadline, capture)
+        self.buffer = bytearray()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # State of the response being parsed
+        self.status = 0
+        self.remaining = 0  # body bytes still expected (-1: chunked)
+        self.size = 0
+        self.body: Optional[bytearray] = None  # captured body
+        self.close_after = False
+    
+    def connection_made(self, transport):
+        self.transport = transport
+    
+    def connection_lost(self, exc):
+        self.closed = True
+        self.fail(exc or ConnectionResetError("Connection closed by server"))
+    
+    def fail(self, exc: Exception):
+        """Fail every outstanding request on this connection"""
+        self.closed = True
+        while self.waiters:
+            future = self.waiters.popleft()[0]
+            if not future.done():
+                future.set_exception(exc)
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if self.transport:
+            self.transport.close()
+    
+    def request(self, data: bytes, no_body: bool, capture: bool = False) -> asyncio.Future:
+        """Write an encoded request; the future resolves to (status, size, body or None)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.waiters.append((future, no_body, loop.time() + self.timeout, capture))
+        self.transport.write(data)
+        if self.timer is None:
+            self.timer = loop.call_later(self.timeout, self.check_timeout)
+        return future
+    
+    def check_timeout(self):
+        self.timer = None
+        if not self.waiters:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = self.waiters[0][2]
+        if deadline <= loop.time():
+            self.fail(ResponseTimeoutError(f"No response within {self.timeout}s"))
+        else:
+            self.timer = loop.call_at(deadline, self.check_timeout)
+    
+    def data_received(self, data: bytes):
+        self.buffer += data
+        try:
+            while self.waiters and self.parse_response():
+                pass
+        except ValueError as e:
+            self.fail(ProtocolViolationError(f"Malformed HTTP response: {e}"))
+            return
+        if not self.waiters and self.timer:
+            self.timer.cancel()
+            self.timer = None
+    
+    def parse_response(self) -> bool:
+        """Consume buffered bytes; True once a whole response has been read"""
+        buffer = self.buffer
+        if not self.status:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                return False
+            head = bytes(buffer[:end]).lower()
+            del buffer[:end + 4]
+            self.status = int(head[9:12])  # "http/1.1 200 ok"
+            self.size = 0
+            self.body = bytearray() if self.waiters[0][3] else None
+            self.close_after = b"\r\nconnection: close" in head
+            
+            if self.waiters[0][1] or self.status < 200 or self.status in (204, 304):
+                self.remaining = 0
+            elif b"\r\ntransfer-encoding: chunked" in head:
+                self.remaining = -1
+            else:
+                position = head.find(b"\r\ncontent-length:")
+                if position < 0:
+                    raise ValueError("no Content-Length on a keep-alive response")
+                line_end = head.find(b"\r\n", position + 2)
+                self.remaining = int(head[position + 17:line_end if line_end >= 0 else len(head)])
+        
+        if self.remaining < 0:
+            if not self.consume_chunks():
+                return False
+        elif self.remaining:
+            taken = min(self.remaining, len(buffer))
+            if self.body is not None:
+                self.body += buffer[:taken]
+            del buffer[:taken]
+            self.size += taken
+            self.remaining -= taken
+            if self.remaining:
+                return False
+        
+        future = self.waiters.popleft()[0]
+        if not future.done():
+            future.set_result((self.status, self.size, bytes(self.body) if self.body is not None else None))
+        self.status = 0
+        if self.close_after:
+            self.fail(ConnectionResetError("Server closed the connection"))
+        return True
+    
+    def consume_chunks(self) -> bool:
+        """Skip over chunked body data; True once the last chunk has been read"""
+        buffer = self.buffer
+        while True:
+            line_end = buffer.find(b"\r\n")
+            if line_end < 0:
+                return False
+            chunk_size = int(bytes(buffer[:line_end]).split(b";")[0], 16)
+            if chunk_size == 0:
+                # Last chunk: skip the (usually empty) trailer section
+                trailer_end = buffer.find(b"\r\n\r\n", line_end)
+                if buffer[line_end + 2:line_end + 4] == b"\r\n":
+                    del buffer[:line_end + 4]
+                    return True
+                if trailer_end < 0:
+                    return False
+                del buffer[:trailer_end + 4]
+                return True
+            if len(buffer) < line_end + 2 + chunk_size + 2:
+                return False
+            if self.body is not None:
+                self.body += buffer[line_end + 2:line_end + 2 + chunk_size]
+            del buffer[:line_end + 2 + chunk_size + 2]
+            self.size += chunk_size
+
+class PooledBackend(ClientBackend):
+    """Fixed pool of protocol connections to the target host, shared through a slot queue
+
+    The queue holds every connection index slots_per_connection times, so
+    requests spread over all connections before any one of them carries
+    more than one; connections are dialled lazily and redialled once closed.
+    """
+    
+    def __init__(self, config: TestConfig, pool_size: int, slots_per_connection: int):
+        super().__init__(config)
+        parts = urlsplit(config.target_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.authority = parts.netloc
+        self.ssl_context = self.create_ssl_context() if parts.scheme == "https" else None
+        self.pool_size = max(1, pool_size)
+        self.slots_per_connection = max(1, slots_per_connection)
+        self.connections: List[Optional[asyncio.Protocol]] = [None] * self.pool_size
+        self.connecting: Dict[int, asyncio.Future] = {}
+        self.slots: Optional[asyncio.Queue] = None
+    
+    def create_ssl_context(self) -> ssl.SSLContext:
+        return create_ssl_context(self.config)
+    
+    @abstractmethod
+    def create_protocol(self) -> asyncio.Protocol:
+        """Protocol instance for a new connection"""
+    
+    def check_connection(self, transport: asyncio.Transport):
+        """Reject a freshly dialled connection (e.g. failed ALPN) by raising"""
+    
+    async def start(self):
+        self.slots = asyncio.Queue()
+        for _ in range(self.slots_per_connection):
+            for index in range(self.pool_size):
+                self.slots.put_nowait(index)
+    
+    async def acquire_slot(self) -> int:
+        """Take a connection slot, timing the wait when none is free"""
+        slots = self.slots
+        if not slots.empty():
+            return slots.get_nowait()
+        started = time.perf_counter()
+        index = await slots.get()
+        self.pool_wait.record((time.perf_counter() - started) * 1000)
+        return index
+    
+    async def connection(self, index: int):
+        """Connection for a pool slot, (re)connecting it when needed"""
+        connection = self.connections[index]
+        if connection is not None and not connection.closed:
+            return connection
+        
+        # Several slots share a connection; only one of them dials
+        pending = self.connecting.get(index)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
+        loop = asyncio.get_running_loop()
+        pending = self.connecting[index] = loop.create_future()
+        try:
+            try:
+                transport, connection = await asyncio.wait_for(
+                    loop.create_connection(self.create_protocol, self.host, self.port, ssl=self.ssl_context),
+                    timeout=10
+                )
+            except asyncio.TimeoutError:
+                raise ConnectTimeoutError(f"Could not connect to {self.host}:{self.port} within 10s") from None
+            try:
+                self.check_connection(transport)
+            except Exception:
+                transport.close()
+                raise
+            self.connections[index] = connection
+            pending.set_result(connection)
+            return connection
+        except BaseException as e:
+            pending.set_exception(e)
+            pending.exception()  # retrieved here when no other slot is waiting
+            raise
+        finally:
+            del self.connecting[index]
+    
+    async def close(self):
+        for connection in self.connections:
+            if connection is not None and connection.transport:
+                connection.transport.close()
+
+class RawHTTPBackend(PooledBackend):
+    """Lean HTTP/1.1 client writing pre-encoded requests on asyncio protocols
+
+    Requests are encoded to bytes once in prepare(); with a pipeline depth
+    above one, several requests are pipelined on a keep-alive connection.
+    """
+    
+    def __init__(self, config: TestConfig):
+        super().__init__(
+            config,
+            pool_size=min(config.max_connections, config.max_connections_per_host),
+            slots_per_connection=config.pipeline_depth
+        )
+        self.encoded: Dict[str, List[bytes]] = {}
+    
+    def create_protocol(self) -> asyncio.Protocol:
+        return HTTP1Connection(self.config.timeout)
+    
+    def encode(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]) -> bytes:
+        """Serialize one request to wire format"""
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.authority}"]
+        lines += [f"{name}: {value}" for name, value in {**DEFAULT_HEADERS, **headers}.items()]
+        if body is not None or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body or b'')}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+    
+    def prepare(self, template: RequestTemplate):
+        self.encoded[template.name] = [
+            self.encode(template.method, url, headers, body) for url, headers, body in template.variants
+        ]
+    
+    async def send(self, template: RequestTemplate, variant: int, key: Optional[str] = None) -> Tuple[int, int]:
+        request = self.encoded[template.name][variant]
+        if key is not None:
+            if template.variants[variant][2] is None:
+                request = request.replace(KEY_MARKER_BYTES, key.encode())
+            else:  # Content-Length depends on the key
+                request = self.encode(template.method, *template.render(variant, key))
+        index = await self.acquire_slot()
+        try:
+            connection = await self.connection(index)
+            status, size, _ = await connection.request(request, template.method == "HEAD")
+            return status, size
+        finally:
+            self.slots.put_nowait(index)
+    
+    async def fetch(self, method: str, url: str, headers: Dict[str, str],
+                    body: Optional[bytes]) -> Tuple[int, bytes]:
+        index = await self.acquire_slot()
+        try:
+            connection = await self.connection(index)
+            status, _, content = await connection.request(
+                self.encode(method, url, headers, body), method == "HEAD", capture=True
+            )
+            return status, content
+        finally:
+            self.slots.put_nowait(index)
+
+class HTTP2Connection(asyncio.Protocol):
+    """Multiplexed HTTP/2 connection (h2 state machine on an asyncio protocol)
+
+    Tracks time-weighted stream occupancy so the report can show how well
+    each connection is utilized and whether some of them lag behind
+    (head-of-line blocking below the HTTP/2 layer).
+    """
+    
+    WINDOW_SIZE = 16 * 1024 * 1024  # receive window, large enough to never throttle responses
+    
+    def __init__(self, timeout: float, max_streams: int):
+        self.timeout = timeout
+        self.max_streams = max_streams
+        self.h2 = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=True, header_encoding=None)
+        )
+        self.transport: Optional[asyncio.Transport] = None
+        self.closed = False
+        self.streams: Dict[int, list] = {}  # stream id -> [future, status, size, deadline, start, captured body]
+        self.pending_bodies: Dict[int, bytes] = {}  # request data waiting for send window
+        self.capacity_waiters: Deque[asyncio.Future] = deque()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # Utilization statistics
+        self.opened_at = 0.0
+        self.closed_at = 0.0
+        self.last_change = 0.0
+        self.stream_seconds = 0.0
+        self.peak_streams = 0
+        self.requests = 0
+        self.response_time_total = 0.0
+    
+    @property
+    def stream_limit(self) -> int:
+        return max(1, min(self.max_streams, self.h2.remote_settings.max_concurrent_streams))
+    
+    def connection_made(self, transport):
+        self.transport = transport
+        self.opened_at = self.last_change = asyncio.get_running_loop().time()
+        self.h2.initiate_connection()
+        self.h2.update_settings({
+            h2.settings.SettingCodes.ENABLE_PUSH: 0,
+            h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: self.WINDOW_SIZE,
+        })
+        self.h2.increment_flow_control_window(self.WINDOW_SIZE - self.h2.inbound_flow_control_window)
+        transport.write(self.h2.data_to_send())
+    
+    def connection_lost(self, exc):
+        self.fail(exc or ConnectionResetError("Connection closed by server"))
+    
+    def fail(self, exc: Exception):
+        """Fail every open stream and waiter on this connection"""
+        if not self.closed:
+            self.track()
+            self.closed = True
+            self.closed_at = asyncio.get_running_loop().time()
+        for stream in self.streams.values():
+            if not stream[0].done():
+                stream[0].set_exception(exc)
+        self.streams.clear()
+        self.pending_bodies.clear()
+        while self.capacity_waiters:
+            waiter = self.capacity_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if self.transport:
+            self.transport.close()
+    
+    def track(self):
+        """Accumulate stream-seconds up to now"""
+        now = asyncio.get_running_loop().time()
+        self.stream_seconds += len(self.streams) * (now - self.last_change)
+        self.last_change = now
+    
+    async def request(self, headers: List[Tuple[bytes, bytes]], body: Optional[bytes],
+                      capture: bool = False) -> Tuple[int, int, Optional[bytes]]:
+        """Open a stream for one request; resolves to (status, size, body or None)"""
+        loop = asyncio.get_running_loop()
+        while not self.closed and len(self.streams) >= self.stream_limit:
+            waiter = loop.create_future()
+            self.capacity_waiters.append(waiter)
+            await waiter
+        if self.closed:
+            raise ConnectionResetError("Connection closed")
+        
+        stream_id = self.h2.get_next_available_stream_id()
+        self.h2.send_headers(stream_id, headers, end_stream=body is None)
+        
+        future = loop.create_future()
+        now = loop.time()
+        self.track()
+        self.streams[stream_id] = [future, 0, 0, now + self.timeout, now, bytearray() if capture else None]
+        self.peak_streams = max(self.peak_streams, len(self.streams))
+        if body is not None:
+            self.send_body(stream_id, body)
+        self.transport.write(self.h2.data_to_send())
+        
+        if self.timer is None:
+            self.timer = loop.call_later(self.timeout, self.check_timeout)
+        return await future
+    
+    def send_body(self, stream_id: int, data: bytes):
+        """Send request data within the flow control window, parking the rest"""
+        while True:
+            window = min(self.h2.local_flow_control_window(stream_id), self.h2.max_outbound_frame_size)
+            if len(data) <= window:
+                self.h2.send_data(stream_id, data, end_stream=True)
+                self.pending_bodies.pop(stream_id, None)
+                return
+            if window <= 0:
+                self.pending_bodies[stream_id] = data
+                return
+            self.h2.send_data(stream_id, data[:window])
+            data = data[window:]
+    
+    def finish(self, stream_id: int, exc: Optional[Exception] = None):
+        """Complete a stream and hand its slot to a waiting request"""
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            return
+        self.track()
+        del self.streams[stream_id]
+        self.pending_bodies.pop(stream_id, None)
+        
+        future = stream[0]
+        if not future.done():
+            if exc is None:
+                self.requests += 1
+                self.response_time_total += self.last_change - stream[4]
+                future.set_result((stream[1], stream[2], bytes(stream[5]) if stream[5] is not None else None))
+            else:
+                future.set_exception(exc)
+        
+        while self.capacity_waiters:
+            waiter = self.capacity_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+    
+    def data_received(self, data: bytes):
+        try:
+            events = self.h2.receive_data(data)
+        except h2.exceptions.ProtocolError as e:
+            self.fail(ProtocolViolationError(f"HTTP/2 protocol error: {e}"))
+            return
+        
+        for event in events:
+            if isinstance(event, h2.events.ResponseReceived):
+                stream = self.streams.get(event.stream_id)
+                if stream is not None:
+                    for name, value in event.headers:
+                        if name == b":status":
+                            stream[1] = int(value)
+                            break
+            elif isinstance(event, h2.events.DataReceived):
+                self.h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                stream = self.streams.get(event.stream_id)
+                if stream is not None:
+                    stream[2] += len(event.data)
+                    if stream[5] is not None:
+                        stream[5] += event.data
+            elif isinstance(event, h2.events.StreamEnded):
+                self.finish(event.stream_id)
+            elif isinstance(event, h2.events.StreamReset):
+                self.finish(event.stream_id, ConnectionResetError(f"Stream reset by server (error code {event.error_code})"))
+            elif isinstance(event, h2.events.WindowUpdated):
+                for stream_id, body in list(self.pending_bodies.items()):
+                    self.send_body(stream_id, body)
+            elif isinstance(event, h2.events.RemoteSettingsChanged):
+                # A raised stream limit frees capacity for waiting requests
+                for _ in range(max(0, self.stream_limit - len(self.streams))):
+                    if not self.capacity_waiters:
+                        break
+                    waiter = self.capacity_waiters.popleft()
+                    if not waiter.done():
+                        waiter.set_result(None)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.write(self.h2.data_to_send())
+                self.fail(ConnectionResetError(f"Connection closed by server (GOAWAY, error code {event.error_code})"))
+                return
+        
+        outgoing = self.h2.data_to_send()
+        if outgoing:
+            self.transport.write(outgoing)
+    
+    def check_timeout(self):
+        self.timer = None
+        if self.closed or not self.streams:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Deadlines grow with stream ids, so the expired streams come first
+        expired = []
+        for stream_id, stream in self.streams.items():
+            if stream[3] > now:
+                break
+            expired.append(stream_id)
+        for stream_id in expired:
+            self.h2.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+            self.finish(stream_id, ResponseTimeoutError(f"No response within {self.timeout}s"))
+        self.transport.write(self.h2.data_to_send())
+        if self.streams:
+            self.timer = loop.call_at(next(iter(self.streams.values()))[3], self.check_timeout)
+    
+    def stats(self) -> Dict:
+        """Stream utilization of this connection so far"""
+        if not self.closed:
+            self.track()
+        lifetime = (self.closed_at or self.last_change) - self.opened_at
+        return {
+            "requests": self.requests,
+            "stream_limit": self.stream_limit,
+            "peak_streams": self.peak_streams,
+            "avg_streams": self.stream_seconds / lifetime if lifetime > 0 else 0.0,
+            "utilization": self.stream_seconds / (lifetime * self.stream_limit) if lifetime > 0 else 0.0,
+            "avg_response_time": self.response_time_total / self.requests * 1000 if self.requests else 0.0,
+            "lifetime": lifetime,
+        }
+
+class H2Backend(PooledBackend):
+    """HTTP/2 client multiplexing requests over a few connections
+
+    Speaks h2 over TLS (negotiated with ALPN) for https targets and h2c with
+    prior knowledge for http targets.
+    """
+    
+    # Connection-specific headers are not allowed in HTTP/2
+    EXCLUDED_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade", "host"}
+    
+    def __init__(self, config: TestConfig):
+        if h2 is None:
+            raise RuntimeError("--client h2 requires the 'h2' package (pip install h2)")
+        super().__init__(config, pool_size=config.h2_connections, slots_per_connection=config.h2_max_streams)
+        self.header_lists: Dict[str, List[List[Tuple[bytes, bytes]]]] = {}
+        self.all_connections: List[HTTP2Connection] = []
+    
+    def create_ssl_context(self) -> ssl.SSLContext:
+        ssl_context = super().create_ssl_context()
+        ssl_context.set_alpn_protocols(["h2"])
+        return ssl_context
+    
+    def create_protocol(self) -> asyncio.Protocol:
+        connection = HTTP2Connection(self.config.timeout, self.config.h2_max_streams)
+        self.all_connections.append(connection)
+        return connection
+    
+    def check_connection(self, transport: asyncio.Transport):
+        ssl_object = transport.get_extra_info("ssl_object")
+        if ssl_object is not None and ssl_object.selected_alpn_protocol() != "h2":
+            raise ProtocolViolationError(f"{self.authority} did not negotiate HTTP/2 (ALPN)")
+    
+    def header_list(self, method: str, url: str, headers: Dict[str, str],
+                    body: Optional[bytes]) -> List[Tuple[bytes, bytes]]:
+        """HTTP/2 header block (pseudo-headers first) for one request"""
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        header_list = [
+            (b":method", method.encode()),
+            (b":scheme", self.scheme.encode()),
+            (b":authority", self.authority.encode()),
+            (b":path", target.encode()),
+        ]
+        header_list += [
+            (name.lower().encode(), value.encode())
+            for name, value in {**DEFAULT_HEADERS, **headers}.items()
+            if name.lower() not in self.EXCLUDED_HEADERS
+        ]
+        if body is not None:
+            header_list.append((b"content-length", str(len(body)).encode()))
+        return header_list
+    
+    def prepare(self, template: RequestTemplate):
+        self.header_lists[template.name] = [
+            self.header_list(template.method, url, headers, body) for url, headers, body in template.variants
+        ]
+    
+    async def send(self, template: RequestTemplate, variant: int, key: Optional[str] = None) -> Tuple[int, int]:
+        header_list, body = self.header_lists[template.name][variant], template.variants[variant][2]
+        if key is not None:
+            url, headers, body = template.render(variant, key)
+            header_list = self.header_list(template.method, url, headers, body)
+        index = await self.acquire_slot()
+        try:
+            connection = await self.connection(index)
+            status, size, _ = await connection.request(header_list, body)
+            return status, size
+        finally:
+            self.slots.put_nowait(index)
+    
+    async def fetch(self, method: str, url: str, headers: Dict[str, str],
+                    body: Optional[bytes]) -> Tuple[int, bytes]:
+        index = await self.acquire_slot()
+        try:
+            connection = await self.connection(index)
+            status, _, content = await connection.request(
+                self.header_list(method, url, headers, body), body, capture=True
+            )
+            return status, content
+        finally:
+            self.slots.put_nowait(index)
+    
+    def connection_stats(self) -> List[Dict]:
+        return [{"connection": i, **connection.stats()} for i, connection in enumerate(self.all_connections)]
+
+CLIENT_BACKENDS = {
+    "aiohttp": AiohttpBackend,
+    "raw": RawHTTPBackend,
+    "h2": H2Backend,
+}
+
+# ===============================================================================
+# USER JOURNEYS
+# ===============================================================================
+
+def parse_think_time(spec: str) -> Callable[[], float]:
+    """Build a think time sampler: constant:S, uniform:A-B, exponential:MEAN or lognormal:MEDIAN:SIGMA"""
+    kind, _, params = spec.partition(":")
+    try:
+        if not params:
+            seconds = float(kind)  # a bare number is a constant pause
+            return lambda: seconds
+        if kind == "constant":
+            seconds = float(params)
+            return lambda: seconds
+        if kind == "uniform":
+            low, high = (float(value) for value in params.split("-"))
+            return lambda: random.uniform(low, high)
+        if kind == "exponential":
+            rate = 1.0 / float(params)
+            return lambda: random.expovariate(rate)
+        if kind == "lognormal":
+            median, sigma = (float(value) for value in params.split(":"))
+            mu = math.log(median)
+            return lambda: random.lognormvariate(mu, sigma)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid think time: {spec!r}")
+
+def extract_value(document, path: str):
+    """Follow a dotted path such as "items[*].id" ([*] picks a random element); None when absent"""
+    value = document
+    for token in re.findall(r"\[\*\]|\[\d+\]|[^.\[\]]+", path):
+        if token == "[*]":
+            if not isinstance(value, list) or not value:
+                return None
+            value = random.choice(value)
+        elif token.startswith("["):
+            index = int(token[1:-1])
+            if not isinstance(value, list) or index >= len(value):
+                return None
+            value = value[index]
+        elif isinstance(value, dict) and token in value:
+            value = value[token]
+        else:
+            return None
+    return value
+
+def render_template(value, variables: Dict):
+    """Substitute {variable} placeholders in strings, lists and dicts
+
+    A string that is exactly one placeholder takes the variable's own value,
+    so numbers stay numbers in rendered JSON bodies.
+    """
+    if isinstance(value, str):
+        if value.startswith("{") and value.endswith("}") and value[1:-1] in variables:
+            return variables[value[1:-1]]
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {key: render_template(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render_template(item, variables) for item in value]
+    return value
 
 @dataclass
-class RequestResult:
-    """Individual request result"""
-    timestamp: float
-    url: str
+class JourneyStep:
+    """One request of a journey; endpoint names the metrics bucket it reports to"""
+    endpoint: str
     method: str
-    status_code: int
-    response_time: float
-    success: bool
-    error: Optional[str] = None
-    size: int = 0
+    path: str  # relative to target_url, may hold {variable} placeholders
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[object] = None  # JSON template
+    extract: Dict[str, List[str]] = field(default_factory=dict)  # variable -> candidate response paths
+    think: Optional[Callable[[], float]] = None  # overrides the test's think time
 
 @dataclass
-class TestMetrics:
-    """Aggregated test metrics"""
-    total_requests: int = 0
-    successful_requests: int = 0
-    failed_requests: int = 0
-    total_bytes: int = 0
-    min_response_time: float = float('inf')
-    max_response_time: float = 0.0
-    avg_response_time: float = 0.0
-    p50_response_time: float = 0.0
-    p95_response_time: float = 0.0
-    p99_response_time: float = 0.0
-    rps: float = 0.0
-    error_rate: float = 0.0
-    start_time: float = 0.0
-    end_time: float = 0.0
+class Journey:
+    """A virtual-user flow run step by step with think time in between"""
+    name: str
+    weight: float
+    steps: List[JourneyStep]
+
+def build_journeys(definitions: List[Dict], endpoints: List[Dict], base_url: str) -> List[Journey]:
+    """Compile journey definitions, defaulting step method/path from the named endpoint"""
+    known = {endpoint["name"]: endpoint for endpoint in endpoints}
+    journeys = []
+    for definition in definitions:
+        if not definition.get("steps"):
+            raise ValueError(f"Journey {definition['name']!r} has no steps")
+        steps = []
+        for step in definition["steps"]:
+            endpoint = known.get(step["endpoint"])
+            if endpoint is None:
+                raise ValueError(f"Journey {definition['name']!r} uses unknown endpoint {step['endpoint']!r}")
+            extract = {
+                variable: [paths] if isinstance(paths, str) else list(paths)
+                for variable, paths in step.get("extract", {}).items()
+            }
+            steps.append(JourneyStep(
+                endpoint=step["endpoint"],
+                method=step.get("method", endpoint["method"]),
+                path=step.get("path", endpoint["url"][len(base_url):] or "/"),
+                headers=step.get("headers", {}),
+                body=step.get("body"),
+                extract=extract,
+                think=parse_think_time(step["think"]) if "think" in step else None
+            ))
+        journeys.append(Journey(name=definition["name"], weight=definition.get("weight", 1), steps=steps))
+    return journeys
+
+# ===============================================================================
+# TRACE REPLAY
+# ===============================================================================
+
+@dataclass
+class ReplayRecord:
+    """One request of a recorded access log"""
+    timestamp: float  # epoch seconds
+    method: str
+    path: str  # path and query string
+    body_size: int = 0
+
+def parse_log_timestamp(value) -> float:
+    """Epoch seconds from an epoch number or an ISO 8601 time (Envoy's %START_TIME%)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def open_access_log(path: str):
+    """Open an access log as text, gzip-compressed when it ends in .gz"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="")
+    return open(path, newline="")
+
+class AccessLogReader:
+    """Lazily iterates the requests of an Envoy JSON or CSV access log
+
+    Envoy logs are JSON lines in Istio's default format (start_time, method,
+    path, bytes_received); CSV logs need a header with timestamp, method,
+    path and optionally body_size. Lines are read and parsed one at a time,
+    so multi-GB logs replay in constant memory. With several partitions each
+    reader walks the whole file but parses only its own lines (line number
+    modulo partitions), so processes and agents replay disjoint, interleaved
+    slices of the same traffic.
+    """
+
+    def __init__(self, path: str, log_format: str = "auto", partition: int = 0, partitions: int = 1):
+        self.path = path
+        self.log_format = self.detect_format() if log_format == "auto" else log_format
+        self.partition = partition
+        self.partitions = partitions
+        self.records = 0
+        self.skipped = 0  # lines of this partition that could not be parsed
+
+    def detect_format(self, probe_lines: int = 20) -> str:
+        """envoy when one of the first lines is a JSON object (sidecar logs mix in plain text), csv otherwise"""
+        with open_access_log(self.path) as f:
+            for _, line in zip(range(probe_lines), f):
+                if line.lstrip().startswith("{"):
+                    return "envoy"
+        return "csv"
+
+    def parse_envoy(self, line: str) -> ReplayRecord:
+        entry = json.loads(line)
+        return ReplayRecord(
+            timestamp=parse_log_timestamp(entry["start_time"]),
+            method=entry["method"],
+            path=entry["path"],
+            body_size=int(entry.get("bytes_received") or 0)
+        )
+
+    def parse_csv(self, row: Dict) -> ReplayRecord:
+        return ReplayRecord(
+            timestamp=parse_log_timestamp(row["timestamp"]),
+            method=row["method"].upper(),
+            path=row["path"],
+            body_size=int(row.get("body_size") or 0)
+        )
+
+    def lines(self, f) -> Iterator:
+        """Raw entries of the log (JSON text lines or CSV row dicts)"""
+        if self.log_format == "csv":
+            return csv.DictReader(f)
+        return (line for line in f if line.strip())
+
+    def first_timestamp(self) -> Optional[float]:
+        """Timestamp of the first parseable record, the replay origin of every partition"""
+        parse = self.parse_csv if self.log_format == "csv" else self.parse_envoy
+        with open_access_log(self.path) as f:
+            for entry in self.lines(f):
+                try:
+                    return parse(entry).timestamp
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue
+        return None
+
+    def __iter__(self) -> Iterator[ReplayRecord]:
+        parse = self.parse_csv if self.log_format == "csv" else self.parse_envoy
+        with open_access_log(self.path) as f:
+            for line_number, entry in enumerate(self.lines(f)):
+                if line_number % self.partitions != self.partition:
+                    continue
+                try:
+                    record = parse(entry)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    self.skipped += 1
+                    continue
+                if not record.path.startswith("/"):
+                    self.skipped += 1
+                    continue
+                self.records += 1
+                yield record
+
+def build_replay_routes(endpoints: List[Dict], base_url: str) -> List[Tuple[str, "re.Pattern", str]]:
+    """(method, path pattern, endpoint name) for attributing replayed paths to endpoints
+
+    Literal paths are tried before paths with {placeholders}, so
+    /products/featured is not counted as a product detail request.
+    """
+    routes = []
+    for endpoint in endpoints:
+        path = endpoint["url"][len(base_url):] or "/"
+        pattern = re.sub(r"\\{\w+\\}", "[^/]+", re.escape(path))
+        routes.append((path.count("{"), endpoint["method"], re.compile(pattern + "/?"), endpoint["name"]))
+    routes.sort(key=lambda route: route[0])
+    return [(method, pattern, name) for _, method, pattern, name in routes]
+
+REPLAY_BODY_CACHE_SIZE = 1024
+
+_replay_bodies: Dict[int, bytes] = {}
+
+def replay_body(size: int) -> bytes:
+    """A valid JSON body of exactly size bytes (at least 2) standing in for the recorded one"""
+    body = _replay_bodies.get(size)
+    if body is None:
+        if size >= 10:
+            body = b'{"pad":"' + b"x" * (size - 10) + b'"}'
+        else:
+            body = b"{}" + b" " * max(0, size - 2)
+        if len(_replay_bodies) < REPLAY_BODY_CACHE_SIZE:
+            _replay_bodies[size] = body
+    return body
+
+# ===============================================================================
+# CHECKPOINTS
+# ===============================================================================
+
+def _exported_object(value):
+    """JSON-friendly form of an object copied into a state snapshot"""
+    if isinstance(value, RequestResult):
+        return dict(vars(value))  # asdict() deep-copies field by field: 100x slower on these flat records
+    if isinstance(value, (LatencyHistogram, MetricsAccumulator, KeyStats)):
+        return value.to_dict()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+def export_value(value):
+    """Turn a snapshot_state() value into its export_state() form"""
+    if isinstance(value, dict):
+        return {key: export_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [export_value(item) for item in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return _exported_object(value)
+
+def state_json(snapshot: Dict) -> str:
+    """export_state() JSON of a snapshot_state(), converting the copied objects as they are encoded
+
+    Safe to call from a worker thread: a snapshot shares nothing mutable with
+    the running tester.
+    """
+    return json.dumps(snapshot, default=_exported_object)
+
+def write_checkpoint_file(path: Path, config: TestConfig, states: List[str], final: bool = False):
+    """Atomically replace a checkpoint with tester states (export_state() serialized to JSON)
+
+    The file is written next to its destination and renamed over it, so a
+    process killed mid-write leaves the previous checkpoint intact.
+    """
+    header = json.dumps({"version": 1, "written_at": time.time(), "final": final, "config": asdict(config)})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w") as f:
+        f.write(header[:-1] + ', "states": [' + ", ".join(states) + "]}")
+    os.replace(temporary, path)
+
+def load_checkpoint(path: str) -> Dict:
+    """Read a checkpoint file, or the default checkpoint file of an output directory"""
+    checkpoint_path = Path(path)
+    if checkpoint_path.is_dir():
+        checkpoint_path = checkpoint_path / TestConfig.checkpoint_file
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != 1 or not checkpoint.get("states"):
+        raise ValueError(f"{checkpoint_path} is not a load test checkpoint")
+    checkpoint["path"] = str(checkpoint_path)
+    return checkpoint
+
+def checkpoint_span(checkpoint: Dict) -> Tuple[float, float]:
+    """(start, end) wall-clock time covered by the states of a checkpoint"""
+    starts = [state["metrics"]["start_time"] for state in checkpoint["states"] if state["metrics"]["start_time"]]
+    ends = [state["metrics"]["end_time"] for state in checkpoint["states"]]
+    if not starts:
+        return 0.0, 0.0
+    return min(starts), max(ends)
 
 # ===============================================================================
 # LOAD TESTING ENGINE
@@ -79,24 +2060,102 @@ class TestMetrics:
 class HighPerformanceLoadTester:
     """High-performance async load testing engine"""
     
+    RATE_UPDATE_INTERVAL = 0.1  # seconds between load profile rate updates
+    BODY_POOL_SIZE = 256  # pre-serialized bodies per randomized POST endpoint
+    PROMETHEUS_BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+    ERROR_SAMPLES_PER_CLASS = 5  # exception types kept with an example message
+    ERROR_SAMPLE_LENGTH = 200
+    ERROR_TIMELINE_BUCKETS = 720  # upper bound on error timeline buckets per run
+    
     def __init__(self, config: TestConfig):
         self.config = config
-        self.results: List[RequestResult] = []
+        self.results: Deque[RequestResult] = deque(maxlen=config.raw_sample_size)
         self.metrics = TestMetrics()
         self.running = False
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.stop_requested = False
+        self.client: ClientBackend = CLIENT_BACKENDS[config.client_backend](config)
+        self.in_flight_tasks = set()
+        self.worker_processes: List[multiprocessing.Process] = []
+        self.agent_reports: List[Dict] = []
+        self.client_connections: List[Dict] = []  # per-connection stats of multiplexing clients
+        self.monitor = GeneratorMonitor(config.loop_lag_threshold_ms, lambda: self.in_flight_requests)
+        self.client.pool_wait = self.monitor.pool_wait
+        
+        # Rate controller state (follows config.stages when a profile is set)
+        self.current_rps = float(config.target_rps)
+        self.current_stage = 0
+        self.stage_ends: List[float] = []
         
         # Setup logging
         self.setup_logging()
         
         # Test scenarios and endpoints
         self.endpoints = self.setup_endpoints()
+        if config.scheduler == "replay":
+            # Replayed paths that match no endpoint are reported under replay_other
+            self.endpoints.append({"url": config.target_url, "method": "GET", "weight": 0,
+                                   "name": "replay_other", "service": "unknown"})
         self.scenarios = self.setup_scenarios()
         
+        # Key popularity models for product ids, user ids and search terms
+        self.key_spaces = {
+            "product": KeySpace(config.product_keys),
+            "user": KeySpace(config.user_keys),
+            "search": KeySpace(config.search_keys, self.scenarios["search_terms"]),
+        }
+        
+        self.endpoint_indexes = {endpoint["name"]: index for index, endpoint in enumerate(self.endpoints)}
+        
+        # Compile endpoints once so the hot path does no string or JSON work
+        self.request_templates = [self.build_request_template(endpoint) for endpoint in self.endpoints]
+        self.endpoint_sampler = AliasSampler([endpoint["weight"] for endpoint in self.endpoints])
+        
+        # User journeys (journey scheduler)
+        self.journeys = build_journeys(config.journeys or self.setup_journeys(), self.endpoints, config.target_url)
+        self.journey_sampler = AliasSampler([journey.weight for journey in self.journeys])
+        self.think_time = parse_think_time(config.think_time)
+        
+        # Trace replay (replay scheduler)
+        self.replay_routes = build_replay_routes(self.endpoints, config.target_url)
+        self.replay_endpoints: Dict[Tuple[str, str], str] = {}  # (method, path) -> endpoint name
+        self.replay_stats = {"records": 0, "skipped": 0, "completed": 0}  # completed: log slices fully replayed
+        
         # Performance tracking
-        self.request_times: List[float] = []
-        self.error_counts: Dict[str, int] = {}
+        self.totals = self.new_accumulator()
+        self.stage_metrics = [self.new_accumulator() for _ in config.stages]
+        self.endpoint_metrics = {endpoint["name"]: self.new_accumulator() for endpoint in self.endpoints}
+        self.journey_metrics = {journey.name: self.new_accumulator() for journey in self.journeys}
+        self.journey_failures: Dict[str, Dict[str, int]] = {journey.name: {} for journey in self.journeys}
+        self.correlation_misses: Dict[str, int] = {}
+        self.error_counts: Dict[str, int] = {}  # error class or http_<code> -> count
+        self.error_samples: Dict[str, Dict[str, str]] = {}  # error class -> exception type -> message
+        self.error_timeline: Dict[int, List] = {}  # bucket -> [requests, failed, {error key: count}]
+        self.interval_errors: Dict[str, int] = {}
+        
+        # Live metrics (interval snapshots and Prometheus endpoint)
+        self.in_flight_requests = 0
+        self.interval_metrics = self.new_accumulator()
+        self.last_snapshot: Dict = {}
+        self.last_snapshot_time = 0.0
+        self.timeseries_handle = None
+        self.raw_sink: Optional[RawResultSink] = None
+        
+        # Checkpoints (worker processes hand theirs to the parent instead of writing a file)
+        self.checkpoint_sink: Callable[[str], None] = lambda state: self.write_checkpoint([state])
+        self.checkpoint_sources: List[Dict] = []  # checkpoints merged into this tester
         
+    def stop(self):
+        """Stop the test (and any worker processes) so partial results get reported"""
+        self.running = False
+        self.stop_requested = True
+        for worker in self.worker_processes:
+            if worker.is_alive() and worker.pid:
+                os.kill(worker.pid, signal.SIGTERM)
+    
+    def new_accumulator(self) -> MetricsAccumulator:
+        """Create a metrics accumulator with the configured histogram precision"""
+        return MetricsAccumulator(self.config.latency_precision, self.config.max_latency_ms)
+    
     def setup_logging(self):
         """Setup logging configuration"""
         log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -115,32 +2174,35 @@ class HighPerformanceLoadTester:
         base_url = self.config.target_url
         api_url = f"{base_url}/api/v1"
         
+        # Weight 0 endpoints need values from earlier responses, so only journeys use them
         return [
             # Homepage and static content (15%)
-            {"url": base_url, "method": "GET", "weight": 15, "name": "homepage"},
+            {"url": base_url, "method": "GET", "weight": 15, "name": "homepage", "service": "frontend"},
             
             # Product catalog browsing (35%)
-            {"url": f"{api_url}/products", "method": "GET", "weight": 20, "name": "products_list"},
-            {"url": f"{api_url}/products/categories", "method": "GET", "weight": 8, "name": "categories"},
-            {"url": f"{api_url}/products/featured", "method": "GET", "weight": 7, "name": "featured_products"},
+            {"url": f"{api_url}/products", "method": "GET", "weight": 12, "name": "products_list", "service": "product-service"},
+            {"url": f"{api_url}/products/categories", "method": "GET", "weight": 8, "name": "categories", "service": "product-service"},
+            {"url": f"{api_url}/products/featured", "method": "GET", "weight": 7, "name": "featured_products", "service": "product-service"},
+            {"url": f"{api_url}/products/{{product_id}}", "method": "GET", "weight": 8, "name": "product_detail", "service": "product-service"},
             
             # Product search (25%)
-            {"url": f"{api_url}/products/search", "method": "GET", "weight": 15, "name": "product_search"},
-            {"url": f"{api_url}/products/search/suggestions", "method": "GET", "weight": 10, "name": "search_suggestions"},
+            {"url": f"{api_url}/products/search", "method": "GET", "weight": 15, "name": "product_search", "service": "product-service"},
+            {"url": f"{api_url}/products/search/suggestions", "method": "GET", "weight": 10, "name": "search_suggestions", "service": "product-service"},
             
             # User operations (15%)
-            {"url": f"{api_url}/auth/login", "method": "POST", "weight": 8, "name": "user_login"},
-            {"url": f"{api_url}/users/profile", "method": "GET", "weight": 4, "name": "user_profile"},
-            {"url": f"{api_url}/users/preferences", "method": "GET", "weight": 3, "name": "user_preferences"},
+            {"url": f"{api_url}/auth/login", "method": "POST", "weight": 8, "name": "user_login", "service": "user-service"},
+            {"url": f"{api_url}/users/profile", "method": "GET", "weight": 4, "name": "user_profile", "service": "user-service"},
+            {"url": f"{api_url}/users/preferences", "method": "GET", "weight": 3, "name": "user_preferences", "service": "user-service"},
             
             # Order operations (7%)
-            {"url": f"{api_url}/orders", "method": "GET", "weight": 4, "name": "orders_list"},
-            {"url": f"{api_url}/orders", "method": "POST", "weight": 2, "name": "create_order"},
-            {"url": f"{api_url}/cart", "method": "GET", "weight": 1, "name": "cart_view"},
+            {"url": f"{api_url}/orders", "method": "GET", "weight": 4, "name": "orders_list", "service": "orders"},
+            {"url": f"{api_url}/orders", "method": "POST", "weight": 2, "name": "create_order", "service": "orders"},
+            {"url": f"{api_url}/cart", "method": "GET", "weight": 1, "name": "cart_view", "service": "orders"},
+            {"url": f"{api_url}/cart/items", "method": "POST", "weight": 0, "name": "cart_add", "service": "orders"},
             
             # Payment operations (3%)
-            {"url": f"{api_url}/payments/methods", "method": "GET", "weight": 2, "name": "payment_methods"},
-            {"url": f"{api_url}/payments/process", "method": "POST", "weight": 1, "name": "process_payment"},
+            {"url": f"{api_url}/payments/methods", "method": "GET", "weight": 2, "name": "payment_methods", "service": "payments"},
+            {"url": f"{api_url}/payments/process", "method": "POST", "weight": 1, "name": "process_payment", "service": "payments"},
         ]
     
     def setup_scenarios(self) -> Dict:
@@ -163,287 +2225,1125 @@ class HighPerformanceLoadTester:
             ]
         }
     
-    async def create_session(self) -> aiohttp.ClientSession:
-        """Create optimized aiohttp session"""
-        # SSL context
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        if not self.config.enable_ssl_verify:
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
+    def setup_journeys(self) -> List[Dict]:
+        """Setup the built-in virtual-user flows of the journey scheduler"""
+        auth = {"Authorization": "Bearer {token}"}
+        product_ids = ["items[*].id", "products[*].id", "data[*].id", "[*].id"]
+        login = {
+            "endpoint": "user_login",
+            "body": {"email": "{email}", "password": "{password}"},
+            "extract": {"token": ["access_token", "token", "data.token"]},
+        }
         
-        # Connection configuration
-        connector = aiohttp.TCPConnector(
-            limit=self.config.max_connections,
-            limit_per_host=self.config.max_connections_per_host,
-            keepalive_timeout=self.config.keepalive_timeout,
-            enable_cleanup_closed=True,
-            ssl=ssl_context
-        )
+        return [
+            # Browse, pick a product and buy it (20%)
+            {"name": "browse_and_buy", "weight": 20, "steps": [
+                {"endpoint": "homepage"},
+                {"endpoint": "products_list", "path": "/api/v1/products?category={category}&page=1&limit=20",
+                 "extract": {"product_id": product_ids}},
+                {"endpoint": "product_detail", "extract": {"price": ["price", "data.price"]}},
+                login,
+                {"endpoint": "cart_add", "headers": auth,
+                 "body": {"productId": "{product_id}", "quantity": "{quantity}"}},
+                {"endpoint": "create_order", "headers": auth,
+                 "body": {
+                     "items": [{"productId": "{product_id}", "quantity": "{quantity}", "price": "{price}"}],
+                     "shippingAddress": {"street": "123 Test Street", "city": "Test City", "state": "TS", "zipCode": "12345"}
+                 },
+                 "extract": {"order_id": ["id", "orderId", "order_id", "data.id"]}},
+                {"endpoint": "payment_methods", "headers": auth},
+                {"endpoint": "process_payment", "headers": auth,
+                 "body": {"orderId": "{order_id}", "amount": "{price}", "currency": "USD",
+                          "method": "credit_card", "cardToken": "{card_token}"}},
+            ]},
+            
+            # Search and look at results (55%)
+            {"name": "search_and_browse", "weight": 55, "steps": [
+                {"endpoint": "homepage"},
+                {"endpoint": "search_suggestions", "path": "/api/v1/products/search/suggestions?q={search_term}&limit=20"},
+                {"endpoint": "product_search", "path": "/api/v1/products/search?q={search_term}&limit=20",
+                 "extract": {"product_id": product_ids}},
+                {"endpoint": "product_detail"},
+                {"endpoint": "featured_products"},
+            ]},
+            
+            # Signed-in customer checking their account (25%)
+            {"name": "returning_customer", "weight": 25, "steps": [
+                login,
+                {"endpoint": "user_profile", "headers": auth},
+                {"endpoint": "orders_list", "headers": auth},
+                {"endpoint": "cart_view", "headers": auth},
+            ]},
+        ]
+    
+    def select_endpoint(self) -> RequestTemplate:
+        """Select endpoint based on weight distribution"""
+        return self.request_templates[self.endpoint_sampler.sample()]
+    
+    def endpoint_key_space(self, endpoint: Dict) -> Optional[KeySpace]:
+        """Key space drawn from on every request to an endpoint, if any"""
+        if "search" in endpoint["name"]:
+            return self.key_spaces["search"]
+        elif endpoint["name"] == "product_detail" or ("order" in endpoint["name"] and endpoint["method"] == "POST"):
+            return self.key_spaces["product"]
+        elif "login" in endpoint["name"]:
+            return self.key_spaces["user"]
+        return None
+    
+    def build_url_variants(self, endpoint: Dict) -> List[str]:
+        """Build every query-string variant of a GET endpoint"""
+        url = endpoint["url"]
         
-        # Timeout configuration
-        timeout = aiohttp.ClientTimeout(
-            total=self.config.timeout,
-            connect=10,
-            sock_read=self.config.timeout
-        )
+        if "search" in endpoint["name"]:
+            return [f"{url}?q={KEY_MARKER}&limit=20"]
+        elif endpoint["name"] == "product_detail":
+            return [url.replace("{product_id}", f"product_{KEY_MARKER}")]
+        elif "products" in endpoint["name"] and endpoint["name"] != "product_search":
+            return [f"{url}?page={page}&limit=20" for page in range(1, 11)]
+        elif "categories" in endpoint["name"]:
+            return [f"{url}?category={category}" for category in self.scenarios["categories"]]
+        return [url]
+    
+    def build_request_body(self, endpoint: Dict) -> Optional[Dict]:
+        """Generate one randomized request body for a POST endpoint"""
+        if "login" in endpoint["name"]:
+            return {
+                "email": f"user{KEY_MARKER}@example.com",
+                "password": "password123"
+            }
+        elif "order" in endpoint["name"]:
+            return {
+                "items": [
+                    {
+                        "productId": f"product_{KEY_MARKER}",
+                        "quantity": random.randint(1, 3),
+                        "price": random.randint(10, 500)
+                    }
+                ],
+                "shippingAddress": {
+                    "street": "123 Test Street",
+                    "city": "Test City",
+                    "state": "TS",
+                    "zipCode": "12345"
+                }
+            }
+        elif "payment" in endpoint["name"]:
+            return {
+                "amount": random.randint(10, 500),
+                "currency": "USD",
+                "method": "credit_card",
+                "cardToken": f"tok_test_{random.randint(100000, 999999)}"
+            }
+        return None
+    
+    def build_request_template(self, endpoint: Dict) -> RequestTemplate:
+        """Precompute URLs, serialized bodies and header dicts for an endpoint"""
+        if endpoint["method"] == "GET":
+            urls = self.build_url_variants(endpoint)
+            bodies: List[Optional[bytes]] = [None]
+            extra_headers = {}
+        else:
+            urls = [endpoint["url"]]
+            bodies = []
+            for _ in range(self.BODY_POOL_SIZE):
+                data = self.build_request_body(endpoint)
+                bodies.append(json.dumps(data).encode() if data is not None else None)
+            extra_headers = {"Content-Type": "application/json"}
+        
+        header_variants = [
+            {**extra_headers, "User-Agent": user_agent}
+            for user_agent in self.scenarios["user_agents"]
+        ]
+        
+        variants = [
+            (url, headers, body)
+            for url in urls
+            for body in bodies
+            for headers in header_variants
+        ]
+        return RequestTemplate(name=endpoint["name"], method=endpoint["method"], variants=variants,
+                               keys=self.endpoint_key_space(endpoint))
+    
+    async def make_request(self, template: RequestTemplate, scheduled_time: Optional[float] = None) -> RequestResult:
+        """Make individual HTTP request
+
+        When scheduled_time is given, latency is measured from the intended
+        send time rather than the actual one, so queueing delay inside the
+        generator is not hidden (coordinated omission).
+        """
+        start_time = scheduled_time if scheduled_time is not None else time.time()
+        variant = template.pick_index()
+        url = template.variants[variant][0]
+        key = None
+        if template.keys is not None:
+            key = template.keys.sample()
+            url = url.replace(KEY_MARKER, key)
+        
+        self.in_flight_requests += 1
+        try:
+            status, size = await self.client.send(template, variant, key)
+            end_time = time.time()
+            
+            return RequestResult(
+                timestamp=start_time,
+                url=url,
+                method=template.method,
+                status_code=status,
+                response_time=(end_time - start_time) * 1000,  # Convert to ms
+                success=200 <= status < 400,
+                size=size,
+                endpoint=template.name
+            )
+        
+        except Exception as e:
+            end_time = time.time()
+            
+            return RequestResult(
+                timestamp=start_time,
+                url=url,
+                method=template.method,
+                status_code=0,
+                response_time=(end_time - start_time) * 1000,
+                success=False,
+                error=self.classify_error(e),
+                endpoint=template.name
+            )
         
-        # Session headers
-        headers = {
-            "User-Agent": "HighPerformanceLoadTester/1.0",
-            "Accept": "application/json, text/html, */*",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Cache-Control": "no-cache"
+        finally:
+            self.in_flight_requests -= 1
+    
+    def classify_error(self, error: Exception) -> str:
+        """Classify a request exception, keeping one message per exception type as a sample
+
+        Only the first exception of each type is formatted, so a failure
+        storm costs a few isinstance checks per request.
+        """
+        error_class = classify_exception(error)
+        samples = self.error_samples.setdefault(error_class, {})
+        error_type = type(error).__name__
+        if error_type not in samples and len(samples) < self.ERROR_SAMPLES_PER_CLASS:
+            samples[error_type] = str(error)[:self.ERROR_SAMPLE_LENGTH]
+        return error_class
+    
+    def error_key(self, result: RequestResult) -> str:
+        """Bounded counter key of a failed result: its error class or http_<status>"""
+        return result.error or f"http_{result.status_code}"
+    
+    def new_session_variables(self, user_index: int) -> Dict:
+        """Variables of a fresh virtual-user session
+
+        Values normally taken from responses (product, price, token, order)
+        start as plausible fallbacks, so a journey keeps going when an
+        extraction misses; misses are counted in correlation_misses.
+        """
+        user_id = self.key_spaces["user"].sample()
+        return {
+            "user_index": user_index,
+            "user_id": user_id,
+            "email": f"user{user_id}@example.com",
+            "password": "password123",
+            "user_agent": random.choice(self.scenarios["user_agents"]),
+            "search_term": self.key_spaces["search"].sample(),
+            "category": random.choice(self.scenarios["categories"]),
+            "quantity": random.randint(1, 3),
+            "card_token": f"tok_test_{random.randint(100000, 999999)}",
+            "product_id": f"product_{self.key_spaces['product'].sample(record=False)}",
+            "price": random.randint(10, 500),
+            "token": f"anonymous-{user_id}",
+            "order_id": f"order_{random.randint(1, 1000000)}",
         }
+    
+    async def make_step_request(self, step: JourneyStep, variables: Dict) -> Tuple[RequestResult, Optional[bytes]]:
+        """Render and send one journey step, returning its result and response body"""
+        start_time = time.time()
+        url = self.config.target_url
         
-        return aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers=headers
+        self.in_flight_requests += 1
+        try:
+            url += render_template(step.path, variables)
+            headers = {"User-Agent": variables["user_agent"], **render_template(step.headers, variables)}
+            body = None
+            if step.body is not None:
+                body = json.dumps(render_template(step.body, variables)).encode()
+                headers["Content-Type"] = "application/json"
+            
+            status, content = await self.client.fetch(step.method, url, headers, body)
+            end_time = time.time()
+            
+            return RequestResult(
+                timestamp=start_time,
+                url=url,
+                method=step.method,
+                status_code=status,
+                response_time=(end_time - start_time) * 1000,  # Convert to ms
+                success=200 <= status < 400,
+                size=len(content),
+                endpoint=step.endpoint
+            ), content
+        
+        except Exception as e:
+            end_time = time.time()
+            
+            return RequestResult(
+                timestamp=start_time,
+                url=url,
+                method=step.method,
+                status_code=0,
+                response_time=(end_time - start_time) * 1000,
+                success=False,
+                error=self.classify_error(e),
+                endpoint=step.endpoint
+            ), None
+        
+        finally:
+            self.in_flight_requests -= 1
+    
+    def extract_variables(self, step: JourneyStep, content: Optional[bytes], variables: Dict):
+        """Copy values named by the step's extract paths from a JSON response"""
+        try:
+            document = json.loads(content) if content else None
+        except ValueError:
+            document = None
+        
+        for variable, paths in step.extract.items():
+            for path in paths:
+                value = extract_value(document, path) if document is not None else None
+                if value is not None:
+                    variables[variable] = value
+                    break
+            else:
+                key = f"{step.endpoint}.{variable}"
+                self.correlation_misses[key] = self.correlation_misses.get(key, 0) + 1
+    
+    async def run_journey(self, journey: Journey, variables: Dict):
+        """Run a journey's steps in order; a failed step abandons the journey
+
+        The journey latency is the sum of its step latencies, i.e. the time
+        the user spent waiting on the system, excluding think time.
+        """
+        start_time = time.time()
+        latency = 0.0
+        size = 0
+        result = None
+        
+        for index, step in enumerate(journey.steps):
+            if index:
+                await asyncio.sleep((journey.steps[index - 1].think or self.think_time)())
+                if not self.running:
+                    return  # the test ended mid-journey: neither completed nor failed
+            
+            result, content = await self.make_step_request(step, variables)
+            self.record_result(result)
+            latency += result.response_time
+            size += result.size
+            
+            if not result.success:
+                failures = self.journey_failures[journey.name]
+                failures[step.endpoint] = failures.get(step.endpoint, 0) + 1
+                break
+            if step.extract:
+                self.extract_variables(step, content, variables)
+        
+        self.journey_metrics[journey.name].record(RequestResult(
+            timestamp=start_time,
+            url=journey.name,
+            method="JOURNEY",
+            status_code=result.status_code,
+            response_time=latency,
+            success=result.success,
+            size=size,
+            endpoint=journey.name
+        ))
+    
+    async def journey_user(self, user_index: int, users: int):
+        """Virtual user running one journey after another"""
+        while self.running:
+            # Follow the load profile by activating its share of the users
+            active_users = math.ceil(users * self.current_rps / self.config.target_rps)
+            if user_index >= active_users:
+                await asyncio.sleep(self.RATE_UPDATE_INTERVAL)
+                continue
+            
+            journey = self.journeys[self.journey_sampler.sample()]
+            await self.run_journey(journey, self.new_session_variables(user_index))
+            await asyncio.sleep((journey.steps[-1].think or self.think_time)())
+    
+    async def worker(self, worker_id: int, worker_share: float):
+        """Worker coroutine for generating load"""
+        self.logger.info(f"Worker {worker_id} started - Target RPS: {self.current_rps * worker_share:.2f}")
+        
+        last_request_time = time.time()
+        
+        while self.running:
+            try:
+                # Follow the rate controller (idle while the profile is at 0 RPS)
+                requests_per_second = self.current_rps * worker_share
+                if requests_per_second <= 0:
+                    await asyncio.sleep(self.RATE_UPDATE_INTERVAL)
+                    last_request_time = time.time()
+                    continue
+                request_interval = 1.0 / requests_per_second
+                
+                # Rate limiting
+                current_time = time.time()
+                time_since_last = current_time - last_request_time
+                
+                if time_since_last < request_interval:
+                    # Sleep in short slices so load profile rate changes apply promptly
+                    await asyncio.sleep(min(request_interval - time_since_last, self.RATE_UPDATE_INTERVAL))
+                    continue
+                
+                # Select and execute request
+                template = self.select_endpoint()
+                result = await self.make_request(template)
+                
+                # Store result
+                self.record_result(result)
+                
+                last_request_time = time.time()
+                
+            except Exception as e:
+                self.logger.error(f"Worker {worker_id} error: {e}")
+                await asyncio.sleep(0.1)  # Brief pause on error
+    
+    async def issue_request(self, scheduled_time: float):
+        """Send one open-loop request and record it against its intended time"""
+        template = self.select_endpoint()
+        result = await self.make_request(template, scheduled_time)
+        self.record_result(result)
+    
+    async def open_loop_scheduler(self):
+        """Issue requests at intended times regardless of earlier completions"""
+        self.logger.info(
+            f"Open-loop scheduler started - {self.config.arrival_process} arrivals at {self.current_rps:.2f} RPS"
         )
+        
+        poisson = self.config.arrival_process == "poisson"
+        late_threshold = self.config.late_threshold_ms / 1000.0
+        max_in_flight = self.config.max_in_flight
+        in_flight = self.in_flight_tasks
+        
+        scheduled_rps = self.current_rps
+        next_time = time.time()
+        if scheduled_rps > 0:
+            next_time += self.config.arrival_phase / scheduled_rps
+        
+        while self.running:
+            now = time.time()
+            requests_per_second = self.current_rps
+            if requests_per_second <= 0:
+                # Profile is idle: check again at the next rate update
+                await asyncio.sleep(self.RATE_UPDATE_INTERVAL)
+                next_time = time.time()
+                scheduled_rps = 0.0
+                continue
+            
+            if next_time > now:
+                # Rescale the pending gap when the load profile changed the rate
+                if scheduled_rps > 0 and requests_per_second != scheduled_rps:
+                    next_time = now + (next_time - now) * scheduled_rps / requests_per_second
+                scheduled_rps = requests_per_second
+                await asyncio.sleep(min(next_time - now, self.RATE_UPDATE_INTERVAL))
+                continue
+            
+            # Dispatch every arrival whose intended time has passed
+            while next_time <= now and self.running:
+                if len(in_flight) >= max_in_flight:
+                    self.metrics.dropped_requests += 1
+                else:
+                    if now - next_time > late_threshold:
+                        self.metrics.late_requests += 1
+                    task = asyncio.create_task(self.issue_request(next_time))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                
+                next_time += random.expovariate(requests_per_second) if poisson else 1.0 / requests_per_second
+            scheduled_rps = requests_per_second
+            
+            # Let in-flight requests progress before the next round
+            await asyncio.sleep(0)
     
-    def select_endpoint(self) -> Dict:
-        """Select endpoint based on weight distribution"""
-        total_weight = sum(endpoint["weight"] for endpoint in self.endpoints)
-        random_value = random.randint(1, total_weight)
+    REPLAY_ENDPOINT_CACHE_SIZE = 65536
+    
+    def replay_endpoint(self, method: str, path: str) -> str:
+        """Endpoint name a replayed request is reported under"""
+        path = path.split("?", 1)[0]
+        key = (method, path)
+        name = self.replay_endpoints.get(key)
+        if name is None:
+            name = "replay_other"
+            for route_method, pattern, route_name in self.replay_routes:
+                if route_method == method and pattern.fullmatch(path):
+                    name = route_name
+                    break
+            # Bounded: high-cardinality paths (product IDs) would grow the cache forever
+            if len(self.replay_endpoints) >= self.REPLAY_ENDPOINT_CACHE_SIZE:
+                self.replay_endpoints.clear()
+            self.replay_endpoints[key] = name
+        return name
+    
+    async def replay_request(self, record: ReplayRecord, scheduled_time: float):
+        """Send one replayed request and record it against its intended time"""
+        url = self.config.target_url + record.path
+        body = replay_body(record.body_size) if record.body_size else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        endpoint = self.replay_endpoint(record.method, record.path)
+        
+        self.in_flight_requests += 1
+        try:
+            status, content = await self.client.fetch(record.method, url, headers, body)
+            result = RequestResult(
+                timestamp=scheduled_time,
+                url=url,
+                method=record.method,
+                status_code=status,
+                response_time=(time.time() - scheduled_time) * 1000,
+                success=200 <= status < 400,
+                size=len(content),
+                endpoint=endpoint
+            )
+        except Exception as e:
+            result = RequestResult(
+                timestamp=scheduled_time,
+                url=url,
+                method=record.method,
+                status_code=0,
+                response_time=(time.time() - scheduled_time) * 1000,
+                success=False,
+                error=self.classify_error(e),
+                endpoint=endpoint
+            )
+        finally:
+            self.in_flight_requests -= 1
+        self.record_result(result)
+    
+    async def replay_scheduler(self):
+        """Replay a recorded access log with its original inter-arrival times
+
+        Records are sent at their recorded offset from the first record,
+        divided by replay_speed, and latency is measured from that intended
+        time like the open scheduler does. When the log runs out, in-flight
+        requests get up to the request timeout to finish and the test ends.
+        """
+        reader = AccessLogReader(self.config.replay_file, self.config.replay_format,
+                                 self.config.replay_partition, self.config.replay_partitions)
+        origin = reader.first_timestamp()
+        if origin is None:
+            self.logger.error(f"No replayable records in {self.config.replay_file}")
+            self.running = False
+            return
+        self.logger.info(f"Replaying {self.config.replay_file} ({reader.log_format} format) "
+                         f"at {self.config.replay_speed:g}x speed")
+        
+        speed = self.config.replay_speed
+        late_threshold = self.config.late_threshold_ms / 1000.0
+        max_in_flight = self.config.max_in_flight
+        in_flight = self.in_flight_tasks
+        start = time.time()
+        latest = origin
+        burst = 0
+        
+        try:
+            for record in reader:
+                # Logs are written at completion, so start times can be slightly out of order
+                latest = max(latest, record.timestamp)
+                scheduled_time = start + (latest - origin) / speed
+                now = time.time()
+                if scheduled_time > now:
+                    await asyncio.sleep(scheduled_time - now)
+                    burst = 0
+                else:
+                    if now - scheduled_time > late_threshold:
+                        self.metrics.late_requests += 1
+                    # Behind schedule: still let in-flight requests progress now and then
+                    burst += 1
+                    if burst >= 256:
+                        await asyncio.sleep(0)
+                        burst = 0
+                if not self.running:
+                    break
+                
+                if len(in_flight) >= max_in_flight:
+                    self.metrics.dropped_requests += 1
+                    continue
+                task = asyncio.create_task(self.replay_request(record, scheduled_time))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            else:
+                self.logger.info(f"Replay log exhausted after {reader.records:,} records")
+                if in_flight:
+                    await asyncio.wait(set(in_flight), timeout=self.config.timeout)
+                self.replay_stats["completed"] = 1
+                self.running = False
+        finally:
+            self.replay_stats["records"] += reader.records
+            self.replay_stats["skipped"] += reader.skipped
+    
+    async def rate_controller(self):
+        """Move the target rate along the load profile stages"""
+        stage_start = self.metrics.start_time
+        for index, stage in enumerate(self.config.stages):
+            self.current_stage = index
+            stage_end = self.stage_ends[index]
+            self.logger.info(
+                f"Stage {stage.name}: {stage.start_rps:,.0f} -> {stage.target_rps:,.0f} RPS over {stage.duration}s"
+            )
+            
+            while self.running:
+                now = time.time()
+                if now >= stage_end:
+                    break
+                progress = (now - stage_start) / stage.duration
+                self.current_rps = stage.start_rps + (stage.target_rps - stage.start_rps) * progress
+                await asyncio.sleep(min(self.RATE_UPDATE_INTERVAL, stage_end - now))
+            
+            stage_start = stage_end
+        
+        self.current_rps = self.config.stages[-1].target_rps
+    
+    def take_snapshot(self) -> Dict:
+        """Close the current interval and return its metrics"""
+        now = time.time()
+        elapsed = now - self.last_snapshot_time
+        interval = self.interval_metrics
+        self.interval_metrics = self.new_accumulator()
+        interval_errors = self.interval_errors
+        self.interval_errors = {}
+        
+        # Error rate over time, in buckets wide enough to stay bounded on long runs
+        bucket = self.error_timeline.setdefault(int(now // self.error_timeline_width()), [0, 0, {}])
+        bucket[0] += interval.total_requests
+        bucket[1] += interval.failed_requests
+        for error_key, count in interval_errors.items():
+            bucket[2][error_key] = bucket[2].get(error_key, 0) + count
+        
+        previous = self.last_snapshot
+        snapshot = {
+            "timestamp": now,
+            "elapsed": now - self.metrics.start_time,
+            "process": self.config.process_index,
+            "stage": self.config.stages[self.current_stage].name if self.config.stages else None,
+            "target_rps": self.current_rps,
+            "achieved_rps": interval.total_requests / elapsed if elapsed > 0 else 0.0,
+            "requests": interval.total_requests,
+            "errors": interval.failed_requests,
+            "error_rate": interval.failed_requests / interval.total_requests * 100 if interval.total_requests else 0.0,
+            "error_classes": interval_errors,
+            "in_flight": self.in_flight_requests,
+            "p50_response_time": interval.histogram.value_at_percentile(50),
+            "p99_response_time": interval.histogram.value_at_percentile(99),
+            "max_response_time": interval.histogram.max,
+            "dropped_requests": self.metrics.dropped_requests - previous.get("total_dropped", 0),
+            "late_requests": self.metrics.late_requests - previous.get("total_late", 0),
+            "total_dropped": self.metrics.dropped_requests,
+            "total_late": self.metrics.late_requests,
+            **self.monitor.close_window(),
+        }
+        
+        self.last_snapshot = snapshot
+        self.last_snapshot_time = now
+        return snapshot
+    
+    def write_snapshot(self):
+        """Append one interval snapshot to the time-series file"""
+        snapshot = self.take_snapshot()
+        if self.timeseries_handle:
+            self.timeseries_handle.write(json.dumps(snapshot) + "\n")
+            self.timeseries_handle.flush()
+    
+    async def snapshot_loop(self):
+        """Emit a metrics snapshot every snapshot_interval seconds"""
+        interval = self.config.snapshot_interval
+        next_time = self.metrics.start_time + interval
+        while self.running:
+            await asyncio.sleep(max(0.0, next_time - time.time()))
+            self.write_snapshot()
+            next_time += interval
+    
+    def merge_checkpoint(self, checkpoint: Dict, time_offset: float = 0.0):
+        """Merge the states of a checkpoint (load_checkpoint output) and list it as a source"""
+        for state in checkpoint["states"]:
+            self.merge_state(state, time_offset)
+        start, end = checkpoint_span(checkpoint)
+        self.checkpoint_sources.append({
+            "path": checkpoint["path"],
+            "written_at": checkpoint["written_at"],
+            "final": checkpoint["final"],
+            "elapsed": end - start,
+        })
+    
+    def checkpoint_snapshot(self) -> Dict:
+        """snapshot_state() of a running test, as of now"""
+        snapshot = self.snapshot_state()
+        snapshot["metrics"]["end_time"] = time.time()
+        return snapshot
+
+    def write_checkpoint_snapshot(self, snapshot: Dict):
+        """Serialize a checkpoint snapshot and hand it to checkpoint_sink (runs in a worker thread)"""
+        self.checkpoint_sink(state_json(snapshot))
+    
+    def write_checkpoint(self, states: Optional[List[str]] = None, final: bool = False):
+        """Write the checkpoint file with the given serialized states (default: this tester's)"""
+        if states is None:
+            states = [json.dumps(self.export_state())]
+        write_checkpoint_file(Path(self.config.output_dir) / self.config.checkpoint_file, self.config, states, final)
+    
+    async def checkpoint_loop(self):
+        """Hand the aggregated state to checkpoint_sink every checkpoint_interval seconds
+
+        Only the copy of the state is taken on the event loop; serializing it
+        (tens of milliseconds for a few histograms) and writing it happen in a
+        worker thread, so checkpoints don't stall the schedule and show up in
+        the measured latencies.
+        """
+        interval = self.config.checkpoint_interval
+        next_time = time.time() + interval
+        loop = asyncio.get_running_loop()
+        while self.running:
+            await asyncio.sleep(max(0.0, next_time - time.time()))
+            if not self.running:
+                break
+            try:
+                await loop.run_in_executor(None, self.write_checkpoint_snapshot, self.checkpoint_snapshot())
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Checkpoint failed: {e}")
+            next_time += interval
+    
+    def render_prometheus_metrics(self) -> str:
+        """Render live generator metrics in the Prometheus text format"""
+        base_labels = f'test_id="{self.config.test_id}",process="{self.config.process_index}"'
+        snapshot = self.last_snapshot
+        lines = [
+            "# HELP loadtest_requests_total Requests completed by the load generator",
+            "# TYPE loadtest_requests_total counter",
+        ]
+        for name, accumulator in self.endpoint_metrics.items():
+            lines.append(f'loadtest_requests_total{{{base_labels},endpoint="{name}",result="success"}} '
+                         f'{accumulator.successful_requests}')
+            lines.append(f'loadtest_requests_total{{{base_labels},endpoint="{name}",result="failure"}} '
+                         f'{accumulator.failed_requests}')
+        
+        lines += [
+            "# HELP loadtest_response_bytes_total Response bytes received",
+            "# TYPE loadtest_response_bytes_total counter",
+        ]
+        for name, accumulator in self.endpoint_metrics.items():
+            lines.append(f'loadtest_response_bytes_total{{{base_labels},endpoint="{name}"}} {accumulator.total_bytes}')
+        
+        histogram = self.totals.histogram
+        lines += [
+            "# HELP loadtest_request_duration_seconds Request latency measured by the load generator",
+            "# TYPE loadtest_request_duration_seconds histogram",
+        ]
+        for bound, count in zip(self.PROMETHEUS_BUCKETS_MS, histogram.cumulative_counts(self.PROMETHEUS_BUCKETS_MS)):
+            lines.append(f'loadtest_request_duration_seconds_bucket{{{base_labels},le="{bound / 1000:g}"}} {count}')
+        lines.append(f'loadtest_request_duration_seconds_bucket{{{base_labels},le="+Inf"}} {histogram.total_count}')
+        lines.append(f'loadtest_request_duration_seconds_sum{{{base_labels}}} {histogram.total_sum / 1e6}')
+        lines.append(f'loadtest_request_duration_seconds_count{{{base_labels}}} {histogram.total_count}')
         
-        current_weight = 0
-        for endpoint in self.endpoints:
-            current_weight += endpoint["weight"]
-            if random_value <= current_weight:
-                return endpoint
+        gauges = [
+            ("loadtest_in_flight_requests", "Requests currently in flight", self.in_flight_requests),
+            ("loadtest_target_rps", "Target request rate from the load profile", self.current_rps),
+            ("loadtest_achieved_rps", "Achieved request rate over the last interval", snapshot.get("achieved_rps", 0.0)),
+            ("loadtest_interval_error_ratio", "Failed request ratio over the last interval",
+             snapshot.get("error_rate", 0.0) / 100),
+            ("loadtest_event_loop_lag_seconds", "Highest generator event loop lag over the last interval",
+             snapshot.get("loop_lag_max_ms", 0.0) / 1000),
+            ("loadtest_cpu_percent", "Generator process CPU over the last interval (100 = one core)",
+             snapshot.get("cpu_percent", 0.0)),
+        ]
+        for metric, help_text, value in gauges:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge", f"{metric}{{{base_labels}}} {value}"]
         
-        return self.endpoints[0]  # Fallback
-    
-    def generate_request_data(self, endpoint: Dict) -> Tuple[str, Dict, Dict]:
-        """Generate request URL, headers, and data"""
-        url = endpoint["url"]
-        headers = {}
-        data = None
+        lines += [
+            "# HELP loadtest_interval_latency_seconds Latency quantiles over the last interval",
+            "# TYPE loadtest_interval_latency_seconds gauge",
+            f'loadtest_interval_latency_seconds{{{base_labels},quantile="0.5"}} '
+            f'{snapshot.get("p50_response_time", 0.0) / 1000}',
+            f'loadtest_interval_latency_seconds{{{base_labels},quantile="0.99"}} '
+            f'{snapshot.get("p99_response_time", 0.0) / 1000}',
+        ]
         
-        # Add query parameters for GET requests
-        if endpoint["method"] == "GET":
-            if "search" in endpoint["name"]:
-                search_term = random.choice(self.scenarios["search_terms"])
-                url += f"?q={search_term}&limit=20"
-            elif "products" in endpoint["name"] and endpoint["name"] != "product_search":
-                page = random.randint(1, 10)
-                url += f"?page={page}&limit=20"
-            elif "categories" in endpoint["name"]:
-                category = random.choice(self.scenarios["categories"])
-                url += f"?category={category}"
-        
-        # Add request body for POST requests
-        elif endpoint["method"] == "POST":
-            headers["Content-Type"] = "application/json"
-            
-            if "login" in endpoint["name"]:
-                data = {
-                    "email": f"user{random.randint(1, 1000)}@example.com",
-                    "password": "password123"
-                }
-            elif "order" in endpoint["name"]:
-                data = {
-                    "items": [
-                        {
-                            "productId": f"product_{random.randint(1, 500)}",
-                            "quantity": random.randint(1, 3),
-                            "price": random.randint(10, 500)
-                        }
-                    ],
-                    "shippingAddress": {
-                        "street": "123 Test Street",
-                        "city": "Test City",
-                        "state": "TS",
-                        "zipCode": "12345"
-                    }
-                }
-            elif "payment" in endpoint["name"]:
-                data = {
-                    "amount": random.randint(10, 500),
-                    "currency": "USD",
-                    "method": "credit_card",
-                    "cardToken": f"tok_test_{random.randint(100000, 999999)}"
-                }
+        counters = [
+            ("loadtest_dropped_requests_total", "Open-loop arrivals dropped at the in-flight limit",
+             self.metrics.dropped_requests),
+            ("loadtest_late_requests_total", "Open-loop arrivals dispatched late", self.metrics.late_requests),
+        ]
+        for metric, help_text, value in counters:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter", f"{metric}{{{base_labels}}} {value}"]
         
-        # Add random user agent
-        headers["User-Agent"] = random.choice(self.scenarios["user_agents"])
+        lines += [
+            "# HELP loadtest_errors_total Failed requests by error class or HTTP status",
+            "# TYPE loadtest_errors_total counter",
+        ]
+        for error_key, count in self.error_counts.items():
+            lines.append(f'loadtest_errors_total{{{base_labels},error="{error_key}"}} {count}')
         
-        return url, headers, data
+        return "\n".join(lines) + "\n"
     
-    async def make_request(self, endpoint: Dict) -> RequestResult:
-        """Make individual HTTP request"""
-        start_time = time.time()
-        url, headers, data = self.generate_request_data(endpoint)
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Prometheus scrape handler"""
+        return web.Response(
+            body=self.render_prometheus_metrics().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+    
+    async def start_metrics_server(self) -> web.AppRunner:
+        """Serve /metrics on config.metrics_port"""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "0.0.0.0", self.config.metrics_port).start()
+        self.logger.info(f"Prometheus metrics available on port {self.config.metrics_port}")
+        return runner
+    
+    def record_result(self, result: RequestResult):
+        """Aggregate a single request result in constant time and memory"""
+        self.results.append(result)
+        self.totals.record(result)
+        if self.raw_sink:
+            self.raw_sink.write(result, self.endpoint_indexes[result.endpoint])
+        self.interval_metrics.record(result)
+        self.endpoint_metrics[result.endpoint].record(result)
         
-        try:
-            if endpoint["method"] == "GET":
-                async with self.session.get(url, headers=headers) as response:
-                    content = await response.read()
-                    end_time = time.time()
-                    
-                    return RequestResult(
-                        timestamp=start_time,
-                        url=url,
-                        method=endpoint["method"],
-                        status_code=response.status,
-                        response_time=(end_time - start_time) * 1000,  # Convert to ms
-                        success=200 <= response.status < 400,
-                        size=len(content)
-                    )
-            
-            elif endpoint["method"] == "POST":
-                async with self.session.post(url, headers=headers, json=data) as response:
-                    content = await response.read()
-                    end_time = time.time()
-                    
-                    return RequestResult(
-                        timestamp=start_time,
-                        url=url,
-                        method=endpoint["method"],
-                        status_code=response.status,
-                        response_time=(end_time - start_time) * 1000,
-                        success=200 <= response.status < 400,
-                        size=len(content)
-                    )
+        if self.stage_metrics:
+            stage_index = bisect.bisect_right(self.stage_ends, result.timestamp)
+            self.stage_metrics[min(stage_index, len(self.stage_metrics) - 1)].record(result)
         
-        except Exception as e:
-            end_time = time.time()
-            error_msg = str(e)
-            
-            return RequestResult(
-                timestamp=start_time,
-                url=url,
-                method=endpoint["method"],
-                status_code=0,
-                response_time=(end_time - start_time) * 1000,
-                success=False,
-                error=error_msg
-            )
+        if not result.success:
+            # Track errors (bounded keys, see ERROR_CLASSES)
+            error_key = self.error_key(result)
+            self.error_counts[error_key] = self.error_counts.get(error_key, 0) + 1
+            self.interval_errors[error_key] = self.interval_errors.get(error_key, 0) + 1
     
-    async def worker(self, worker_id: int, requests_per_second: float):
-        """Worker coroutine for generating load"""
-        self.logger.info(f"Worker {worker_id} started - Target RPS: {requests_per_second}")
+    def export_state(self) -> Dict:
+        """Export aggregated state so it can be merged into another tester"""
+        return export_value(self.snapshot_state())
+    
+    def snapshot_state(self) -> Dict:
+        """export_state() with accumulators, key statistics and results left as copies
+
+        Copying is a few list copies; turning histograms into dicts and JSON
+        is what costs. The snapshot shares nothing mutable with the tester, so
+        state_json() can serialize it in another thread while the test runs.
+        """
+        return {
+            "metrics": asdict(self.metrics),
+            "totals": self.totals.copy(),
+            "stages": [accumulator.copy() for accumulator in self.stage_metrics],
+            "endpoints": {name: accumulator.copy() for name, accumulator in self.endpoint_metrics.items()},
+            "journeys": {name: accumulator.copy() for name, accumulator in self.journey_metrics.items()},
+            "journey_failures": {name: dict(failures) for name, failures in self.journey_failures.items()},
+            "correlation_misses": dict(self.correlation_misses),
+            "keys": {name: key_space.stats.copy() for name, key_space in self.key_spaces.items()},
+            "error_counts": dict(self.error_counts),
+            "replay": dict(self.replay_stats),
+            "error_samples": {error_class: dict(samples) for error_class, samples in self.error_samples.items()},
+            "error_timeline": {str(index): [requests, failed, dict(errors)]
+                               for index, (requests, failed, errors) in self.error_timeline.items()},
+            "client_connections": [dict(connection) for connection in self.client_connections],
+            "generator": self.monitor.snapshot(),
+            "results": list(self.results),
+        }
+    
+    def merge_state(self, state: Dict, time_offset: float = 0.0):
+        """Merge state exported by another tester (e.g. a worker process)
+
+        time_offset shifts the state's timestamps, so the state of a resumed
+        checkpoint lines up with the run that continues it.
+        """
+        metrics = state["metrics"]
+        self.metrics.dropped_requests += metrics["dropped_requests"]
+        self.metrics.late_requests += metrics["late_requests"]
+        self.metrics.abandoned_requests += metrics["abandoned_requests"]
+        start_time = metrics["start_time"] + time_offset if metrics["start_time"] else 0.0
+        if start_time and (not self.metrics.start_time or start_time < self.metrics.start_time):
+            self.metrics.start_time = start_time
+        self.metrics.end_time = max(self.metrics.end_time, metrics["end_time"] + time_offset)
         
-        request_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
-        last_request_time = time.time()
+        self.totals.merge(MetricsAccumulator.from_dict(state["totals"]))
+        for accumulator, stage_state in zip(self.stage_metrics, state["stages"]):
+            accumulator.merge(MetricsAccumulator.from_dict(stage_state))
+        for name, endpoint_state in state["endpoints"].items():
+            self.endpoint_metrics[name].merge(MetricsAccumulator.from_dict(endpoint_state))
         
-        while self.running:
-            try:
-                # Rate limiting
-                current_time = time.time()
-                time_since_last = current_time - last_request_time
-                
-                if time_since_last < request_interval:
-                    await asyncio.sleep(request_interval - time_since_last)
-                
-                # Select and execute request
-                endpoint = self.select_endpoint()
-                result = await self.make_request(endpoint)
-                
-                # Store result
-                self.results.append(result)
-                self.request_times.append(result.response_time)
-                
-                # Track errors
-                if not result.success:
-                    error_key = f"{result.status_code}_{result.error or 'unknown'}"
-                    self.error_counts[error_key] = self.error_counts.get(error_key, 0) + 1
-                
-                last_request_time = time.time()
-                
-            except Exception as e:
-                self.logger.error(f"Worker {worker_id} error: {e}")
-                await asyncio.sleep(0.1)  # Brief pause on error
+        for name, journey_state in state["journeys"].items():
+            self.journey_metrics[name].merge(MetricsAccumulator.from_dict(journey_state))
+        for name, failures in state["journey_failures"].items():
+            for endpoint, count in failures.items():
+                self.journey_failures[name][endpoint] = self.journey_failures[name].get(endpoint, 0) + count
+        for key, count in state["correlation_misses"].items():
+            self.correlation_misses[key] = self.correlation_misses.get(key, 0) + count
+        for name, stats in state["keys"].items():
+            self.key_spaces[name].stats.merge(KeyStats.from_dict(stats))
+        self.client_connections.extend(state["client_connections"])
+        self.monitor.merge(state["generator"])
+        for error_key, count in state["error_counts"].items():
+            self.error_counts[error_key] = self.error_counts.get(error_key, 0) + count
+        for key, value in state["replay"].items():
+            self.replay_stats[key] += value
+        for error_class, samples in state["error_samples"].items():
+            merged = self.error_samples.setdefault(error_class, {})
+            for error_type, message in samples.items():
+                if error_type not in merged and len(merged) < self.ERROR_SAMPLES_PER_CLASS:
+                    merged[error_type] = message
+        bucket_offset = round(time_offset / self.error_timeline_width())
+        for index, (requests, failed, errors) in state["error_timeline"].items():
+            bucket = self.error_timeline.setdefault(int(index) + bucket_offset, [0, 0, {}])
+            bucket[0] += requests
+            bucket[1] += failed
+            for error_key, count in errors.items():
+                bucket[2][error_key] = bucket[2].get(error_key, 0) + count
+        
+        results = list(self.results) + [
+            RequestResult(**{**r, "timestamp": r["timestamp"] + time_offset}) for r in state["results"]
+        ]
+        results.sort(key=lambda r: r.timestamp)
+        self.results.clear()
+        self.results.extend(results)
     
-    def parse_duration(self, duration_str: str) -> int:
-        """Parse duration string to seconds"""
-        if duration_str.endswith('s'):
-            return int(duration_str[:-1])
-        elif duration_str.endswith('m'):
-            return int(duration_str[:-1]) * 60
-        elif duration_str.endswith('h'):
-            return int(duration_str[:-1]) * 3600
-        else:
-            return int(duration_str)  # Assume seconds
+    def test_duration_seconds(self) -> int:
+        """Total test duration (sum of the stages when a load profile is set)"""
+        if self.config.stages:
+            return sum(stage.duration for stage in self.config.stages)
+        return parse_duration(self.config.duration)
+    
+    def set_stage_boundaries(self, start_time: float):
+        """Compute the absolute end time of every load profile stage"""
+        self.stage_ends = []
+        elapsed = 0
+        for stage in self.config.stages:
+            elapsed += stage.duration
+            self.stage_ends.append(start_time + elapsed)
     
     async def run_test(self):
         """Run the load test"""
         self.logger.info(f"Starting high-performance load test - Target: {self.config.target_rps} RPS")
         
-        # Create session
-        self.session = await self.create_session()
+        # Open the HTTP client
+        await self.client.start()
+        for template in self.request_templates:
+            self.client.prepare(template)
+        metrics_runner = await self.start_metrics_server() if self.config.metrics_port else None
         
         # Calculate test parameters
-        duration_seconds = self.parse_duration(self.config.duration)
-        workers = min(self.config.users, self.config.target_rps)
+        duration_seconds = self.test_duration_seconds()
+        workers = max(1, min(self.config.users, self.config.target_rps))
         requests_per_worker = self.config.target_rps / workers
         
         self.logger.info(f"Test configuration:")
         self.logger.info(f"  Duration: {duration_seconds} seconds")
-        self.logger.info(f"  Workers: {workers}")
-        self.logger.info(f"  RPS per worker: {requests_per_worker:.2f}")
+        self.logger.info(f"  Scheduler: {self.config.scheduler}")
+        if self.config.scheduler == "open":
+            self.logger.info(f"  Arrival process: {self.config.arrival_process}")
+            self.logger.info(f"  Max in-flight: {self.config.max_in_flight}")
+        elif self.config.scheduler == "replay":
+            self.logger.info(f"  Replay file: {self.config.replay_file}")
+            self.logger.info(f"  Replay speed: {self.config.replay_speed:g}x")
+            self.logger.info(f"  Max in-flight: {self.config.max_in_flight}")
+        elif self.config.scheduler == "journey":
+            self.logger.info(f"  Virtual users: {self.config.users}")
+            self.logger.info(f"  Journeys: {', '.join(journey.name for journey in self.journeys)}")
+            self.logger.info(f"  Think time: {self.config.think_time}")
+        else:
+            self.logger.info(f"  Workers: {workers}")
+            self.logger.info(f"  RPS per worker: {requests_per_worker:.2f}")
+        if self.config.stages:
+            self.logger.info(f"  Load profile: {len(self.config.stages)} stages")
+        if self.config.scheduler != "replay":
+            self.logger.info(f"  Keys: product {self.config.product_keys}, user {self.config.user_keys}, "
+                             f"search {self.config.search_keys}")
         
-        # Start test
+        # Start test (a resumed run starts as if it had been running for resume_elapsed seconds)
+        resuming = self.config.resume_elapsed > 0
+        if resuming:
+            self.logger.info(f"  Resuming after {self.config.resume_elapsed:.0f}s of a checkpointed run")
         self.running = True
-        self.metrics.start_time = time.time()
+        now = time.time()
+        self.metrics.start_time = now - self.config.resume_elapsed
         
         # Create worker tasks
-        tasks = []
-        for i in range(workers):
-            task = asyncio.create_task(self.worker(i, requests_per_worker))
-            tasks.append(task)
+        tasks = [asyncio.create_task(self.monitor.run())]
+        self.last_snapshot_time = now
+        if self.config.snapshot_interval > 0:
+            output_dir = Path(self.config.output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self.timeseries_handle = open(output_dir / self.config.timeseries_file, "a" if resuming else "w")
+            tasks.append(asyncio.create_task(self.snapshot_loop()))
+        
+        if self.config.checkpoint_interval > 0:
+            tasks.append(asyncio.create_task(self.checkpoint_loop()))
+        
+        if self.config.raw_output:
+            raw_path = Path(self.config.output_dir) / self.config.raw_results_file
+            raw_path.parent.mkdir(parents=True, exist_ok=True)
+            self.raw_sink = RawResultSink(raw_path, append=resuming)
+        
+        if self.config.stages:
+            self.set_stage_boundaries(self.metrics.start_time)
+            self.current_rps = self.config.stages[0].start_rps
+            tasks.append(asyncio.create_task(self.rate_controller()))
+        
+        if self.config.scheduler == "open":
+            tasks.append(asyncio.create_task(self.open_loop_scheduler()))
+        elif self.config.scheduler == "replay":
+            tasks.append(asyncio.create_task(self.replay_scheduler()))
+        elif self.config.scheduler == "journey":
+            for i in range(self.config.users):
+                tasks.append(asyncio.create_task(self.journey_user(i, self.config.users)))
+        else:
+            for i in range(workers):
+                task = asyncio.create_task(self.worker(i, 1.0 / workers))
+                tasks.append(task)
         
-        # Run for specified duration
+        # Run for specified duration (or until a signal stops the test)
+        deadline = self.metrics.start_time + duration_seconds
         try:
-            await asyncio.sleep(duration_seconds)
+            while self.running and time.time() < deadline:
+                await asyncio.sleep(min(self.RATE_UPDATE_INTERVAL, deadline - time.time()))
         except KeyboardInterrupt:
             self.logger.info("Test interrupted by user")
         
-        # Stop workers
+        # Stop issuing requests
         self.running = False
         self.metrics.end_time = time.time()
         
+        # Let requests in flight complete and be recorded, for at most drain_timeout
+        if self.in_flight_requests:
+            self.logger.info(f"Draining {self.in_flight_requests:,} in-flight requests "
+                             f"(up to {self.config.drain_timeout:g}s)...")
+            drain_deadline = time.time() + self.config.drain_timeout
+            while self.in_flight_requests and time.time() < drain_deadline:
+                await asyncio.sleep(0.01)
+            if self.in_flight_requests:
+                self.logger.warning(f"Abandoning {self.in_flight_requests:,} requests still in flight after the drain")
+                self.metrics.abandoned_requests += self.in_flight_requests
+        
         # Wait for workers to finish
         self.logger.info("Stopping workers...")
+        tasks.extend(self.in_flight_tasks)
         for task in tasks:
             task.cancel()
         
         await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Close session
-        await self.session.close()
+        # Flush the final partial interval
+        if self.timeseries_handle:
+            self.write_snapshot()
+            self.timeseries_handle.close()
+            self.timeseries_handle = None
+        
+        if self.raw_sink:
+            self.raw_sink.close()
+            self.logger.info(f"Wrote {self.raw_sink.records:,} raw results to {self.raw_sink.path}")
+            self.raw_sink = None
+        
+        # Close the HTTP client
+        self.client_connections = [
+            {"process": self.config.process_index, **stats} for stats in self.client.connection_stats()
+        ]
+        await self.client.close()
+        if metrics_runner:
+            await metrics_runner.cleanup()
         
         self.logger.info("Load test completed")
     
     def calculate_metrics(self):
         """Calculate test metrics"""
-        if not self.results:
-            return
+        test_duration = self.metrics.end_time - self.metrics.start_time
+        self.totals.fill_metrics(self.metrics, test_duration)
+    
+    def endpoint_reports(self) -> Dict[str, Dict]:
+        """Per-endpoint throughput and latency, keyed by endpoint name"""
+        test_duration = self.metrics.end_time - self.metrics.start_time
+        reports = {}
+        for endpoint in self.endpoints:
+            accumulator = self.endpoint_metrics[endpoint["name"]]
+            endpoint_metrics = TestMetrics(start_time=self.metrics.start_time, end_time=self.metrics.end_time)
+            reports[endpoint["name"]] = {
+                "service": endpoint["service"],
+                "method": endpoint["method"],
+                "url": endpoint["url"],
+                "weight": endpoint["weight"],
+                "metrics": asdict(accumulator.fill_metrics(endpoint_metrics, test_duration)),
+            }
+        return reports
+    
+    def error_timeline_width(self) -> float:
+        """Error timeline bucket width in seconds (same in every process and agent)"""
+        return max(self.config.snapshot_interval, 1.0, self.test_duration_seconds() / self.ERROR_TIMELINE_BUCKETS)
+    
+    def error_timeline_report(self) -> List[Dict]:
+        """Requests, failures and error classes per timeline bucket, oldest first"""
+        width = self.error_timeline_width()
+        timeline = []
+        for index in sorted(self.error_timeline):
+            requests, failed, errors = self.error_timeline[index]
+            timeline.append({
+                "elapsed": max(0.0, index * width - self.metrics.start_time),
+                "requests": requests,
+                "failed": failed,
+                "error_rate": failed / requests * 100 if requests else 0.0,
+                "errors": errors,
+            })
+        return timeline
+    
+    def journey_reports(self) -> Dict[str, Dict]:
+        """Per-journey completion counts and end-to-end latency (journey scheduler)"""
+        if self.config.scheduler != "journey":
+            return {}
         
-        # Basic counts
-        self.metrics.total_requests = len(self.results)
-        self.metrics.successful_requests = sum(1 for r in self.results if r.success)
-        self.metrics.failed_requests = self.metrics.total_requests - self.metrics.successful_requests
-        self.metrics.total_bytes = sum(r.size for r in self.results)
-        
-        # Response times
-        if self.request_times:
-            self.metrics.min_response_time = min(self.request_times)
-            self.metrics.max_response_time = max(self.request_times)
-            self.metrics.avg_response_time = statistics.mean(self.request_times)
-            
-            # Percentiles
-            sorted_times = sorted(self.request_times)
-            self.metrics.p50_response_time = statistics.median(sorted_times)
-            self.metrics.p95_response_time = sorted_times[int(len(sorted_times) * 0.95)]
-            self.metrics.p99_response_time = sorted_times[int(len(sorted_times) * 0.99)]
-        
-        # Rates
         test_duration = self.metrics.end_time - self.metrics.start_time
-        if test_duration > 0:
-            self.metrics.rps = self.metrics.total_requests / test_duration
-            self.metrics.error_rate = self.metrics.failed_requests / self.metrics.total_requests * 100
+        reports = {}
+        for journey in self.journeys:
+            journey_metrics = TestMetrics(start_time=self.metrics.start_time, end_time=self.metrics.end_time)
+            reports[journey.name] = {
+                "weight": journey.weight,
+                "steps": [step.endpoint for step in journey.steps],
+                "metrics": asdict(self.journey_metrics[journey.name].fill_metrics(journey_metrics, test_duration)),
+                "failed_at": self.journey_failures[journey.name],
+            }
+        return reports
+    
+    def stage_reports(self) -> List[Dict]:
+        """Per-stage throughput and latency for the load profile"""
+        if not self.metrics.start_time:
+            return []
+        
+        self.set_stage_boundaries(self.metrics.start_time)
+        reports = []
+        stage_start = self.metrics.start_time
+        for stage, stage_end, accumulator in zip(self.config.stages, self.stage_ends, self.stage_metrics):
+            # A stopped test only ran part of its last stages
+            elapsed = min(stage_end, self.metrics.end_time) - stage_start
+            stage_metrics = TestMetrics(start_time=stage_start, end_time=stage_start + max(elapsed, 0))
+            reports.append({
+                **asdict(stage),
+                "metrics": asdict(accumulator.fill_metrics(stage_metrics, elapsed)),
+            })
+            stage_start = stage_end
+        return reports
+    
+    def save_raw_metadata(self, output_dir: Path):
+        """Describe the raw result files so the offline analyzer can decode them"""
+        if self.config.processes > 1:
+            files = [f"raw-results-{i}.bin" for i in range(self.config.processes)]
+        else:
+            files = [self.config.raw_results_file]
+        
+        with open(output_dir / "raw-results.meta.json", 'w') as f:
+            json.dump({
+                "test_id": self.config.test_id,
+                "start_time": self.metrics.start_time,
+                "end_time": self.metrics.end_time,
+                "record_format": RawResultSink.RECORD.format,
+                "record_size": RawResultSink.RECORD.size,
+                "fields": RawResultSink.FIELDS,
+                "endpoints": [endpoint["name"] for endpoint in self.endpoints],
+                "error_classes": RawResultSink.ERROR_CLASSES,
+                "files": files,
+            }, f, indent=2)
     
     def save_results(self):
         """Save test results to files"""
@@ -452,6 +3352,17 @@ class HighPerformanceLoadTester:
         
         # Calculate metrics
         self.calculate_metrics()
+        stages = self.stage_reports()
+        endpoints = self.endpoint_reports()
+        journeys = self.journey_reports()
+        keys = {name: key_space.report() for name, key_space in self.key_spaces.items()}
+        generator = self.monitor.report(self.metrics.total_requests)
+        if generator["saturated"]:
+            self.logger.warning(f"Generator saturated ({'; '.join(generator['saturation_reasons'])}): "
+                                f"results reflect the load generator, not the target")
+        
+        if self.config.raw_output:
+            self.save_raw_metadata(output_dir)
         
         # Save detailed results
         results_file = output_dir / "custom-results.json"
@@ -459,8 +3370,26 @@ class HighPerformanceLoadTester:
             json.dump({
                 "config": asdict(self.config),
                 "metrics": asdict(self.metrics),
+                "generator": generator,
+                "stages": stages,
+                "endpoints": endpoints,
+                "journeys": journeys,
+                "correlation_misses": self.correlation_misses,
+                "keys": keys,
+                "replay": self.replay_stats if self.config.scheduler == "replay" else {},
+                "agents": self.agent_reports,
+                "checkpoints": self.checkpoint_sources,
+                "client_connections": self.client_connections,
                 "error_counts": self.error_counts,
-                "results": [asdict(r) for r in self.results[-1000:]]  # Last 1000 results
+                "error_samples": self.error_samples,
+                "error_timeline": self.error_timeline_report(),
+                # Full latency distributions, for compare-results.py
+                "histograms": {
+                    "total": self.totals.histogram.to_dict(),
+                    "endpoints": {name: accumulator.histogram.to_dict()
+                                  for name, accumulator in self.endpoint_metrics.items() if accumulator.total_requests},
+                },
+                "results": [asdict(r) for r in self.results]  # Last raw_sample_size results
             }, f, indent=2)
         
         # Save summary
@@ -472,7 +3401,22 @@ class HighPerformanceLoadTester:
             f.write(f"Target URL: {self.config.target_url}\n")
             f.write(f"Target RPS: {self.config.target_rps:,}\n")
             f.write(f"Duration: {self.config.duration}\n")
-            f.write(f"Users: {self.config.users:,}\n\n")
+            f.write(f"Users: {self.config.users:,}\n")
+            f.write(f"Processes: {self.config.processes}\n")
+            f.write(f"Client: {self.config.client_backend}\n")
+            if self.agent_reports:
+                f.write(f"Agents: {len(self.agent_reports)}\n")
+                for agent in self.agent_reports:
+                    status = f"error: {agent['error']}" if agent.get("error") else f"{agent['requests']:,} requests"
+                    f.write(f"  {agent['address']} ({agent['target_rps']:,} RPS): {status}\n")
+            if self.checkpoint_sources:
+                incomplete = sum(1 for source in self.checkpoint_sources if not source["final"])
+                f.write(f"Checkpoints: {len(self.checkpoint_sources)} merged ({incomplete} from interrupted runs)\n")
+                for source in self.checkpoint_sources:
+                    written = datetime.fromtimestamp(source["written_at"]).strftime("%Y-%m-%d %H:%M:%S")
+                    f.write(f"  {source['path']} (written {written}, {source['elapsed']:.0f}s of load"
+                            f"{'' if source['final'] else ', interrupted'})\n")
+            f.write(f"\n")
             
             f.write(f"Results:\n")
             f.write(f"--------\n")
@@ -481,8 +3425,39 @@ class HighPerformanceLoadTester:
             f.write(f"Failed Requests: {self.metrics.failed_requests:,}\n")
             f.write(f"Actual RPS: {self.metrics.rps:,.2f}\n")
             f.write(f"Error Rate: {self.metrics.error_rate:.2f}%\n")
+            if self.metrics.abandoned_requests:
+                f.write(f"Abandoned Requests (in flight after the {self.config.drain_timeout:g}s drain): "
+                        f"{self.metrics.abandoned_requests:,}\n")
+            if self.config.scheduler == "open":
+                f.write(f"Scheduler: open ({self.config.arrival_process} arrivals)\n")
+                f.write(f"Dropped Requests (in-flight limit): {self.metrics.dropped_requests:,}\n")
+                f.write(f"Late Requests (> {self.config.late_threshold_ms:g}ms): {self.metrics.late_requests:,}\n")
+            elif self.config.scheduler == "replay":
+                replay = self.replay_stats
+                f.write(f"Scheduler: replay of {self.config.replay_file} at {self.config.replay_speed:g}x\n")
+                f.write(f"Replayed Records: {replay['records']:,} ({replay['skipped']:,} unparseable lines skipped, "
+                        f"log {'fully replayed' if replay['completed'] else 'cut off by the test duration'})\n")
+                f.write(f"Requests Matching No Endpoint (replay_other): "
+                        f"{self.endpoint_metrics['replay_other'].total_requests:,}\n")
+                f.write(f"Dropped Requests (in-flight limit): {self.metrics.dropped_requests:,}\n")
+                f.write(f"Late Requests (> {self.config.late_threshold_ms:g}ms): {self.metrics.late_requests:,}\n")
             f.write(f"Total Data: {self.metrics.total_bytes / 1024 / 1024:.2f} MB\n\n")
             
+            f.write(f"Load Generator:\n")
+            f.write(f"---------------\n")
+            if generator["saturated"]:
+                f.write(f"WARNING: generator saturated ({'; '.join(generator['saturation_reasons'])}); "
+                        f"achieved RPS and latencies reflect the load generator, not the target\n")
+            f.write(f"CPU per process: {generator['cpu_percent']:.0f}% mean, {generator['max_cpu_percent']:.0f}% peak "
+                    f"(100% = one core)\n")
+            f.write(f"Event Loop Lag: p50 {generator['loop_lag_p50_ms']:.2f}ms, p99 {generator['loop_lag_p99_ms']:.2f}ms, "
+                    f"max {generator['loop_lag_max_ms']:.2f}ms\n")
+            f.write(f"In-Flight Requests: {generator['in_flight_mean']:,.1f} mean, {generator['in_flight_max']:,} peak\n")
+            f.write(f"Connection Pool Waits: {generator['pool_waits']:,} ({generator['pool_wait_ratio']:.1%} of requests), "
+                    f"mean {generator['pool_wait_mean_ms']:.2f}ms, p99 {generator['pool_wait_p99_ms']:.2f}ms\n")
+            f.write(f"GC Pauses: {generator['gc_collections']:,} collections, {generator['gc_pause_total_ms']:.1f}ms total, "
+                    f"max {generator['gc_pause_max_ms']:.2f}ms\n\n")
+            
             f.write(f"Response Times (ms):\n")
             f.write(f"-------------------\n")
             f.write(f"Min: {self.metrics.min_response_time:.2f}\n")
@@ -492,74 +3467,925 @@ class HighPerformanceLoadTester:
             f.write(f"P95: {self.metrics.p95_response_time:.2f}\n")
             f.write(f"P99: {self.metrics.p99_response_time:.2f}\n\n")
             
+            f.write(f"Endpoints:\n")
+            f.write(f"----------\n")
+            f.write(f"{'Endpoint':<20} {'Service':<16} {'Method':<6} {'Requests':>10} {'RPS':>10} "
+                    f"{'P50':>9} {'P95':>9} {'P99':>9} {'Errors':>8} {'MB':>9}\n")
+            for name, endpoint in sorted(endpoints.items(), key=lambda x: x[1]["metrics"]["p99_response_time"], reverse=True):
+                metrics = endpoint["metrics"]
+                f.write(f"{name:<20} {endpoint['service']:<16} {endpoint['method']:<6} {metrics['total_requests']:>10,} "
+                        f"{metrics['rps']:>10,.2f} {metrics['p50_response_time']:>9.2f} "
+                        f"{metrics['p95_response_time']:>9.2f} {metrics['p99_response_time']:>9.2f} "
+                        f"{metrics['error_rate']:>7.2f}% {metrics['total_bytes'] / 1024 / 1024:>9.2f}\n")
+            f.write(f"\n")
+            
+            if journeys:
+                f.write(f"User Journeys (latency = sum of step latencies, think time excluded):\n")
+                f.write(f"----------------------------------------------------------------------\n")
+                f.write(f"{'Journey':<20} {'Steps':>5} {'Completed':>10} {'Failed':>8} {'Per sec':>9} "
+                        f"{'P50':>9} {'P95':>9} {'P99':>9}\n")
+                for name, journey in journeys.items():
+                    metrics = journey["metrics"]
+                    f.write(f"{name:<20} {len(journey['steps']):>5} {metrics['successful_requests']:>10,} "
+                            f"{metrics['failed_requests']:>8,} {metrics['rps']:>9,.2f} "
+                            f"{metrics['p50_response_time']:>9.2f} {metrics['p95_response_time']:>9.2f} "
+                            f"{metrics['p99_response_time']:>9.2f}\n")
+                for name, journey in journeys.items():
+                    if journey["failed_at"]:
+                        failed_at = ", ".join(f"{step} {count:,}" for step, count in
+                                              sorted(journey["failed_at"].items(), key=lambda x: x[1], reverse=True))
+                        f.write(f"  {name} abandoned at: {failed_at}\n")
+                if self.correlation_misses:
+                    misses = ", ".join(f"{key} {count:,}" for key, count in sorted(self.correlation_misses.items()))
+                    f.write(f"  Correlation misses (fallback values used): {misses}\n")
+                f.write(f"\n")
+            
+            drawn = {name: report for name, report in keys.items() if report["draws"]}
+            if drawn:
+                f.write(f"Key Popularity (keys drawn for requests and journey sessions):\n")
+                f.write(f"--------------------------------------------------------------\n")
+                f.write(f"{'Keys':<8} {'Model':<26} {'Draws':>10} {'Distinct':>10} {'Coverage':>9} "
+                        f"{'Top key':>8} {'Top 10':>7} {'Top 1%':>7} {'Fitted skew':>12}\n")
+                share = lambda value: f"{value:.1%}" if value is not None else "-"
+                for name, report in drawn.items():
+                    exponent = report["fitted_zipf_exponent"]
+                    skew = f"{exponent:.2f}" if exponent is not None else "-"
+                    f.write(f"{name:<8} {report['spec']:<26} {report['draws']:>10,} {report['distinct_keys']:>10,} "
+                            f"{report['coverage']:>9.1%} {share(report['top_key_share']):>8} "
+                            f"{share(report['top_10_share']):>7} {share(report['top_1_percent_share']):>7} "
+                            f"{skew:>12}\n")
+                f.write(f"\n")
+            
+            if stages:
+                f.write(f"Load Profile Stages:\n")
+                f.write(f"--------------------\n")
+                f.write(f"{'Stage':<12} {'Duration':>9} {'Target RPS':>21} {'Actual RPS':>12} "
+                        f"{'P50':>9} {'P95':>9} {'P99':>9} {'Errors':>8}\n")
+                for stage in stages:
+                    metrics = stage["metrics"]
+                    target = f"{stage['start_rps']:,.0f} -> {stage['target_rps']:,.0f}"
+                    f.write(f"{stage['name']:<12} {stage['duration']:>8}s {target:>21} {metrics['rps']:>12,.2f} "
+                            f"{metrics['p50_response_time']:>9.2f} {metrics['p95_response_time']:>9.2f} "
+                            f"{metrics['p99_response_time']:>9.2f} {metrics['error_rate']:>7.2f}%\n")
+                f.write(f"\n")
+            
+            if self.client_connections:
+                connections = self.client_connections
+                mean_utilization = sum(c["utilization"] for c in connections) / len(connections)
+                f.write(f"HTTP/2 Connections:\n")
+                f.write(f"-------------------\n")
+                f.write(f"Connections: {len(connections)}, mean stream utilization {mean_utilization:.1%}\n")
+                f.write(f"{'Process':>7} {'Conn':>5} {'Requests':>10} {'Streams':>8} {'Peak':>6} "
+                        f"{'Avg':>7} {'Util':>7} {'Avg (ms)':>9}\n")
+                for c in connections:
+                    f.write(f"{c['process']:>7} {c['connection']:>5} {c['requests']:>10,} {c['stream_limit']:>8} "
+                            f"{c['peak_streams']:>6} {c['avg_streams']:>7.1f} {c['utilization']:>6.1%} "
+                            f"{c['avg_response_time']:>9.2f}\n")
+                f.write(f"\n")
+            
             if self.error_counts:
                 f.write(f"Error Breakdown:\n")
                 f.write(f"---------------\n")
                 for error, count in sorted(self.error_counts.items(), key=lambda x: x[1], reverse=True):
-                    f.write(f"{error}: {count:,}\n")
+                    f.write(f"{error}: {count:,} ({count / self.metrics.total_requests:.2%} of requests)\n")
+                    for error_type, message in self.error_samples.get(error, {}).items():
+                        f.write(f"    e.g. {error_type}: {message}\n" if message else f"    e.g. {error_type}\n")
+                
+                timeline = [bucket for bucket in self.error_timeline_report() if bucket["requests"]]
+                if timeline:
+                    peak = max(timeline, key=lambda bucket: bucket["error_rate"])
+                    failing = sum(1 for bucket in timeline if bucket["failed"])
+                    f.write(f"Peak Error Rate: {peak['error_rate']:.2f}% at +{peak['elapsed']:.0f}s "
+                            f"({failing} of {len(timeline)} {self.error_timeline_width():g}s intervals had errors)\n")
         
         self.logger.info(f"Results saved to {output_dir}")
 
+# ===============================================================================
+# MULTI-PROCESS EXECUTION
+# ===============================================================================
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    """Split an integer total into parts that differ by at most one"""
+    base, remainder = divmod(total, parts)
+    return [base + (1 if i < remainder else 0) for i in range(parts)]
+
+def run_worker_process(config: TestConfig, process_index: int, result_queue):
+    """Entry point of a load generator process"""
+    # A forked child inherits the parent's event loop signal wakeup fd (agent
+    # mode); detach it so signals sent to this process stay in this process
+    signal.set_wakeup_fd(-1)
+    tester = HighPerformanceLoadTester(config)
+    
+    def signal_handler(signum, frame):
+        tester.running = False
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    # Checkpoints go to the parent, which writes one file for all processes
+    tester.checkpoint_sink = lambda state: result_queue.put((process_index, state, None, False))
+    
+    try:
+        asyncio.run(tester.run_test())
+        result_queue.put((process_index, tester.export_state(), None, True))
+    except Exception as e:
+        result_queue.put((process_index, None, str(e), True))
+
+def split_config(config: TestConfig, parts: int) -> List[TestConfig]:
+    """Divide a test configuration into parts that together generate the same load"""
+    rps_slices = split_evenly(config.target_rps, parts)
+    user_slices = split_evenly(config.users, parts)
+    connection_slices = split_evenly(config.max_connections, parts)
+    in_flight_slices = split_evenly(config.max_in_flight, parts)
+    
+    configs = []
+    for i in range(parts):
+        # target_rps is 0 when the rate comes from elsewhere (replay log): split stages evenly
+        share = rps_slices[i] / config.target_rps if config.target_rps else 1 / parts
+        configs.append(replace(
+            config,
+            target_rps=rps_slices[i],
+            users=user_slices[i],
+            max_connections=max(1, connection_slices[i]),
+            max_in_flight=max(1, in_flight_slices[i]),
+            # Interleave constant arrivals of the parts instead of firing in lockstep
+            arrival_phase=(config.arrival_phase + i) / parts,
+            # Each part replays every parts-th line of its parent's slice of the log
+            replay_partition=config.replay_partition + i * config.replay_partitions,
+            replay_partitions=config.replay_partitions * parts,
+            stages=[
+                replace(stage, target_rps=stage.target_rps * share, start_rps=stage.start_rps * share)
+                for stage in config.stages
+            ]
+        ))
+    return configs
+
+def run_multiprocess_test(config: TestConfig, tester: "HighPerformanceLoadTester"):
+    """Fork one load generator per process and merge their state into tester"""
+    processes = config.processes
+    
+    result_queue = multiprocessing.Queue()
+    workers = []
+    for i, worker_config in enumerate(split_config(config, processes)):
+        worker_config = replace(
+            worker_config,
+            processes=1,
+            process_index=i,
+            metrics_port=config.metrics_port + i if config.metrics_port else 0,
+            timeseries_file=f"timeseries-{i}.jsonl",
+            raw_results_file=f"raw-results-{i}.bin"
+        )
+        worker = multiprocessing.Process(
+            target=run_worker_process,
+            args=(worker_config, i, result_queue),
+            name=f"load-generator-{i}"
+        )
+        worker.start()
+        workers.append(worker)
+    
+    # tester.stop() forwards termination to the workers so they report their state
+    tester.worker_processes = workers
+    tester.logger.info(f"Started {processes} load generator processes")
+    
+    # A resumed run's earlier state stays in this tester and in every checkpoint
+    base_states = [json.dumps(tester.export_state())] if config.resume_elapsed else []
+    checkpoints: Dict[int, str] = {}
+    fresh = set()
+    
+    # Drain the queue before joining so large states cannot block the workers
+    pending = processes
+    while pending:
+        try:
+            process_index, state, error, final = result_queue.get(timeout=1)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers) and result_queue.empty():
+                tester.logger.error(f"{pending} worker processes exited without reporting results")
+                break
+            continue
+        
+        if not final:
+            # Write once every live worker has sent its checkpoint for this interval
+            checkpoints[process_index] = state
+            fresh.add(process_index)
+            if len(fresh) >= sum(1 for worker in workers if worker.is_alive()):
+                try:
+                    tester.write_checkpoint(base_states + list(checkpoints.values()))
+                except OSError as e:
+                    tester.logger.error(f"Checkpoint failed: {e}")
+                fresh.clear()
+            continue
+        
+        pending -= 1
+        if error:
+            tester.logger.error(f"Worker process {process_index} failed: {error}")
+        else:
+            tester.merge_state(state)
+    
+    for worker in workers:
+        worker.join()
+    tester.worker_processes = []
+
+def run_local_test(config: TestConfig, tester: "HighPerformanceLoadTester"):
+    """Run the test on this node, in one or several processes"""
+    if config.processes > 1:
+        run_multiprocess_test(config, tester)
+    else:
+        asyncio.run(tester.run_test())
+
+# ===============================================================================
+# DISTRIBUTED EXECUTION
+# ===============================================================================
+
+def config_from_dict(data: Dict) -> TestConfig:
+    """Rebuild a TestConfig sent over the wire as asdict() output"""
+    data = dict(data)
+    data["stages"] = [LoadStage(**stage) for stage in data.get("stages", [])]
+    return TestConfig(**data)
+
+class LoadTestAgent:
+    """Control server that runs slices of a distributed test for a coordinator
+
+    POST /run blocks until the slice has finished and returns the tester's
+    exported state (mergeable histograms and counters); the coordinator
+    merges the states of all agents into one report.
+    """
+    
+    def __init__(self, output_dir: str, processes: int):
+        self.output_dir = Path(output_dir)
+        self.processes = processes
+        self.tester: Optional[HighPerformanceLoadTester] = None
+        self.lock = asyncio.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    async def handle_status(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "state": "running" if self.lock.locked() else "idle",
+            "hostname": socket.gethostname(),
+            "processes": self.processes,
+            "time": time.time(),
+        })
+    
+    async def handle_run(self, request: web.Request) -> web.Response:
+        if self.lock.locked():
+            return web.json_response({"error": "agent is already running a test"}, status=409)
+        
+        async with self.lock:
+            payload = await request.json()
+            config = config_from_dict(payload["config"])
+            output_dir = self.output_dir / config.test_id
+            output_dir.mkdir(parents=True, exist_ok=True)
+            config = replace(
+                config,
+                output_dir=str(output_dir),
+                processes=max(1, min(self.processes, config.users, config.target_rps))
+            )
+            
+            self.tester = HighPerformanceLoadTester(config)
+            delay = payload["start_at"] - time.time()
+            self.logger.info(f"Agent accepted {config.target_rps:,} RPS slice of {config.test_id}, starting in {delay:.2f}s")
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, run_local_test, config, self.tester)
+                state = self.tester.export_state()
+                self.tester.save_results()
+            except Exception as e:
+                self.logger.error(f"Agent test failed: {e}")
+                return web.json_response({"error": str(e)}, status=500)
+            finally:
+                self.tester = None
+            
+            return web.json_response({"state": state, "hostname": socket.gethostname()})
+    
+    async def handle_stop(self, request: web.Request) -> web.Response:
+        tester = self.tester
+        if tester:
+            tester.stop()
+        return web.json_response({"stopping": tester is not None})
+    
+    async def serve(self, host: str, port: int):
+        """Serve the control API until cancelled"""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get("/status", self.handle_status)
+        app.router.add_post("/run", self.handle_run)
+        app.router.add_post("/stop", self.handle_stop)
+        
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        self.logger.info(f"Load test agent listening on {host}:{port} ({self.processes} processes)")
+        
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop_event.set)
+        try:
+            await stop_event.wait()
+        finally:
+            if self.tester:
+                self.tester.stop()
+            await runner.cleanup()
+
+async def run_coordinator(config: TestConfig, agents: List[str], start_delay: float,
+                          tester: "HighPerformanceLoadTester"):
+    """Split the test across agents, start them together and merge their state"""
+    timeout = aiohttp.ClientTimeout(
+        total=start_delay + tester.test_duration_seconds() + 600,
+        connect=10
+    )
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        # Estimate each agent's clock offset so the start is synchronized
+        offsets = []
+        for agent in agents:
+            sent = time.time()
+            async with session.get(f"http://{agent}/status") as response:
+                status = await response.json()
+            received = time.time()
+            if status["state"] != "idle":
+                raise RuntimeError(f"Agent {agent} is busy")
+            offsets.append(status["time"] - (sent + received) / 2)
+            tester.logger.info(f"Agent {agent} ({status['hostname']}): {status['processes']} processes, "
+                               f"clock offset {offsets[-1] * 1000:.1f}ms")
+        
+        agent_configs = split_config(config, len(agents))
+        start_at = time.time() + start_delay
+        tester.logger.info(f"Starting {len(agents)} agents in {start_delay:.1f}s")
+        
+        async def run_slice(agent: str, agent_config: TestConfig, offset: float) -> Dict:
+            payload = {"config": asdict(agent_config), "start_at": start_at + offset}
+            async with session.post(f"http://{agent}/run", json=payload) as response:
+                body = await response.json()
+                if response.status != 200:
+                    raise RuntimeError(body.get("error", f"HTTP {response.status}"))
+                return body
+        
+        async def stop_agents():
+            for agent in agents:
+                try:
+                    async with session.post(f"http://{agent}/stop") as response:
+                        await response.read()
+                except aiohttp.ClientError as e:
+                    tester.logger.error(f"Failed to stop agent {agent}: {e}")
+        
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda: (tester.stop(), asyncio.ensure_future(stop_agents())))
+        
+        responses = await asyncio.gather(
+            *(run_slice(agent, agent_config, offset)
+              for agent, agent_config, offset in zip(agents, agent_configs, offsets)),
+            return_exceptions=True
+        )
+        
+        for agent, agent_config, response in zip(agents, agent_configs, responses):
+            report = {"address": agent, "target_rps": agent_config.target_rps, "users": agent_config.users}
+            if isinstance(response, Exception):
+                tester.logger.error(f"Agent {agent} failed: {response}")
+                report.update(error=str(response), requests=0)
+            else:
+                tester.merge_state(response["state"])
+                report.update(hostname=response["hostname"],
+                              requests=response["state"]["totals"]["total_requests"])
+            tester.agent_reports.append(report)
+
+# ===============================================================================
+# CAPACITY SEARCH
+# ===============================================================================
+
+@dataclass
+class CapacitySLO:
+    """Service level objective a load step must meet to count as sustainable"""
+    p95_ms: float = 100.0
+    error_rate: float = 0.01  # percent, dropped open-loop arrivals included
+    min_throughput: float = 0.9  # achieved / offered RPS
+
+@dataclass
+class CapacityStep:
+    """Measured steady-state behaviour at one offered load"""
+    offered_rps: int
+    achieved_rps: float
+    total_requests: int
+    p50_response_time: float
+    p95_response_time: float
+    p99_response_time: float
+    error_rate: float
+    dropped_requests: int
+    passed: bool
+    breaches: List[str] = field(default_factory=list)
+
+class CapacitySearch:
+    """Find the highest offered load that still meets an SLO
+
+    Load grows geometrically from start_rps until the SLO breaks (or max_rps
+    passes), then the last passing and first failing rates are bisected
+    until they are within the requested resolution. Every step is a full
+    test with a warm-up stage; only its steady stage is judged.
+    """
+    
+    def __init__(self, config: TestConfig, slo: CapacitySLO, start_rps: int, step_duration: int,
+                 warmup: int, growth: float, resolution: float, max_steps: int,
+                 run_step: Callable[[TestConfig, "HighPerformanceLoadTester"], None]):
+        self.config = config
+        self.slo = slo
+        self.start_rps = max(1, min(start_rps, config.target_rps))
+        self.max_rps = config.target_rps
+        self.step_duration = step_duration
+        self.warmup = warmup
+        self.growth = growth
+        self.resolution = resolution
+        self.max_steps = max_steps
+        self.run_step = run_step
+        self.steps: List[CapacityStep] = []
+        self.capacity_rps = 0
+        self.tester: Optional[HighPerformanceLoadTester] = None
+        self.stopped = False
+        self.logger = logging.getLogger(__name__)
+    
+    def stop(self):
+        """Abort the search after the running step"""
+        self.stopped = True
+        if self.tester:
+            self.tester.stop()
+    
+    def step_config(self, rps: int) -> TestConfig:
+        """Configuration of the test measuring one offered load"""
+        output_dir = Path(self.config.output_dir) / "capacity-steps" / f"step-{len(self.steps) + 1:02d}-{rps}rps"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stages = [LoadStage("steady", self.step_duration, rps, rps)]
+        if self.warmup > 0:
+            stages.insert(0, LoadStage("warm-up", self.warmup, rps, rps))
+        return replace(
+            self.config,
+            target_rps=rps,
+            duration=f"{self.warmup + self.step_duration}s",
+            users=max(1, min(self.config.users, rps)),
+            processes=max(1, min(self.config.processes, self.config.users, rps)),
+            output_dir=str(output_dir),
+            test_id=f"{self.config.test_id}-{rps}rps",
+            stages=stages
+        )
+    
+    def evaluate(self, rps: int, tester: "HighPerformanceLoadTester") -> CapacityStep:
+        """Judge the steady stage of a finished step against the SLO"""
+        tester.calculate_metrics()
+        steady = tester.stage_reports()[-1]["metrics"]
+        
+        # Dropped arrivals never reach the target but are failures all the same
+        dropped = tester.metrics.dropped_requests
+        attempted = steady["total_requests"] + dropped
+        error_rate = (steady["failed_requests"] + dropped) / attempted * 100 if attempted else 0.0
+        
+        breaches = []
+        if steady["p95_response_time"] >= self.slo.p95_ms:
+            breaches.append(f"p95 {steady['p95_response_time']:.1f}ms >= {self.slo.p95_ms:g}ms")
+        if error_rate >= self.slo.error_rate:
+            breaches.append(f"error rate {error_rate:.3f}% >= {self.slo.error_rate:g}%")
+        if steady["rps"] < rps * self.slo.min_throughput:
+            breaches.append(f"throughput {steady['rps']:.1f} < {self.slo.min_throughput:.0%} of {rps}")
+        generator = tester.monitor.report(tester.metrics.total_requests)
+        if generator["saturated"]:
+            breaches.append("generator saturated (" + "; ".join(generator["saturation_reasons"]) + ")")
+        if tester.stop_requested:
+            breaches.append("interrupted")
+        
+        return CapacityStep(
+            offered_rps=rps,
+            achieved_rps=steady["rps"],
+            total_requests=steady["total_requests"],
+            p50_response_time=steady["p50_response_time"],
+            p95_response_time=steady["p95_response_time"],
+            p99_response_time=steady["p99_response_time"],
+            error_rate=error_rate,
+            dropped_requests=dropped,
+            passed=not breaches,
+            breaches=breaches
+        )
+    
+    def measure(self, rps: int) -> CapacityStep:
+        """Run one load step and record its outcome"""
+        config = self.step_config(rps)
+        self.logger.info(f"Capacity step {len(self.steps) + 1}: offering {rps:,} RPS")
+        
+        self.tester = HighPerformanceLoadTester(config)
+        self.run_step(config, self.tester)
+        self.tester.save_results()
+        step = self.evaluate(rps, self.tester)
+        self.tester = None
+        
+        self.steps.append(step)
+        verdict = "PASS" if step.passed else "FAIL (" + "; ".join(step.breaches) + ")"
+        self.logger.info(f"  {rps:,} RPS -> {step.achieved_rps:,.1f} RPS achieved, "
+                         f"p95 {step.p95_response_time:.2f}ms, errors {step.error_rate:.3f}%: {verdict}")
+        return step
+    
+    def run(self) -> int:
+        """Search for the highest sustainable RPS"""
+        passing, failing = 0, None
+        
+        # Grow geometrically until the SLO breaks or the ceiling is reached
+        rps = self.start_rps
+        while not self.stopped and len(self.steps) < self.max_steps:
+            if self.measure(rps).passed:
+                passing = rps
+                if rps >= self.max_rps:
+                    break
+                rps = min(self.max_rps, max(rps + 1, int(rps * self.growth)))
+            else:
+                failing = rps
+                break
+        
+        # Bisect between the last passing and the first failing rate
+        while (failing is not None and not self.stopped and len(self.steps) < self.max_steps
+               and failing - passing > max(1, failing * self.resolution)):
+            rps = (passing + failing) // 2
+            if self.measure(rps).passed:
+                passing = rps
+            else:
+                failing = rps
+        
+        self.capacity_rps = passing
+        return passing
+    
+    def save_results(self):
+        """Save the capacity curve as JSON and a text summary"""
+        output_dir = Path(self.config.output_dir)
+        curve = sorted(self.steps, key=lambda step: step.offered_rps)
+        
+        with open(output_dir / "capacity-results.json", "w") as f:
+            json.dump({
+                "test_id": self.config.test_id,
+                "target_url": self.config.target_url,
+                "slo": asdict(self.slo),
+                "capacity_rps": self.capacity_rps,
+                "max_rps": self.max_rps,
+                "steps": [asdict(step) for step in self.steps],  # in execution order
+                "curve": [asdict(step) for step in curve],
+            }, f, indent=2)
+        
+        with open(output_dir / "capacity-summary.txt", "w") as f:
+            f.write(f"Capacity Search Summary\n")
+            f.write(f"=======================\n\n")
+            f.write(f"Test ID: {self.config.test_id}\n")
+            f.write(f"Target URL: {self.config.target_url}\n")
+            f.write(f"SLO: p95 < {self.slo.p95_ms:g}ms, error rate < {self.slo.error_rate:g}%, "
+                    f"throughput >= {self.slo.min_throughput:.0%} of offered\n")
+            f.write(f"Step: {self.warmup}s warm-up + {self.step_duration}s measured\n\n")
+            
+            if self.capacity_rps:
+                ceiling = " (search ceiling, raise --target-rps)" if self.capacity_rps >= self.max_rps else ""
+                f.write(f"Highest sustainable RPS: {self.capacity_rps:,}{ceiling}\n\n")
+            else:
+                f.write(f"Highest sustainable RPS: none (SLO missed at {self.start_rps:,} RPS)\n\n")
+            
+            f.write(f"{'Offered':>10} {'Achieved':>10} {'P50 (ms)':>10} {'P95 (ms)':>10} {'P99 (ms)':>10} "
+                    f"{'Errors %':>9}  Result\n")
+            for step in curve:
+                verdict = "PASS" if step.passed else "FAIL: " + "; ".join(step.breaches)
+                f.write(f"{step.offered_rps:>10,} {step.achieved_rps:>10,.1f} {step.p50_response_time:>10.2f} "
+                        f"{step.p95_response_time:>10.2f} {step.p99_response_time:>10.2f} "
+                        f"{step.error_rate:>9.3f}  {verdict}\n")
+        
+        self.logger.info(f"Capacity results saved to {output_dir}")
+
 # ===============================================================================
 # MAIN EXECUTION
 # ===============================================================================
 
-async def main():
+def resume_test(path: str, output_dir: Optional[str]) -> Tuple[TestConfig, "HighPerformanceLoadTester"]:
+    """Configuration and tester continuing the interrupted run of a checkpoint"""
+    checkpoint = load_checkpoint(path)
+    if checkpoint["final"]:
+        raise ValueError(f"{checkpoint['path']} is from a completed run; report it with --merge-checkpoints")
+    config = config_from_dict(checkpoint["config"])
+    if config.scheduler == "replay":
+        raise ValueError("replay runs cannot be resumed; report the checkpoint with --merge-checkpoints")
+    
+    start, end = checkpoint_span(checkpoint)
+    config = replace(config, output_dir=output_dir or config.output_dir, resume_elapsed=end - start)
+    Path(config.output_dir).mkdir(parents=True, exist_ok=True)
+    tester = HighPerformanceLoadTester(config)
+    if end - start >= tester.test_duration_seconds():
+        raise ValueError(f"{checkpoint['path']} already covers the whole test; report it with --merge-checkpoints")
+    # Line the checkpointed state up with a run that starts now, end - start seconds in
+    tester.merge_checkpoint(checkpoint, time.time() - end)
+    return config, tester
+
+def merge_checkpoints(paths: List[str], output_dir: Optional[str]) -> "HighPerformanceLoadTester":
+    """Tester holding the merged state of checkpoints (e.g. one per agent), without running anything"""
+    checkpoints = [load_checkpoint(path) for path in paths]
+    configs = [config_from_dict(checkpoint["config"]) for checkpoint in checkpoints]
+    config = configs[0]
+    if len(configs) > 1:
+        # Slices of one test (agents): report the load they generated together
+        config = replace(
+            config,
+            target_rps=sum(c.target_rps for c in configs),
+            users=sum(c.users for c in configs),
+            processes=sum(c.processes for c in configs)
+        )
+    config = replace(config, output_dir=output_dir or config.output_dir)
+    Path(config.output_dir).mkdir(parents=True, exist_ok=True)
+    tester = HighPerformanceLoadTester(config)
+    for checkpoint in checkpoints:
+        tester.merge_checkpoint(checkpoint)
+    return tester
+
+def run_and_report(config: TestConfig, tester: "HighPerformanceLoadTester",
+                   run_step: Optional[Callable[[TestConfig, "HighPerformanceLoadTester"], None]] = None):
+    """Run the test (on this node, or on agents through run_step), then save and print its results"""
+    try:
+        if run_step:
+            run_step(config, tester)
+        else:
+            # Setup signal handlers
+            def signal_handler(signum, frame):
+                tester.logger.info("Received interrupt signal, stopping test...")
+                tester.stop()
+            
+            signal.signal(signal.SIGINT, signal_handler)
+            signal.signal(signal.SIGTERM, signal_handler)
+            
+            # Run test
+            run_local_test(config, tester)
+            if config.checkpoint_interval > 0:
+                tester.write_checkpoint(final=True)
+        
+        # Save results
+        tester.save_results()
+        
+        # Print summary
+        print(f"\nTest completed successfully!")
+        print(f"Total requests: {tester.metrics.total_requests:,}")
+        print(f"Actual RPS: {tester.metrics.rps:,.2f}")
+        print(f"Success rate: {(1 - tester.metrics.error_rate/100)*100:.2f}%")
+        print(f"P95 response time: {tester.metrics.p95_response_time:.2f}ms")
+        
+    except Exception as e:
+        print(f"Test failed with error: {e}")
+        sys.exit(1)
+
+def main():
     """Main execution function"""
     parser = argparse.ArgumentParser(description="High-Performance Load Testing Tool")
-    parser.add_argument("--target-url", required=True, help="Target URL for testing")
-    parser.add_argument("--target-rps", type=int, required=True, help="Target requests per second")
-    parser.add_argument("--duration", required=True, help="Test duration (e.g., 30m, 1h)")
-    parser.add_argument("--users", type=int, required=True, help="Number of virtual users")
-    parser.add_argument("--output-dir", required=True, help="Output directory for results")
-    parser.add_argument("--test-id", required=True, help="Test identifier")
+    parser.add_argument("--target-url", help="Target URL for testing")
+    parser.add_argument("--target-rps", type=int, help="Target requests per second")
+    parser.add_argument("--duration", help="Test duration (e.g., 30m, 1h)")
+    parser.add_argument("--users", type=int, help="Number of virtual users")
+    parser.add_argument("--output-dir", help="Output directory for results")
+    parser.add_argument("--test-id", help="Test identifier")
     parser.add_argument("--timeout", type=int, default=30, help="Request timeout in seconds")
     parser.add_argument("--max-connections", type=int, default=1000, help="Maximum connections")
     parser.add_argument("--disable-ssl-verify", action="store_true", help="Disable SSL verification")
+    parser.add_argument("--latency-precision", type=int, default=3, choices=range(1, 6),
+                        help="Significant digits kept by the latency histogram")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Load generator processes (default: CPU count)")
+    parser.add_argument("--scheduler", choices=["closed", "open", "journey", "replay"], default="closed",
+                        help="closed: workers wait for each response; open: requests follow an arrival schedule; "
+                             "journey: --users virtual users run multi-step flows with think time; "
+                             "replay: requests follow a recorded access log (--replay-file)")
+    parser.add_argument("--loop-lag-threshold-ms", type=float, default=50.0,
+                        help="p99 event loop lag above which the generator is reported as saturated")
+    parser.add_argument("--replay-file", help="Access log replayed by --scheduler replay (.gz is decompressed)")
+    parser.add_argument("--replay-format", choices=["auto", "envoy", "csv"], default="auto",
+                        help="envoy: Istio/Envoy JSON access log lines; csv: timestamp,method,path[,body_size] header")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Replay speed multiplier for the recorded inter-arrival times (2 = twice as fast)")
+    parser.add_argument("--product-keys", default="uniform:500",
+                        help="Product id popularity: uniform:N, zipf:N:SKEW or hotspot:N:HOT_KEYS:HOT_TRAFFIC "
+                             "(e.g. zipf:1000000:1.1, hotspot:100000:0.01:0.9)")
+    parser.add_argument("--user-keys", default="uniform:1000", help="User id popularity (same models)")
+    parser.add_argument("--search-keys", default="uniform:10",
+                        help="Search term popularity (same models; terms beyond the built-in ten get numbered)")
+    parser.add_argument("--journey-file", help="JSON list of journey definitions replacing the built-in flows")
+    parser.add_argument("--think-time", default="exponential:1",
+                        help="Pause after each journey step: S, constant:S, uniform:A-B, exponential:MEAN "
+                             "or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="constant",
+                        help="Arrival process used by the open scheduler")
+    parser.add_argument("--max-in-flight", type=int, default=10000,
+                        help="Open scheduler in-flight limit; arrivals beyond it are dropped and counted")
+    parser.add_argument("--late-threshold-ms", type=float, default=10.0,
+                        help="Dispatch delay after which an open-loop request is reported as late")
+    parser.add_argument("--ramp-up", default="0s",
+                        help="Ramp-up duration before the steady --duration (e.g., 10m)")
+    parser.add_argument("--ramp-down", default="0s",
+                        help="Ramp-down duration after the steady --duration (e.g., 5m)")
+    parser.add_argument("--stages",
+                        help="Load profile as DURATION:RPS,... (e.g., 5m:100000,10m:600000,5m:0); "
+                             "overrides --duration, --ramp-up and --ramp-down, and its peak replaces --target-rps")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve live Prometheus metrics on this port (one port per process, counting up)")
+    parser.add_argument("--snapshot-interval", type=float, default=1.0,
+                        help="Seconds between time-series snapshots written to timeseries*.jsonl (0 disables)")
+    parser.add_argument("--raw-output", action="store_true",
+                        help="Stream every result to raw-results*.bin (analyze with analyze-raw-results.py)")
+    parser.add_argument("--stage-shape", choices=["ramp", "step"], default="ramp",
+                        help="ramp: move linearly from the previous stage's RPS; step: hold each stage's RPS")
+    parser.add_argument("--client", choices=sorted(CLIENT_BACKENDS), default="aiohttp",
+                        help="HTTP client backend (raw: lean HTTP/1.1 engine on asyncio protocols)")
+    parser.add_argument("--pipeline-depth", type=int, default=1,
+                        help="Requests pipelined per keep-alive connection (raw client)")
+    parser.add_argument("--h2-connections", type=int, default=8, help="HTTP/2 connections per process (h2 client)")
+    parser.add_argument("--h2-max-streams", type=int, default=100,
+                        help="Concurrent streams per HTTP/2 connection (capped by the server's limit)")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0,
+                        help="Seconds between checkpoints of the aggregated results to checkpoint.json (0 disables)")
+    parser.add_argument("--drain-timeout", type=float, default=10.0,
+                        help="Seconds in-flight requests get to complete after the test ends before being abandoned")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="Continue an interrupted run for the rest of its duration from its checkpoint file "
+                             "or output directory (test options come from the checkpoint)")
+    parser.add_argument("--merge-checkpoints", nargs="+", metavar="CHECKPOINT",
+                        help="Write results from checkpoints (interrupted runs, one per agent, ...) without testing")
+    parser.add_argument("--agent", action="store_true",
+                        help="Run as a distributed agent waiting for a coordinator (only --listen, "
+                             "--output-dir and --processes apply)")
+    parser.add_argument("--listen", default="0.0.0.0:8700", help="Agent control address (HOST:PORT)")
+    parser.add_argument("--coordinator", action="store_true",
+                        help="Split the test across --agents and merge their results")
+    parser.add_argument("--agents", help="Comma-separated agent addresses (HOST:PORT) for --coordinator")
+    parser.add_argument("--start-delay", type=float, default=5.0,
+                        help="Seconds between dispatching the test and the synchronized agent start")
+    parser.add_argument("--find-capacity", action="store_true",
+                        help="Search for the highest RPS meeting the SLO (--target-rps is the ceiling)")
+    parser.add_argument("--slo-p95-ms", type=float, default=100.0, help="Capacity SLO: p95 latency bound")
+    parser.add_argument("--slo-error-rate", type=float, default=0.01, help="Capacity SLO: error rate bound (percent)")
+    parser.add_argument("--slo-min-throughput", type=float, default=0.9,
+                        help="Capacity SLO: minimum achieved/offered RPS ratio")
+    parser.add_argument("--capacity-start-rps", type=int, help="First capacity step (default: 10%% of --target-rps)")
+    parser.add_argument("--capacity-step-duration", default="60s", help="Measured duration of each capacity step")
+    parser.add_argument("--capacity-warmup", default="10s", help="Unmeasured warm-up before each capacity step")
+    parser.add_argument("--capacity-growth", type=float, default=2.0, help="Load multiplier between search steps")
+    parser.add_argument("--capacity-resolution", type=float, default=0.05,
+                        help="Stop bisecting once the pass/fail bracket is within this fraction")
+    parser.add_argument("--capacity-max-steps", type=int, default=20, help="Upper bound on capacity steps")
     
     args = parser.parse_args()
     
+    if args.agent:
+        host, _, port = args.listen.rpartition(":")
+        agent = LoadTestAgent(args.output_dir or "agent-results", max(1, args.processes))
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        asyncio.run(agent.serve(host or "0.0.0.0", int(port)))
+        return
+    
+    if args.merge_checkpoints:
+        try:
+            tester = merge_checkpoints(args.merge_checkpoints, args.output_dir)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        tester.save_results()
+        print(f"\nMerged {len(args.merge_checkpoints)} checkpoints: {tester.metrics.total_requests:,} requests, "
+              f"results in {tester.config.output_dir}")
+        return
+    
+    if args.resume:
+        if args.coordinator or args.find_capacity:
+            parser.error("--resume continues a test on this node; drop --coordinator/--find-capacity")
+        try:
+            config, tester = resume_test(args.resume, args.output_dir)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        run_and_report(config, tester)
+        return
+    
+    missing = [name for name in ("target_url", "target_rps", "duration", "users", "output_dir", "test_id")
+               if getattr(args, name) is None]
+    if missing:
+        parser.error("the following arguments are required: " + ", ".join(f"--{m.replace('_', '-')}" for m in missing))
+    try:
+        parse_think_time(args.think_time)
+        for spec in (args.product_keys, args.user_keys, args.search_keys):
+            KeySpace(spec)
+        journeys = json.loads(Path(args.journey_file).read_text()) if args.journey_file else []
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.client == "h2" and h2 is None:
+        parser.error("--client h2 requires the 'h2' package (pip install h2)")
+    if args.coordinator and not args.agents:
+        parser.error("--coordinator requires --agents")
+    if args.find_capacity and (args.stages or parse_duration(args.ramp_up) or parse_duration(args.ramp_down)):
+        parser.error("--find-capacity builds its own load steps; drop --stages/--ramp-up/--ramp-down")
+    if args.find_capacity and args.capacity_growth <= 1:
+        parser.error("--capacity-growth must be greater than 1")
+    if args.scheduler == "replay":
+        if not args.replay_file:
+            parser.error("--scheduler replay requires --replay-file")
+        if not args.coordinator and not Path(args.replay_file).is_file():
+            parser.error(f"replay file not found: {args.replay_file}")
+        if args.replay_speed <= 0:
+            parser.error("--replay-speed must be positive")
+        if args.find_capacity or args.stages or parse_duration(args.ramp_up) or parse_duration(args.ramp_down):
+            parser.error("--scheduler replay takes its timing from the log; drop --find-capacity/--stages/--ramp-*")
+    
+    # Build the load profile
+    target_rps = args.target_rps
+    try:
+        if args.stages:
+            stages = build_load_profile(args.stages, args.stage_shape)
+            target_rps = max(1, int(max(stage.target_rps for stage in stages)))
+        elif parse_duration(args.ramp_up) or parse_duration(args.ramp_down):
+            stages = build_ramp_profile(
+                target_rps,
+                parse_duration(args.ramp_up),
+                parse_duration(args.duration),
+                parse_duration(args.ramp_down)
+            )
+        else:
+            stages = []
+    except ValueError as e:
+        parser.error(str(e))
+    
+    # Never run more processes than there are users or requests to share
+    processes = max(1, min(args.processes, args.users, target_rps))
+    if args.scheduler == "replay":
+        processes = max(1, args.processes)  # the log sets the rate
+    
     # Create configuration
     config = TestConfig(
         target_url=args.target_url,
-        target_rps=args.target_rps,
+        target_rps=target_rps,
         duration=args.duration,
         users=args.users,
         output_dir=args.output_dir,
         test_id=args.test_id,
         timeout=args.timeout,
         max_connections=args.max_connections,
-        enable_ssl_verify=not args.disable_ssl_verify
+        enable_ssl_verify=not args.disable_ssl_verify,
+        latency_precision=args.latency_precision,
+        processes=processes,
+        scheduler=args.scheduler,
+        arrival_process=args.arrival,
+        max_in_flight=args.max_in_flight,
+        late_threshold_ms=args.late_threshold_ms,
+        stages=stages,
+        metrics_port=args.metrics_port,
+        snapshot_interval=args.snapshot_interval,
+        raw_output=args.raw_output,
+        client_backend=args.client,
+        pipeline_depth=args.pipeline_depth,
+        h2_connections=args.h2_connections,
+        h2_max_streams=args.h2_max_streams,
+        journeys=journeys,
+        think_time=args.think_time,
+        loop_lag_threshold_ms=args.loop_lag_threshold_ms,
+        replay_file=args.replay_file,
+        replay_format=args.replay_format,
+        replay_speed=args.replay_speed,
+        product_keys=args.product_keys,
+        user_keys=args.user_keys,
+        search_keys=args.search_keys,
+        checkpoint_interval=args.checkpoint_interval,
+        drain_timeout=args.drain_timeout
     )
     
-    # Create and run load tester
-    tester = HighPerformanceLoadTester(config)
-    
-    # Setup signal handlers
-    def signal_handler(signum, frame):
-        tester.logger.info("Received interrupt signal, stopping test...")
-        tester.running = False
+    # Create load tester (aggregates worker processes or agents); it logs into output_dir from the start
+    Path(config.output_dir).mkdir(parents=True, exist_ok=True)
+    try:
+        tester = HighPerformanceLoadTester(config)
+    except ValueError as e:  # e.g. invalid --journey-file definitions
+        parser.error(str(e))
     
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    if args.coordinator:
+        agents = [agent.strip() for agent in args.agents.split(",") if agent.strip()]
+        run_step = lambda step_config, step_tester: asyncio.run(
+            run_coordinator(step_config, agents, args.start_delay, step_tester))
+    else:
+        run_step = run_local_test
     
-    try:
-        # Run test
-        await tester.run_test()
+    if args.find_capacity:
+        search = CapacitySearch(
+            config,
+            CapacitySLO(args.slo_p95_ms, args.slo_error_rate, args.slo_min_throughput),
+            start_rps=args.capacity_start_rps or max(1, target_rps // 10),
+            step_duration=parse_duration(args.capacity_step_duration),
+            warmup=parse_duration(args.capacity_warmup),
+            growth=args.capacity_growth,
+            resolution=args.capacity_resolution,
+            max_steps=args.capacity_max_steps,
+            run_step=run_step
+        )
         
-        # Save results
-        tester.save_results()
+        def signal_handler(signum, frame):
+            tester.logger.info("Received interrupt signal, stopping capacity search...")
+            search.stop()
         
-        # Print summary
-        print(f"\nTest completed successfully!")
-        print(f"Total requests: {tester.metrics.total_requests:,}")
-        print(f"Actual RPS: {tester.metrics.rps:,.2f}")
-        print(f"Success rate: {(1 - tester.metrics.error_rate/100)*100:.2f}%")
-        print(f"P95 response time: {tester.metrics.p95_response_time:.2f}ms")
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
         
-    except Exception as e:
-        print(f"Test failed with error: {e}")
-        sys.exit(1)
+        try:
+            capacity = search.run()
+            search.save_results()
+            print(f"\nCapacity search completed after {len(search.steps)} steps")
+            print(f"Highest sustainable RPS: {capacity:,}")
+        except Exception as e:
+            print(f"Capacity search failed with error: {e}")
+            sys.exit(1)
+        return
+    
+    run_and_report(config, tester, run_step if args.coordinator else None)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
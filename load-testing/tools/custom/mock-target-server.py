@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Mock Target Server
+High-throughput local stand-in for the shop services. Serves every route of
+high-performance-test.py's setup_endpoints over HTTP/1.1 (keep-alive and
+pipelining) and h2c, with configurable latency distributions, error
+injection and response sizes, so the load generator can be exercised and
+benchmarked without a cluster.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import random
+import signal
+import statistics
+from collections import deque
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# high-performance-test.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location(
+    "high_performance_test", Path(__file__).with_name("high-performance-test.py")
+)
+hpt = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(hpt)
+
+# ===============================================================================
+# CONFIGURATION
+# ===============================================================================
+
+@dataclass
+class RouteBehavior:
+    """How the mock answers one route"""
+    latency: str = "constant:0"  # milliseconds, in --think-time form (e.g. lognormal:20:0.5)
+    error_rate: float = 0.0  # fraction of requests answered with error_status
+    error_status: int = 500
+    response_size: int = 0  # minimum response body size in bytes (padded)
+
+def load_behaviors(default: RouteBehavior, config_file: Optional[str]) -> Tuple[RouteBehavior, Dict[str, RouteBehavior]]:
+    """Default behavior and per-route overrides
+
+    The optional JSON file looks like
+    {"default": {"latency": "exponential:5"}, "routes": {"product_search": {"error_rate": 0.02}}}
+    where route keys are setup_endpoints names.
+    """
+    if not config_file:
+        return default, {}
+    with open(config_file) as f:
+        data = json.load(f)
+    default = replace(default, **data.get("default", {}))
+    overrides = {name: replace(default, **values) for name, values in data.get("routes", {}).items()}
+    return default, overrides
+
+def latency_quantile(spec: str, percentile: float) -> float:
+    """Exact percentile (0-100) of a latency distribution spec, in the spec's unit"""
+    kind, _, params = spec.partition(":")
+    p = percentile / 100.0
+    if not params:
+        return float(kind)
+    if kind == "constant":
+        return float(params)
+    if kind == "uniform":
+        low, high = (float(value) for value in params.split("-"))
+        return low + (high - low) * p
+    if kind == "exponential":
+        return -float(params) * math.log(1 - p) if p < 1 else float("inf")
+    if kind == "lognormal":
+        median, sigma = (float(value) for value in params.split(":"))
+        return median * math.exp(sigma * statistics.NormalDist().inv_cdf(p))
+    raise ValueError(f"Invalid latency: {spec!r}")
+
+# ===============================================================================
+# ROUTES
+# ===============================================================================
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+           500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+def tester_endpoints() -> List[Dict]:
+    """The load tester's endpoint table, with paths relative to the server root"""
+    stub = SimpleNamespace(config=SimpleNamespace(target_url=""))
+    return hpt.HighPerformanceLoadTester.setup_endpoints(stub)
+
+def response_document(name: str, path: str) -> Tuple[int, Dict]:
+    """Status and JSON body for a route, shaped so journey extractions find their values"""
+    products = [{"id": f"product_{i}", "name": f"Product {i}", "price": 10 + i, "stock": 100} for i in range(1, 21)]
+    if name in ("products_list", "product_search", "featured_products"):
+        return 200, {"items": products, "total": 500, "page": 1}
+    if name == "product_detail":
+        return 200, {"id": path.rsplit("/", 1)[-1], "name": "Product", "price": 49.9, "stock": 100}
+    if name == "categories":
+        return 200, {"items": [{"id": category, "name": category.title()}
+                               for category in ("electronics", "clothing", "books", "home", "sports")]}
+    if name == "search_suggestions":
+        return 200, {"suggestions": ["laptop", "laptop bag", "laptop stand"]}
+    if name == "user_login":
+        return 200, {"access_token": "mock-token", "token_type": "bearer", "expires_in": 3600}
+    if name in ("create_order", "cart_add"):
+        return 201, {"id": "order_1", "status": "created"}
+    if name == "process_payment":
+        return 201, {"paymentId": "payment_1", "status": "completed"}
+    return 200, {"status": "ok", "route": name}
+
+def encode_body(document: Dict, size: int) -> bytes:
+    """JSON-encode a document, padding it to at least size bytes"""
+    body = json.dumps(document, separators=(",", ":")).encode()
+    if len(body) < size:
+        document = {**document, "pad": ""}
+        padding = size - len(json.dumps(document, separators=(",", ":")).encode())
+        document["pad"] = "x" * max(0, padding)
+        body = json.dumps(document, separators=(",", ":")).encode()
+    return body
+
+class Route:
+    """A served endpoint with its latency sampler and pre-encoded responses"""
+
+    def __init__(self, name: str, behavior: RouteBehavior):
+        self.name = name
+        self.behavior = behavior
+        self.sample_latency: Callable[[], float] = hpt.parse_think_time(behavior.latency)
+        self.dynamic = name == "product_detail"  # echoes the requested ID
+        self.status, document = response_document(name, "/product_1")
+        self.body = encode_body(document, behavior.response_size)
+        self.error_body = encode_body({"error": "injected", "route": name}, 0)
+
+    def delay(self) -> float:
+        """Injected latency in seconds"""
+        return max(0.0, self.sample_latency()) / 1000.0
+
+    def response(self, path: str) -> Tuple[int, bytes]:
+        """(status, body) for one request, with error injection"""
+        if self.behavior.error_rate and random.random() < self.behavior.error_rate:
+            return self.behavior.error_status, self.error_body
+        if self.dynamic:
+            return self.status, encode_body(response_document(self.name, path.split("?", 1)[0])[1],
+                                            self.behavior.response_size)
+        return self.status, self.body
+
+class Router:
+    """Maps (method, path) to a Route, caching lookups"""
+
+    CACHE_SIZE = 65536
+
+    def __init__(self, default: RouteBehavior, overrides: Dict[str, RouteBehavior]):
+        endpoints = tester_endpoints()
+        self.routes = {endpoint["name"]: Route(endpoint["name"], overrides.get(endpoint["name"], default))
+                       for endpoint in endpoints}
+        self.patterns = hpt.build_replay_routes(endpoints, "")
+        self.not_found = Route("not_found", replace(default, error_rate=0.0))
+        self.not_found.status = 404
+        self.not_found.body = encode_body({"error": "not found"}, 0)
+        self.cache: Dict[Tuple[str, str], Route] = {}
+
+    def match(self, method: str, path: str) -> Route:
+        key = (method, path)
+        route = self.cache.get(key)
+        if route is None:
+            route = self.not_found
+            bare = path.split("?", 1)[0]
+            for route_method, pattern, name in self.patterns:
+                if route_method == method and pattern.fullmatch(bare):
+                    route = self.routes[name]
+                    break
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache.clear()
+            self.cache[key] = route
+        return route
+
+# ===============================================================================
+# SERVER
+# ===============================================================================
+
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+def http1_response(status: int, body: bytes) -> bytes:
+    return (f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+class MockProtocol(asyncio.Protocol):
+    """One client connection: HTTP/1.1 with pipelining, or h2c after the connection preface
+
+    Pipelined HTTP/1.1 responses must leave in request order, so each request
+    takes a slot in a queue and the queue is flushed up to the first response
+    whose injected latency has not elapsed yet.
+    """
+
+    def __init__(self, router: Router):
+        self.router = router
+        self.loop = asyncio.get_running_loop()
+        self.transport = None
+        self.buffer = b""
+        self.slots: Deque[List] = deque()
+        self.h2 = None
+        self.h2_headers: Dict[int, Dict[bytes, bytes]] = {}  # stream -> request headers until its body ends
+        self.h2_pending: Dict[int, bytes] = {}  # stream -> body bytes blocked by flow control
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        if self.h2 is not None:
+            self.h2_received(data)
+            return
+
+        self.buffer += data
+        if self.buffer.startswith(H2_PREFACE[:len(self.buffer)]) and hpt.h2 is not None:
+            if len(self.buffer) < len(H2_PREFACE):
+                return
+            self.start_h2()
+            return
+
+        while True:
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                return
+            head = self.buffer[:end]
+            content_length = 0
+            marker = head.lower().find(b"\r\ncontent-length:")
+            if marker >= 0:
+                value_end = head.find(b"\r\n", marker + 2)
+                content_length = int(head[marker + 17:value_end if value_end >= 0 else len(head)])
+            if len(self.buffer) < end + 4 + content_length:
+                return
+            self.buffer = self.buffer[end + 4 + content_length:]
+
+            line_end = head.find(b"\r\n")
+            try:
+                method, target, _ = (head if line_end < 0 else head[:line_end]).decode("latin-1").split(" ", 2)
+            except ValueError:
+                self.transport.close()
+                return
+            self.handle_http1(method, target)
+
+    def handle_http1(self, method: str, path: str):
+        route = self.router.match(method, path)
+        slot = [None]
+        self.slots.append(slot)
+        delay = route.delay()
+        if delay > 0:
+            self.loop.call_later(delay, self.complete, slot, route, path)
+        else:
+            self.complete(slot, route, path)
+
+    def complete(self, slot: List, route: Route, path: str):
+        slot[0] = http1_response(*route.response(path))
+        if self.transport.is_closing():
+            return
+        ready = []
+        while self.slots and self.slots[0][0] is not None:
+            ready.append(self.slots.popleft()[0])
+        if ready:
+            self.transport.writelines(ready)
+
+    def start_h2(self):
+        self.h2 = hpt.h2.connection.H2Connection(
+            config=hpt.h2.config.H2Configuration(client_side=False, header_encoding=None)
+        )
+        self.h2.initiate_connection()
+        self.h2.update_settings({hpt.h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+        data, self.buffer = self.buffer, b""
+        self.h2_received(data)
+
+    def h2_received(self, data: bytes):
+        try:
+            events = self.h2.receive_data(data)
+        except hpt.h2.exceptions.ProtocolError:
+            self.transport.close()
+            return
+        headers = self.h2_headers
+        for event in events:
+            if isinstance(event, hpt.h2.events.RequestReceived):
+                headers[event.stream_id] = dict(event.headers)
+                if event.stream_ended is not None:
+                    self.h2_request(event.stream_id, headers.pop(event.stream_id))
+            elif isinstance(event, hpt.h2.events.StreamEnded) and event.stream_id in headers:
+                self.h2_request(event.stream_id, headers.pop(event.stream_id))
+            elif isinstance(event, hpt.h2.events.DataReceived):
+                self.h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, hpt.h2.events.WindowUpdated):
+                self.h2_send_pending()
+            elif isinstance(event, hpt.h2.events.StreamReset):
+                headers.pop(event.stream_id, None)
+                self.h2_pending.pop(event.stream_id, None)
+        self.transport.write(self.h2.data_to_send())
+
+    def h2_request(self, stream_id: int, headers: Dict[bytes, bytes]):
+        method = headers.get(b":method", b"GET").decode()
+        path = headers.get(b":path", b"/").decode()
+        route = self.router.match(method, path)
+        delay = route.delay()
+        if delay > 0:
+            self.loop.call_later(delay, self.h2_respond, stream_id, route, path)
+        else:
+            self.h2_respond(stream_id, route, path, flush=False)
+
+    def h2_respond(self, stream_id: int, route: Route, path: str, flush: bool = True):
+        if self.transport.is_closing():
+            return
+        status, body = route.response(path)
+        try:
+            self.h2.send_headers(stream_id, [
+                (b":status", str(status).encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ])
+        except hpt.h2.exceptions.ProtocolError:
+            return  # stream reset by the client
+        self.h2_pending[stream_id] = body
+        self.h2_send_pending()
+        if flush:
+            self.transport.write(self.h2.data_to_send())
+
+    def h2_send_pending(self):
+        """Send response bodies as far as the flow control windows allow"""
+        for stream_id in list(self.h2_pending):
+            body = self.h2_pending[stream_id]
+            try:
+                window = min(self.h2.local_flow_control_window(stream_id), self.h2.max_outbound_frame_size)
+                while body and window > 0:
+                    chunk, body = body[:window], body[window:]
+                    self.h2.send_data(stream_id, chunk)
+                    window = min(self.h2.local_flow_control_window(stream_id), self.h2.max_outbound_frame_size)
+                if not body:
+                    self.h2.end_stream(stream_id)
+                    del self.h2_pending[stream_id]
+                else:
+                    self.h2_pending[stream_id] = body
+            except hpt.h2.exceptions.ProtocolError:
+                del self.h2_pending[stream_id]
+
+def run_server(host: str, port: int, default: RouteBehavior, overrides: Dict[str, RouteBehavior],
+               reuse_port: bool, ready=None):
+    """Serve until SIGINT/SIGTERM (entry point of each worker process)"""
+    async def serve():
+        loop = asyncio.get_running_loop()
+        router = Router(default, overrides)
+        server = await loop.create_server(lambda: MockProtocol(router), host, port,
+                                          backlog=4096, reuse_port=reuse_port)
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        if ready is not None:
+            ready.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await stop.wait()
+
+    asyncio.run(serve())
+
+# ===============================================================================
+# MAIN EXECUTION
+# ===============================================================================
+
+def main():
+    """Main execution function"""
+    defaults = RouteBehavior()
+    parser = argparse.ArgumentParser(description="Local stand-in target for high-performance-test.py")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address")
+    parser.add_argument("--port", type=int, default=8080, help="Listen port (0 picks a free one)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Server processes sharing the port (SO_REUSEPORT)")
+    parser.add_argument("--latency", default=defaults.latency,
+                        help="Injected latency in ms: MS, constant:MS, uniform:A-B, exponential:MEAN "
+                             "or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status, help="Injected error status")
+    parser.add_argument("--response-size", type=int, default=defaults.response_size,
+                        help="Minimum response body size in bytes")
+    parser.add_argument("--config", help="JSON file with default and per-route behavior overrides")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger("mock-target")
+
+    try:
+        default, overrides = load_behaviors(RouteBehavior(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            response_size=args.response_size
+        ), args.config)
+        for behavior in itertools.chain([default], overrides.values()):
+            hpt.parse_think_time(behavior.latency)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    unknown = sorted(set(overrides) - {endpoint["name"] for endpoint in tester_endpoints()})
+    if unknown:
+        parser.error(f"unknown routes in {args.config}: {', '.join(unknown)}")
+
+    workers = max(1, args.workers)
+    ready = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=run_server, name=f"mock-target-{i}",
+                                args=(args.host, args.port, default, overrides, workers > 1, ready))
+        for i in range(workers if args.port else 1)
+    ]
+    for process in processes:
+        process.start()
+    port = ready.get(timeout=30)
+    for _ in processes[1:]:
+        ready.get(timeout=30)
+
+    logger.info(f"Mock target listening on http://{args.host}:{port} with {len(processes)} worker(s)")
+    logger.info(f"Default behavior: {asdict(default)}")
+    for name, behavior in overrides.items():
+        logger.info(f"  {name}: {asdict(behavior)}")
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
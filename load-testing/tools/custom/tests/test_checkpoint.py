@@ -0,0 +1,97 @@
+"""
+Checkpoint Tests
+Checkpoints of a running test must describe the same state as export_state()
+and must not stall the event loop, since the open scheduler measures latency
+from each request's intended send time.
+"""
+
+import asyncio
+import importlib.util
+import json
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+# high-performance-test.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location(
+    "high_performance_test", Path(__file__).resolve().parent.parent / "high-performance-test.py"
+)
+hpt = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(hpt)
+
+
+def build_tester(output_dir: Path, results: int = 200000, checkpoint_interval: float = 0.1):
+    """Tester holding the state of a long run: well-populated histograms on every endpoint"""
+    config = hpt.TestConfig("http://localhost:8080", 500, "1m", 10, str(output_dir), "checkpoint-test",
+                            checkpoint_interval=checkpoint_interval)
+    tester = hpt.HighPerformanceLoadTester(config)
+    rng = random.Random(7)
+    names = [endpoint["name"] for endpoint in tester.endpoints]
+    now = time.time()
+    tester.metrics.start_time = now
+    for _ in range(results):
+        tester.record_result(hpt.RequestResult(now, "http://localhost:8080/", "GET", 200,
+                                               rng.lognormvariate(1.5, 0.8), True, None, 512, rng.choice(names)))
+    return tester
+
+
+async def measure_schedule(tester, checkpoints: bool, seconds: float = 2.0, interval: float = 0.002):
+    """Latencies from intended send times of a paced loop, as the open scheduler records them"""
+    tester.running = True
+    task = asyncio.create_task(tester.checkpoint_loop()) if checkpoints else None
+    histogram = hpt.LatencyHistogram()
+    start = time.perf_counter()
+    for n in range(1, int(seconds / interval) + 1):
+        intended = start + n * interval
+        await asyncio.sleep(max(0.0, intended - time.perf_counter()))
+        histogram.record((time.perf_counter() - intended) * 1000)
+    tester.running = False
+    if task:
+        await task
+    return histogram
+
+
+def test_histogram_round_trip_and_legacy_counts():
+    histogram = hpt.LatencyHistogram()
+    for value in (0.5, 1.2, 1.2, 48.0, 950.0):
+        histogram.record(value)
+
+    restored = hpt.LatencyHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+    assert restored.counts == histogram.counts
+
+    legacy = histogram.to_dict()
+    counts = legacy["counts"]
+    legacy["counts"] = [[index, count] for index, count in zip(counts["indexes"], counts["values"])]
+    assert hpt.LatencyHistogram.from_dict(legacy).counts == histogram.counts
+
+
+def test_checkpoint_matches_export_state(tmp_path):
+    tester = build_tester(tmp_path, results=20000)
+    snapshot = tester.snapshot_state()
+    expected = json.loads(json.dumps(tester.export_state()))
+    assert json.loads(hpt.state_json(snapshot)) == expected
+
+    # The snapshot is a copy: results recorded while it is serialized don't leak in
+    tester.record_result(hpt.RequestResult(time.time(), "http://localhost:8080/", "GET", 500, 5.0, False,
+                                           "HTTP 500", 0, tester.endpoints[0]["name"]))
+    assert json.loads(hpt.state_json(snapshot)) == expected
+
+
+def test_checkpointing_does_not_change_recorded_percentiles(tmp_path):
+    tester = build_tester(tmp_path)
+    started = time.perf_counter()
+    json.dumps(tester.export_state())
+    inline_ms = (time.perf_counter() - started) * 1000
+
+    baseline = asyncio.run(measure_schedule(tester, checkpoints=False))
+    checkpointed = asyncio.run(measure_schedule(tester, checkpoints=True))
+
+    assert (tmp_path / tester.config.checkpoint_file).exists()
+    # Serializing on the loop would add about inline_ms to every checkpointed sample
+    tolerance = max(10.0, inline_ms / 3)
+    for percentile in (50, 95, 99):
+        assert checkpointed.value_at_percentile(percentile) == pytest.approx(
+            baseline.value_at_percentile(percentile), abs=tolerance
+        ), f"p{percentile} moved by checkpoints (serialization takes {inline_ms:.0f}ms)"
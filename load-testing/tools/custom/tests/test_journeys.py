@@ -0,0 +1,44 @@
+"""
+Journey Definition Tests
+Journey files are validated when the tester compiles them, so a bad file
+fails the run up front instead of crashing virtual users mid-test.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+# high-performance-test.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location(
+    "high_performance_test", Path(__file__).resolve().parent.parent / "high-performance-test.py"
+)
+hpt = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(hpt)
+
+BASE_URL = "http://localhost:8080"
+ENDPOINTS = [{"name": "health", "url": f"{BASE_URL}/health", "method": "GET"}]
+
+
+def test_builds_steps_from_endpoint_defaults():
+    journeys = hpt.build_journeys([{"name": "ping", "steps": [{"endpoint": "health"}]}], ENDPOINTS, BASE_URL)
+
+    assert [(step.method, step.path) for step in journeys[0].steps] == [("GET", "/health")]
+
+
+@pytest.mark.parametrize("definition", [{"name": "empty", "steps": []}, {"name": "empty"}])
+def test_rejects_journey_without_steps(definition):
+    with pytest.raises(ValueError, match="has no steps"):
+        hpt.build_journeys([definition], ENDPOINTS, BASE_URL)
+
+
+def test_rejects_unknown_endpoint():
+    with pytest.raises(ValueError, match="unknown endpoint"):
+        hpt.build_journeys([{"name": "lost", "steps": [{"endpoint": "nowhere"}]}], ENDPOINTS, BASE_URL)
+
+
+def test_tester_rejects_journey_file_without_steps(tmp_path):
+    config = hpt.TestConfig(BASE_URL, 10, "1m", 1, str(tmp_path), "journeys", journeys=[{"name": "empty", "steps": []}])
+
+    with pytest.raises(ValueError, match="has no steps"):
+        hpt.HighPerformanceLoadTester(config)
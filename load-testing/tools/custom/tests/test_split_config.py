@@ -0,0 +1,38 @@
+"""
+Config Splitting Tests
+split_config divides one test across generator processes or agents; the parts
+must add back up to the original load.
+"""
+
+import importlib.util
+from pathlib import Path
+
+# high-performance-test.py is a script (hyphenated name), load it by path
+_spec = importlib.util.spec_from_file_location(
+    "high_performance_test", Path(__file__).resolve().parent.parent / "high-performance-test.py"
+)
+hpt = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(hpt)
+
+
+def config(target_rps: int, **overrides) -> "hpt.TestConfig":
+    return hpt.TestConfig("http://localhost:8080", target_rps, "1m", 10, "results", "split", **overrides)
+
+
+def test_parts_add_up_to_the_original_load():
+    stages = [hpt.LoadStage(name="steady", duration=60, target_rps=100, start_rps=10)]
+    parts = hpt.split_config(config(100, stages=stages), 3)
+
+    assert [part.target_rps for part in parts] == [34, 33, 33]
+    assert sum(part.users for part in parts) == 10
+    assert sum(part.stages[0].target_rps for part in parts) == 100
+
+
+def test_zero_target_rps_splits_evenly():
+    # --scheduler replay takes its rate from the log, so --target-rps may be 0
+    stages = [hpt.LoadStage(name="steady", duration=60, target_rps=30, start_rps=0)]
+    parts = hpt.split_config(config(0, scheduler="replay", replay_file="access.log", stages=stages), 3)
+
+    assert [part.target_rps for part in parts] == [0, 0, 0]
+    assert [part.stages[0].target_rps for part in parts] == [10, 10, 10]
+    assert [part.replay_partition for part in parts] == [0, 1, 2]